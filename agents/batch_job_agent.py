@@ -0,0 +1,285 @@
+# agents/batch_job_agent.py
+
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from agents.explainability_agent import ExplainabilityAgent
+from agents.report_agent import ReportAgent, _safe_name
+from utils.job_queue import FileQueue, default_worker_id
+from utils.model_registry import ModelRegistry
+from utils.tracing import span
+
+JOB_FILE = "job.json"
+
+
+def _write_csv_atomic(df, path):
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+class BatchJobAgent:
+
+    # Resumable cohort scoring + SHAP + HTML reports, split into shards
+    # on a FileQueue. A job directory holds everything workers need, so
+    # any process that can see it (locally or over NFS) can work on it:
+    #
+    #   <job_dir>/job.json                 settings, written last by submit
+    #   <job_dir>/registry/<disease>/vN/   the model the job was submitted with
+    #   <job_dir>/inputs/shard-NNNNN.parquet
+    #   <job_dir>/queue/{pending,running,done,failed}/shard-NNNNN.json
+    #   <job_dir>/results/shard-NNNNN.csv  scores per shard (checkpoint)
+    #   <job_dir>/reports/<disease>/<job_id>/<patient>.html
+
+    def __init__(self, shard_rows=5000, lease_seconds=300, max_attempts=3, top_k=10):
+        self.shard_rows = shard_rows
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.top_k = top_k
+
+    # ======================================================
+    # Submit
+    # ======================================================
+    def submit(self, prediction_output, patients, job_dir, registry, id_column=None):
+
+        disease = prediction_output["disease"]
+        version = prediction_output["model_version"]
+
+        if os.path.exists(os.path.join(job_dir, JOB_FILE)):
+            raise ValueError(f"Job already exists: {job_dir} (run workers to resume it)")
+
+        source = patients if isinstance(patients, (str, os.PathLike)) else None
+        if source is not None:
+            patients = pd.read_csv(patients)
+
+        if patients.empty:
+            raise ValueError("Patient cohort is empty")
+
+        # Report file names come from the IDs: they must be unique
+        # across the whole cohort, not just within a shard
+        if id_column is not None:
+            if id_column not in patients.columns:
+                raise ValueError(f"ID column '{id_column}' not found in cohort")
+            if patients[id_column].astype(str).map(_safe_name).duplicated().any():
+                raise ValueError("Patient IDs must be unique (after filename sanitizing)")
+
+        # ======================================================
+        # 1️⃣ Model Snapshot + Input Shards
+        # ======================================================
+        registry.export(disease, version, os.path.join(job_dir, "registry"))
+
+        os.makedirs(os.path.join(job_dir, "inputs"), exist_ok=True)
+        os.makedirs(os.path.join(job_dir, "results"), exist_ok=True)
+
+        queue = FileQueue(
+            os.path.join(job_dir, "queue"), self.lease_seconds, self.max_attempts
+        ).create()
+
+        shards = []
+        for start in range(0, len(patients), self.shard_rows):
+            shard_id = f"shard-{len(shards):05d}"
+            stop = min(start + self.shard_rows, len(patients))
+
+            input_path = os.path.join("inputs", f"{shard_id}.parquet")
+            patients.iloc[start:stop].to_parquet(os.path.join(job_dir, input_path), index=False)
+
+            shards.append({"shard_id": shard_id, "input": input_path, "start": start, "stop": stop})
+
+        # ======================================================
+        # 2️⃣ Queue + job.json (last: a job is visible only once complete)
+        # ======================================================
+        for shard in shards:
+            queue.put(shard["shard_id"], shard)
+
+        job = {
+            "job_id": f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "disease": disease,
+            "model_version": version,
+            "best_model": prediction_output["best_model"],
+            "source": os.path.abspath(source) if source is not None else None,
+            "id_column": id_column,
+            "rows": len(patients),
+            "shard_rows": self.shard_rows,
+            "shards": len(shards),
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+            "top_k": self.top_k
+        }
+
+        tmp_path = os.path.join(job_dir, f"{JOB_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2)
+        os.replace(tmp_path, os.path.join(job_dir, JOB_FILE))
+
+        return dict(job, job_dir=job_dir)
+
+    # ======================================================
+    # Work
+    # ======================================================
+    def load_job(self, job_dir):
+
+        path = os.path.join(job_dir, JOB_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No submitted job in {job_dir}")
+
+        with open(path, encoding="utf-8") as f:
+            job = json.load(f)
+
+        queue = FileQueue(
+            os.path.join(job_dir, "queue"), job["lease_seconds"], job["max_attempts"]
+        )
+
+        return job, queue
+
+    def _run_shard(self, job_dir, job, prediction_output, shard, explain_tool, report_tool):
+
+        patients = pd.read_parquet(os.path.join(job_dir, shard["input"]))
+        id_column = job["id_column"]
+
+        if id_column is not None:
+            patient_ids = patients[id_column].astype(str).tolist()
+        else:
+            # Global row numbers keep IDs unique across shards
+            patient_ids = [f"patient_{i}" for i in range(shard["start"], shard["stop"])]
+
+        X = prediction_output["preprocessor"].transform(patients)
+
+        cohort = explain_tool.explain_cohort(prediction_output, X)
+        reports = report_tool.run_cohort(
+            cohort, prediction_output, patient_ids=patient_ids, run_id=job["job_id"]
+        )
+
+        # Same columns as BatchScoringAgent, plus the report file
+        scores = pd.DataFrame({
+            id_column or "patient_index": (
+                patients[id_column].to_numpy() if id_column else range(shard["start"], shard["stop"])
+            ),
+            "probability": cohort["probabilities"].round(4),
+            "risk_level": cohort["risk_levels"],
+            "report_path": [os.path.relpath(path, job_dir) for path in reports["paths"]]
+        })
+
+        results_path = os.path.join("results", f"{shard['shard_id']}.csv")
+        _write_csv_atomic(scores, os.path.join(job_dir, results_path))
+
+        return {"rows": len(scores), "results": results_path}
+
+    def work(self, job_dir, worker_id=None, max_shards=None):
+
+        # Claims shards until the queue is empty (or max_shards are done).
+        # Finished shards are checkpointed in queue/done and never redone.
+        worker_id = worker_id or default_worker_id()
+        job, queue = self.load_job(job_dir)
+
+        prediction_output = ModelRegistry(os.path.join(job_dir, "registry")).load(
+            job["disease"], job["model_version"]
+        )
+        # One core per worker: throughput scales with the worker count,
+        # not with nested SHAP process pools
+        explain_tool = ExplainabilityAgent(n_jobs=1)
+        report_tool = ReportAgent(output_dir=os.path.join(job_dir, "reports"), top_k=job["top_k"])
+
+        start = time.perf_counter()
+        done, rows, failed = 0, 0, []
+
+        while max_shards is None or done < max_shards:
+            record = queue.claim(worker_id)
+
+            if record is None:
+                # Shards still running elsewhere may come back if their
+                # worker dies: wait for them before leaving
+                if queue.counts()["running"] == 0:
+                    break
+                time.sleep(min(5.0, job["lease_seconds"] / 3))
+                continue
+
+            shard = record["payload"]
+
+            with span("job_shard", job_id=job["job_id"], shard=shard["shard_id"],
+                      worker=worker_id, attempt=record["attempts"]) as current:
+                try:
+                    with queue.lease(shard["shard_id"]):
+                        result = self._run_shard(
+                            job_dir, job, prediction_output, shard, explain_tool, report_tool
+                        )
+                except Exception as e:
+                    state = queue.release(record, f"{worker_id}: {type(e).__name__}: {e}")
+                    failed.append({"shard_id": shard["shard_id"], "state": state, "error": str(e)})
+                    current.set(status=state)
+                    continue
+
+                queue.complete(record, dict(result, worker_id=worker_id))
+                current.set(rows=result["rows"])
+
+            done += 1
+            rows += result["rows"]
+
+        return {
+            "job_id": job["job_id"],
+            "worker_id": worker_id,
+            "shards": done,
+            "rows": rows,
+            "failed": failed,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    # ======================================================
+    # Status / Merge
+    # ======================================================
+    def status(self, job_dir):
+
+        job, queue = self.load_job(job_dir)
+        counts = queue.counts()
+
+        return {
+            "job_id": job["job_id"],
+            "disease": job["disease"],
+            "model_version": job["model_version"],
+            "shards": job["shards"],
+            **counts,
+            "rows_done": sum(r["result"]["rows"] for r in queue.tasks("done")),
+            "rows": job["rows"],
+            "complete": counts["done"] == job["shards"],
+            "errors": {r["task_id"]: r["errors"] for r in queue.tasks("failed")}
+        }
+
+    def merge(self, job_dir, output_path=None):
+
+        job, queue = self.load_job(job_dir)
+        done = queue.tasks("done")
+
+        if len(done) != job["shards"]:
+            raise ValueError(
+                f"Job {job['job_id']} is not complete: {len(done)}/{job['shards']} shards done"
+            )
+
+        scores = pd.concat(
+            [pd.read_csv(os.path.join(job_dir, r["result"]["results"])) for r in done],
+            ignore_index=True
+        )
+
+        output_path = output_path or os.path.join(job_dir, "scores.csv")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        _write_csv_atomic(scores, output_path)
+
+        return {
+            "job_id": job["job_id"],
+            "disease": job["disease"],
+            "patients": len(scores),
+            "risk_counts": scores["risk_level"].value_counts().to_dict(),
+            "output_path": output_path
+        }
+
+
+def run_worker(job_dir, worker_id=None, max_shards=None):
+
+    # Entry point for worker processes (main.py job work --workers N)
+    return BatchJobAgent().work(job_dir, worker_id=worker_id, max_shards=max_shards)
@@ -1,12 +1,36 @@
 # agents/data_agent.py
 
+import os
+
 import pandas as pd
-from utils.preprocessing import preprocess_data
+from utils.dataset_cache import load_dataset
+from utils.preprocessing import ClinicalPreprocessor
+from utils.streaming_ingest import StreamingValidator, infer_dtypes, integer_labels
 from config.disease_config import DISEASE_CONFIG
 
 
 class DataValidationAgent:
 
+    def __init__(self, streaming=None, chunksize=100000,
+                 streaming_threshold_bytes=256 * 1024 * 1024, columnar_cache=True,
+                 low_memory=False):
+        # streaming: True / False, or None to decide from file size
+        # columnar_cache: load through the memory-mapped Arrow cache
+        # low_memory: float32 features (see ClinicalPreprocessor) and
+        # downcast raw columns in the columnar cache
+        self.streaming = streaming
+        self.low_memory = low_memory
+        self.columnar_cache = columnar_cache
+        self.chunksize = chunksize
+        self.streaming_threshold_bytes = streaming_threshold_bytes
+
+    def _use_streaming(self, dataset_path):
+
+        if self.streaming is not None:
+            return self.streaming
+
+        return os.path.getsize(dataset_path) >= self.streaming_threshold_bytes
+
     def run(self, disease_name, dataset_path):
 
         # ======================================================
@@ -18,33 +42,20 @@ class DataValidationAgent:
         target_column = DISEASE_CONFIG[disease_name]["target"]
 
         # ======================================================
-        # 2️⃣ Load Dataset
+        # 2️⃣ Load Dataset + 3️⃣ Basic Data Validation + 4️⃣ Preprocessing
         # ======================================================
-        df = pd.read_csv(dataset_path)
+        preprocessor = ClinicalPreprocessor(target_column, low_memory=self.low_memory)
 
-        if target_column not in df.columns:
-            raise ValueError(f"Target column '{target_column}' not found in dataset")
-
-        # ======================================================
-        # 3️⃣ Basic Data Validation
-        # ======================================================
-        total_rows = df.shape[0]
-        total_columns = df.shape[1]
+        if self._use_streaming(dataset_path):
+            X, y, validation = self._ingest_streaming(dataset_path, preprocessor)
+        else:
+            df, validation = self._load_in_memory(dataset_path, target_column)
+            check_binary(validation["unique_classes"])
+            X, y = preprocessor.fit_transform(df)
+            del df
 
-        missing_values = df.isnull().sum().sum()
-
-        # Ensure binary classification
-        unique_classes = df[target_column].unique()
-
-        if len(unique_classes) != 2:
-            raise ValueError(
-                f"Target column must be binary. Found classes: {unique_classes}"
-            )
-
-        # ======================================================
-        # 4️⃣ Preprocessing
-        # ======================================================
-        X, y = preprocess_data(df, target_column)
+        total_columns = validation["total_columns"]
+        missing_values = validation["missing_values"]
 
         class_distribution = y.value_counts().to_dict()
 
@@ -65,9 +76,77 @@ class DataValidationAgent:
             "imbalance_ratio": imbalance_ratio
         }
 
+        if "streaming" in validation:
+            metadata["streaming"] = validation["streaming"]
+
         return {
             "disease": disease_name,
             "X": X,
             "y": y,
+            "preprocessor": preprocessor,
             "metadata": metadata
-        }
\ No newline at end of file
+        }
+
+    def _load_in_memory(self, dataset_path, target_column):
+
+        if self.columnar_cache:
+            df = load_dataset(dataset_path, downcast=self.low_memory)
+        else:
+            df = pd.read_csv(dataset_path)
+
+        if target_column not in df.columns:
+            raise ValueError(f"Target column '{target_column}' not found in dataset")
+
+        return df, {
+            "total_columns": df.shape[1],
+            "missing_values": df.isnull().sum().sum(),
+            "unique_classes": df[target_column].unique()
+        }
+
+    def _ingest_streaming(self, dataset_path, preprocessor):
+
+        # One pass over the chunked CSV: each chunk is validated (missing
+        # counts, classes, duplicate hashes) and its unique rows go
+        # straight into the preprocessor fit. Raw rows are never held
+        # together, so peak memory is the feature matrix plus one chunk.
+        target_column = preprocessor.target_column
+        header = pd.read_csv(dataset_path, nrows=0).columns
+
+        if target_column not in header:
+            raise ValueError(f"Target column '{target_column}' not found in dataset")
+
+        dtypes = infer_dtypes(dataset_path, target_column)
+
+        # Medians come exact from the preprocessor: no reservoir
+        validator = StreamingValidator(target_column, reservoir_size=0)
+
+        def unique_chunks():
+            for chunk in pd.read_csv(dataset_path, chunksize=self.chunksize, dtype=dtypes):
+                duplicate = validator.update(chunk)
+                yield chunk[~duplicate] if duplicate.any() else chunk
+
+        X, y = preprocessor.fit_transform_chunks(unique_chunks())
+        y = integer_labels(y)
+
+        stats = validator.result()
+        check_binary(integer_labels(list(stats["class_distribution"])))
+
+        return X, y, {
+            "total_columns": len(stats["columns"]),
+            "missing_values": stats["missing_values"],
+            "streaming": {
+                "total_rows": stats["total_rows"],
+                "duplicate_rows": stats["duplicate_rows"],
+                "missing_per_column": stats["missing_per_column"],
+                "medians": dict(zip(preprocessor.numeric_columns_, preprocessor.medians_.tolist()))
+            }
+        }
+
+
+def check_binary(unique_classes):
+
+    # Ensure binary classification
+    if len(unique_classes) != 2:
+        raise ValueError(
+            f"Target column must be binary. Found classes: {unique_classes}"
+        )
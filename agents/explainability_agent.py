@@ -1,9 +1,71 @@
-import shap
 import numpy as np
 
+from utils.risk import risk_level, risk_levels
+from utils.shap_engine import get_engine
+
 
 class ExplainabilityAgent:
 
+    def __init__(self, mode="tree_path_dependent", background_size=100,
+                 n_jobs=1, chunk_size=256):
+        # mode="interventional" explains against a sampled background
+        # set drawn from X_test instead of the trees' node statistics
+        self.mode = mode
+        self.background_size = background_size
+        # Cohort worker processes: pass the cores reserved from the
+        # caller's CoreBudget (the default explains on the calling thread)
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+
+    def engine(self, prediction_output):
+
+        options = {"n_jobs": self.n_jobs, "chunk_size": self.chunk_size}
+        if self.mode == "interventional":
+            options["background_size"] = self.background_size
+
+        return get_engine(
+            prediction_output["model"],
+            prediction_output["best_model"],
+            prediction_output["X_test"],
+            mode=self.mode,
+            **options
+        )
+
+    def explain_cohort(self, prediction_output, X=None):
+
+        # Whole-cohort attributions: (patients × features) float32 matrix
+        # plus the matching probabilities and risk bands.
+        model = prediction_output["model"]
+        X = prediction_output["X_test"] if X is None else X
+
+        engine = self.engine(prediction_output)
+        probabilities = model.predict_proba(X[engine.feature_names])[:, 1]
+
+        return {
+            "disease": prediction_output["disease"],
+            "best_model": prediction_output["best_model"],
+            "feature_names": engine.feature_names,
+            "expected_value": engine.expected_value,
+            "shap_matrix": engine.explain(X),
+            "probabilities": probabilities,
+            "risk_levels": risk_levels(probabilities)
+        }
+
+    def risk(self, prediction_output):
+
+        # Probability and risk band of the first test patient, without
+        # SHAP, so the narration prompts can be built before the
+        # explanation is done
+        sample = prediction_output["X_test"].iloc[[0]]
+        probability = prediction_output["model"].predict_proba(sample)[0][1]
+
+        return {
+            "disease": prediction_output["disease"],
+            "best_model": prediction_output["best_model"],
+            "probability": round(float(probability), 4),
+            "risk_level": risk_level(probability)
+        }
+
     def run(self, prediction_output):
 
         model = prediction_output["model"]
@@ -15,49 +77,11 @@ class ExplainabilityAgent:
         sample = X_test.iloc[[0]]
 
         # ======================================================
-        # SHAP Explainer Selection
+        # SHAP Explainer (built once per model, then reused)
         # ======================================================
 
-        if best_model in ["LightGBM", "Random Forest"]:
-
-            explainer = shap.TreeExplainer(model)
-            shap_values = explainer(sample)
-
-            # Extract raw numpy values safely
-            if hasattr(shap_values, "values"):
-                shap_vals = shap_values.values
-            else:
-                shap_vals = shap_values
-
-            # Convert to numpy array
-            shap_vals = np.array(shap_vals)
-
-            # If 3D (1, features, classes) → take class 1
-            if shap_vals.ndim == 3:
-                shap_vals = shap_vals[:, :, 1]
-
-            # If list style → take class 1
-            if isinstance(shap_vals, list):
-                shap_vals = shap_vals[1]
-
-            # Now take first sample
-            shap_vals = shap_vals[0]
-
-        elif best_model == "Logistic Regression":
-
-            explainer = shap.LinearExplainer(model, X_test)
-            shap_vals = explainer.shap_values(sample)
-
-            shap_vals = np.array(shap_vals)
-
-            # If binary list → take class 1
-            if shap_vals.ndim == 3:
-                shap_vals = shap_vals[1]
-
-            shap_vals = shap_vals[0]
-
-        else:
-            raise ValueError(f"Unsupported model type: {best_model}")
+        engine = self.engine(prediction_output)
+        shap_vals = engine.explain(sample)[0]
 
         # ======================================================
         # SHAP Processing
@@ -84,12 +108,7 @@ class ExplainabilityAgent:
 
         probability = model.predict_proba(sample)[0][1]
 
-        if probability >= 0.7:
-            risk = "High Risk"
-        elif probability >= 0.4:
-            risk = "Moderate Risk"
-        else:
-            risk = "Low Risk"
+        risk = risk_level(probability)
 
         return {
             "disease": disease,
@@ -1,46 +1,43 @@
 # agents/feature_agent.py
 
-import numpy as np
-import pandas as pd
+from utils.feature_selection import correlated_columns
 
 
 class FeatureSelectionAgent:
 
+    def __init__(self, correlation_sample_rows=None, correlation_block_size=256):
+        # Row sampling for the correlation scan (None = all rows)
+        self.correlation_sample_rows = correlation_sample_rows
+        self.correlation_block_size = correlation_block_size
+
     def run(self, input_data):
 
-        X = input_data["X"].copy()   # ✅ Avoid modifying original
+        X = input_data["X"]
         y = input_data["y"]
         disease = input_data["disease"]
+        preprocessor = input_data["preprocessor"]
 
         original_feature_count = X.shape[1]
 
         # ======================================================
         # 1️⃣ Controlled Feature Engineering
         # ======================================================
-        numeric_cols = X.select_dtypes(include=["float64", "int64"]).columns.tolist()
-
-        # Add squared terms (limit to first 3 numeric columns)
-        for col in numeric_cols[:3]:
-            X[f"{col}_squared"] = X[col] ** 2
-
-        # Add one interaction term only (avoid explosion)
-        if len(numeric_cols) >= 2:
-            X["interaction_1"] = X[numeric_cols[0]] * X[numeric_cols[1]]
+        # Squared terms for the first 3 numeric columns plus one
+        # interaction term; the fitted preprocessor remembers the spec
+        # so new patients get the same columns.
+        X = preprocessor.fit_engineering(X)
 
         # ======================================================
         # 2️⃣ Correlation Removal (Important for LR stability)
         # ======================================================
-        corr_matrix = X.corr().abs()
-
-        upper = corr_matrix.where(
-            np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
+        to_drop = correlated_columns(
+            X,
+            threshold=0.90,   # slightly stricter
+            block_size=self.correlation_block_size,
+            sample_rows=self.correlation_sample_rows
         )
 
-        to_drop = [
-            column for column in upper.columns
-            if any(upper[column] > 0.90)   # slightly stricter
-        ]
-
+        preprocessor.set_dropped_columns(to_drop)
         X_reduced = X.drop(columns=to_drop)
 
         # ======================================================
@@ -57,5 +54,6 @@ class FeatureSelectionAgent:
             "disease": disease,
             "X": X_reduced,
             "y": y,
+            "preprocessor": preprocessor,
             "feature_metadata": metadata
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,253 @@
+# agents/out_of_core_agent.py
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from agents.feature_agent import FeatureSelectionAgent
+from agents.prediction_agent import classification_metrics, split_indices
+from config.disease_config import DISEASE_CONFIG
+from config.model_config import MODEL_CONFIG
+from utils.model_registry import dataset_fingerprint
+from utils.preprocessing import ClinicalPreprocessor
+from utils.stage_cache import code_version
+from utils.streaming_ingest import infer_dtypes, integer_labels
+from utils.training_executor import resolve_core_budget
+
+
+class OutOfCoreLightGBMAgent:
+
+    # Data + Feature + Prediction for datasets larger than RAM, LightGBM
+    # only. Memory is bounded by the chunk size, the preprocessor fit
+    # sample, LightGBM's binned Dataset (~1 byte per value) and one byte
+    # per row of labels; the transformed features live in a memmap.
+    #
+    # <cache_dir>/<disease>-<key>/ keeps the memmap, the binary Dataset
+    # and the fitted preprocessor, so retraining on the same file and
+    # settings starts straight from dataset.bin.
+
+    def __init__(self, chunksize=100000, fit_sample_rows=200000,
+                 cache_dir="data/.cache/out_of_core", report_rows=1000):
+        self.chunksize = chunksize
+        # Rows used to fit imputation / scaling / feature selection
+        self.fit_sample_rows = fit_sample_rows
+        self.cache_dir = cache_dir
+        # Test rows kept as a DataFrame for SHAP / reports
+        self.report_rows = report_rows
+
+    def _store_dir(self, disease, dataset_path):
+
+        from utils import out_of_core, preprocessing, feature_selection
+
+        payload = {
+            "dataset": dataset_fingerprint(dataset_path),
+            "disease": DISEASE_CONFIG[disease],
+            "chunksize": self.chunksize,
+            "fit_sample_rows": self.fit_sample_rows,
+            "code": code_version(out_of_core, preprocessing, feature_selection)
+        }
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        return os.path.join(self.cache_dir, f"{disease}-{key[:16]}")
+
+    def _prepare_store(self, disease, dataset_path, store_dir):
+
+        from utils.out_of_core import (
+            publish_store,
+            reservoir_rows,
+            save_store_metadata,
+            write_feature_store
+        )
+
+        target_column = DISEASE_CONFIG[disease]["target"]
+
+        header = pd.read_csv(dataset_path, nrows=0).columns
+        if target_column not in header:
+            raise ValueError(f"Target column '{target_column}' not found in dataset")
+
+        dtypes = infer_dtypes(dataset_path, target_column)
+
+        # ======================================================
+        # 1️⃣ Pass 1: Fit Sample → Preprocessor + Feature Selection
+        # ======================================================
+        sample, total_rows = reservoir_rows(
+            dataset_path, self.fit_sample_rows, chunksize=self.chunksize, dtypes=dtypes,
+            target_column=target_column
+        )
+
+        # Unlabeled rows are not training rows (pass 2 skips them too)
+        sample = sample.dropna(subset=[target_column])
+
+        classes = integer_labels(sorted(sample[target_column].unique().tolist()))
+        if len(classes) != 2:
+            raise ValueError(f"Target column must be binary. Found classes: {classes}")
+
+        preprocessor = ClinicalPreprocessor(target_column, low_memory=True)
+        X_sample, y_sample = preprocessor.fit_transform(sample)
+
+        feature_output = FeatureSelectionAgent().run({
+            "disease": disease,
+            "X": X_sample,
+            "y": y_sample,
+            "preprocessor": preprocessor
+        })
+        del sample, X_sample, y_sample
+
+        # ======================================================
+        # 2️⃣ Pass 2: Chunked Transform → float32 Memmap
+        # ======================================================
+        tmp_dir = f"{store_dir}.{os.getpid()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        try:
+            n_rows, validation = write_feature_store(
+                dataset_path, tmp_dir, preprocessor, classes, total_rows,
+                chunksize=self.chunksize, dtypes=dtypes
+            )
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        save_store_metadata(tmp_dir, preprocessor, {
+            "rows": n_rows,
+            "total_rows": total_rows,
+            "classes": classes,
+            "feature_names": preprocessor.feature_names_,
+            "feature_metadata": feature_output["feature_metadata"],
+            "validation": {
+                key: validation[key]
+                for key in ("duplicate_rows", "missing_values", "class_distribution")
+            }
+        })
+
+        publish_store(tmp_dir, store_dir)
+
+    def run(self, disease_name, dataset_path, n_jobs=None):
+
+        # n_jobs: LightGBM threads (None → config / all cores), e.g. the
+        # cores reserved from the orchestrator's CoreBudget
+
+        import lightgbm as lgb
+        from utils.out_of_core import (
+            BoosterClassifier,
+            build_dataset,
+            load_store_preprocessor,
+            open_feature_store,
+            predict_rows
+        )
+
+        if disease_name not in DISEASE_CONFIG:
+            raise ValueError(f"Unsupported disease: {disease_name}")
+
+        timings = {}
+        start = time.perf_counter()
+
+        store_dir = self._store_dir(disease_name, dataset_path)
+        store_hit = os.path.exists(store_dir)
+
+        if not store_hit:
+            self._prepare_store(disease_name, dataset_path, store_dir)
+
+        timings["ingest"] = round(time.perf_counter() - start, 3)
+
+        features, labels, meta = open_feature_store(store_dir)
+        preprocessor = load_store_preprocessor(store_dir)
+        feature_names = meta["feature_names"]
+
+        # ======================================================
+        # 3️⃣ Binned Dataset (binary file reused across runs)
+        # ======================================================
+        start = time.perf_counter()
+        dataset, binary_hit = build_dataset(store_dir, feature_names, {"verbose": -1})
+        timings["dataset"] = round(time.perf_counter() - start, 3)
+
+        # ======================================================
+        # 4️⃣ Row-Index Splits (70/15/15, stratified)
+        # ======================================================
+        train_idx, val_idx, test_idx = (np.sort(idx) for idx in split_indices(labels))
+
+        pos = int(labels[train_idx].sum())
+        neg = len(train_idx) - pos
+
+        params = dict(MODEL_CONFIG["lightgbm"])
+        num_boost_round = params.pop("n_estimators")
+        params.update(
+            objective="binary",
+            metric="auc",
+            scale_pos_weight=neg / pos if pos != 0 else 1
+        )
+
+        if n_jobs is None:
+            n_jobs = MODEL_CONFIG["training"]["n_jobs"]
+        params["num_threads"] = resolve_core_budget(n_jobs)
+
+        # ======================================================
+        # 5️⃣ Train From the Binned Dataset
+        # ======================================================
+        start = time.perf_counter()
+
+        rounds = MODEL_CONFIG["selection"]["lightgbm_early_stopping_rounds"]
+        booster = lgb.train(
+            params,
+            dataset.subset(train_idx),
+            num_boost_round=num_boost_round,
+            valid_sets=[dataset.subset(val_idx)],
+            callbacks=[lgb.early_stopping(rounds, first_metric_only=True, verbose=False)]
+        )
+        timings["LightGBM"] = round(time.perf_counter() - start, 3)
+
+        model = BoosterClassifier(booster, meta["classes"], params)
+
+        # ======================================================
+        # 6️⃣ Chunked Evaluation on the Memmap
+        # ======================================================
+        val_metrics = classification_metrics(
+            labels[val_idx], predict_rows(model, features, val_idx)
+        )
+        test_probs = predict_rows(model, features, test_idx)
+        test_metrics = classification_metrics(labels[test_idx], test_probs)
+
+        # A bounded slice of the test split for SHAP and the report
+        report_idx = test_idx[:self.report_rows]
+        X_test = pd.DataFrame(
+            np.asarray(features[report_idx]), columns=feature_names
+        )
+        y_test = pd.Series(
+            np.asarray(meta["classes"])[labels[report_idx]],
+            name=preprocessor.target_column
+        )
+
+        return {
+            "disease": disease_name,
+            "lr_metrics": None,
+            "rf_metrics": None,
+            "lgb_metrics": test_metrics,
+            "best_model": "LightGBM",
+            "best_metrics": test_metrics,
+            "model": model,
+            "preprocessor": preprocessor,
+            "feature_columns": feature_names,
+            "X_test": X_test,
+            "y_test": y_test,
+            "selected_probs": test_probs[:self.report_rows],
+            "val_metrics": {"LightGBM": val_metrics},
+            "lgb_best_iteration": model.best_iteration_,
+            "training_times": timings,
+            "feature_metadata": meta["feature_metadata"],
+            "out_of_core": {
+                "store_dir": store_dir,
+                "store_hit": store_hit,
+                "binary_dataset_hit": binary_hit,
+                "rows": meta["rows"],
+                "total_rows": meta["total_rows"],
+                "train_rows": len(train_idx),
+                "val_rows": len(val_idx),
+                "test_rows": len(test_idx),
+                **meta["validation"]
+            }
+        }
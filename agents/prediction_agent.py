@@ -2,104 +2,225 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, recall_score, f1_score, roc_auc_score
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
-import lightgbm as lgb
+import inspect
+
 import numpy as np
 
+from config.model_config import MODEL_CONFIG
+from utils.model_search import SuccessiveHalvingSearch
+from utils.training_executor import TrainingExecutor
 
-class DiseasePredictionAgent:
 
-    def run(self, input_data):
+def classification_metrics(y_true, probs):
 
-        X = input_data["X"]
-        y = input_data["y"]
-        disease = input_data["disease"]
+    preds = (probs >= 0.5).astype(int)
 
-        # ---------------- Train / Val / Test Split (70/15/15) ----------------
-        X_train, X_temp, y_train, y_temp = train_test_split(
-            X, y, test_size=0.3, random_state=42, stratify=y
-        )
+    return {
+        "accuracy": accuracy_score(y_true, preds),
+        "recall": recall_score(y_true, preds),
+        "f1": f1_score(y_true, preds),
+        "auc": roc_auc_score(y_true, probs)
+    }
 
-        X_val, X_test, y_val, y_test = train_test_split(
-            X_temp, y_temp, test_size=0.5, random_state=42, stratify=y_temp
-        )
 
-        # ==========================================================
-        # 1️⃣ Logistic Regression
-        # ==========================================================
-        lr_model = LogisticRegression(max_iter=3000, class_weight="balanced")
-        lr_model.fit(X_train, y_train)
+def evaluate_model(model, X_test, y_test):
 
-        lr_probs = lr_model.predict_proba(X_test)[:, 1]
-        lr_preds = (lr_probs >= 0.5).astype(int)
+    probs = model.predict_proba(X_test)[:, 1]
 
-        lr_metrics = {
-            "accuracy": accuracy_score(y_test, lr_preds),
-            "recall": recall_score(y_test, lr_preds),
-            "f1": f1_score(y_test, lr_preds),
-            "auc": roc_auc_score(y_test, lr_probs)
-        }
+    return classification_metrics(y_test, probs), probs
 
-        # ==========================================================
-        # 2️⃣ Random Forest
-        # ==========================================================
-        rf_model = RandomForestClassifier(
-            n_estimators=400,
-            max_depth=10,
-            class_weight="balanced",
-            random_state=42
+
+def split_indices(y):
+
+    # Stratified 70/15/15 split on row positions only
+    split = MODEL_CONFIG["split"]
+    positions = np.arange(len(y))
+    y_values = np.asarray(y)
+
+    train_idx, temp_idx = train_test_split(
+        positions,
+        test_size=split["test_size"],
+        random_state=split["random_state"],
+        stratify=y_values
+    )
+
+    val_idx, test_idx = train_test_split(
+        temp_idx,
+        test_size=split["val_fraction_of_holdout"],
+        random_state=split["random_state"],
+        stratify=y_values[temp_idx]
+    )
+
+    return train_idx, val_idx, test_idx
+
+
+def split_rows(X, y):
+
+    # Same stratified 70/15/15 split as calling train_test_split on the
+    # frames, but computed on row positions: X is reordered once and
+    # train / val / test are contiguous row-slice views of that copy.
+    train_idx, val_idx, test_idx = split_indices(y)
+
+    order = np.concatenate([train_idx, val_idx, test_idx])
+    X_ordered = X.take(order)
+    y_ordered = y.take(order)
+
+    bounds = np.cumsum([0, len(train_idx), len(val_idx), len(test_idx)])
+    parts = [slice(bounds[i], bounds[i + 1]) for i in range(3)]
+
+    return (
+        *(X_ordered.iloc[part] for part in parts),
+        *(y_ordered.iloc[part] for part in parts)
+    )
+
+
+def lightgbm_early_stopping(X_val, y_val):
+
+    import lightgbm as lgb
+
+    rounds = MODEL_CONFIG["selection"]["lightgbm_early_stopping_rounds"]
+
+    fit_params = {
+        "eval_metric": "auc",
+        "callbacks": [lgb.early_stopping(rounds, first_metric_only=True, verbose=False)]
+    }
+
+    # LightGBM >= 4.6 replaces eval_set with eval_X / eval_y
+    if "eval_X" in inspect.signature(lgb.LGBMClassifier.fit).parameters:
+        fit_params.update(eval_X=X_val, eval_y=y_val)
+    else:
+        fit_params["eval_set"] = [(X_val, y_val)]
+
+    return fit_params
+
+
+class DiseasePredictionAgent:
+
+    def __init__(self, n_jobs=None, search=False):
+        # Core budget for the whole model comparison (None → config / all cores)
+        self.n_jobs = n_jobs
+        # Successive-halving search over RF / LightGBM (MODEL_CONFIG["search"])
+        self.search = search
+
+    def _searched(self, estimator, space_name, fit_params_fn=None):
+
+        search = MODEL_CONFIG["search"]
+
+        return SuccessiveHalvingSearch(
+            estimator,
+            search["space"][space_name],
+            n_candidates=search["n_candidates"],
+            eta=search["eta"],
+            min_resource=search["min_resource"],
+            max_resource=search["max_resource"],
+            budget_seconds=search["budget_seconds"],
+            random_state=search["random_state"],
+            fit_params_fn=fit_params_fn
         )
 
-        rf_model.fit(X_train, y_train)
+    def run(self, input_data):
 
-        rf_probs = rf_model.predict_proba(X_test)[:, 1]
-        rf_preds = (rf_probs >= 0.5).astype(int)
+        # Loaded on first training run, not when the module is imported
+        import lightgbm as lgb
 
-        rf_metrics = {
-            "accuracy": accuracy_score(y_test, rf_preds),
-            "recall": recall_score(y_test, rf_preds),
-            "f1": f1_score(y_test, rf_preds),
-            "auc": roc_auc_score(y_test, rf_probs)
-        }
+        X = input_data["X"]
+        y = input_data["y"]
+        disease = input_data["disease"]
+
+        # ---------------- Train / Val / Test Split (70/15/15) ----------------
+        X_train, X_val, X_test, y_train, y_val, y_test = split_rows(X, y)
 
         # ==========================================================
-        # 3️⃣ LightGBM
+        # 1️⃣ Candidate Models (LR / RF / LightGBM)
         # ==========================================================
         pos = np.sum(y_train == 1)
         neg = np.sum(y_train == 0)
         scale_weight = neg / pos if pos != 0 else 1
 
+        rf_model = RandomForestClassifier(**MODEL_CONFIG["random_forest"])
         lgb_model = lgb.LGBMClassifier(
-            n_estimators=600,
-            learning_rate=0.03,
-            max_depth=8,
-            num_leaves=48,
-            scale_pos_weight=scale_weight,
-            random_state=42,
-            verbose=-1
+            **MODEL_CONFIG["lightgbm"],
+            scale_pos_weight=scale_weight
         )
 
-        lgb_model.fit(X_train, y_train)
+        # name → (estimator, parameter that sets its internal thread count,
+        #         extra fit kwargs)
+        # LightGBM stops early on the validation split instead of always
+        # running the full n_estimators rounds.
+        if self.search:
+            rf_spec = (
+                self._searched(rf_model, "random_forest"),
+                "n_jobs",
+                {"X_val": X_val, "y_val": y_val}
+            )
+            lgb_spec = (
+                self._searched(lgb_model, "lightgbm", lightgbm_early_stopping),
+                "n_jobs",
+                {"X_val": X_val, "y_val": y_val}
+            )
+        else:
+            rf_spec = (rf_model, "n_jobs", {})
+            lgb_spec = (lgb_model, "n_jobs", lightgbm_early_stopping(X_val, y_val))
+
+        candidates = {
+            "Logistic Regression": (
+                LogisticRegression(**MODEL_CONFIG["logistic_regression"]),
+                None,
+                {}
+            ),
+            "Random Forest": rf_spec,
+            "LightGBM": lgb_spec
+        }
 
-        lgb_probs = lgb_model.predict_proba(X_test)[:, 1]
-        lgb_preds = (lgb_probs >= 0.5).astype(int)
+        # ==========================================================
+        # 2️⃣ Concurrent Training Under a Core Budget
+        # ==========================================================
+        n_jobs = self.n_jobs
+        if n_jobs is None:
+            n_jobs = MODEL_CONFIG["training"]["n_jobs"]
 
-        lgb_metrics = {
-            "accuracy": accuracy_score(y_test, lgb_preds),
-            "recall": recall_score(y_test, lgb_preds),
-            "f1": f1_score(y_test, lgb_preds),
-            "auc": roc_auc_score(y_test, lgb_probs)
-        }
+        fitted, training_times = TrainingExecutor(n_jobs).fit_all(
+            candidates, X_train, y_train
+        )
+
+        search_results = {}
+
+        if self.search:
+            for name, searched in list(fitted.items()):
+                if isinstance(searched, SuccessiveHalvingSearch):
+                    fitted[name] = searched.best_estimator_
+                    search_results[name] = {
+                        "best_params": searched.best_params_,
+                        "best_val_auc": round(searched.best_score_, 4),
+                        "history": searched.history_
+                    }
+
+        lr_model = fitted["Logistic Regression"]
+        rf_model = fitted["Random Forest"]
+        lgb_model = fitted["LightGBM"]
+
+        lr_metrics, lr_probs = evaluate_model(lr_model, X_test, y_test)
+        rf_metrics, rf_probs = evaluate_model(rf_model, X_test, y_test)
+        lgb_metrics, lgb_probs = evaluate_model(lgb_model, X_test, y_test)
 
         # ==========================================================
         # 🔥 Select Best Model (based on AUC - medically better metric)
         # ==========================================================
+        # Selection uses the validation split; test metrics stay an
+        # unbiased estimate for the report.
         models = {
             "Logistic Regression": (lr_model, lr_metrics, lr_probs),
             "Random Forest": (rf_model, rf_metrics, rf_probs),
             "LightGBM": (lgb_model, lgb_metrics, lgb_probs)
         }
 
-        best_model_name = max(models, key=lambda m: models[m][1]["auc"])
+        val_metrics = {
+            name: evaluate_model(model, X_val, y_val)[0]
+            for name, (model, _, _) in models.items()
+        }
+
+        metric = MODEL_CONFIG["selection"]["metric"]
+        best_model_name = max(models, key=lambda m: val_metrics[m][metric])
         selected_model, selected_metrics, selected_probs = models[best_model_name]
 
         return {
@@ -110,7 +231,13 @@ class DiseasePredictionAgent:
             "best_model": best_model_name,
             "best_metrics": selected_metrics,
             "model": selected_model,
+            "preprocessor": input_data.get("preprocessor"),
+            "feature_columns": list(X.columns),
             "X_test": X_test,
             "y_test": y_test,
-            "selected_probs": selected_probs
-        }
\ No newline at end of file
+            "selected_probs": selected_probs,
+            "val_metrics": val_metrics,
+            "lgb_best_iteration": getattr(lgb_model, "best_iteration_", None),
+            "search_results": search_results,
+            "training_times": training_times
+        }
@@ -1,181 +1,175 @@
 # agents/report_agent.py
 
 import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+from utils.shap_engine import top_contributions
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+MODEL_ROWS = [
+    ("Logistic Regression", "lr_metrics"),
+    ("Random Forest", "rf_metrics"),
+    ("LightGBM", "lgb_metrics")
+]
+
+
+@lru_cache(maxsize=None)
+def _templates():
+
+    # Parsed and compiled once per process; renders only execute the
+    # compiled template code.
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+
+    return env.get_template("medical_report.html"), env.get_template("model_comparison.html")
+
+
+def new_run_id():
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def _safe_name(value):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(value))
+
+
+def _write_atomic(path, text):
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+    os.replace(tmp_path, path)
 
 
 class ReportAgent:
 
-    def run(self, explain_output, prediction_output):
+    # Reports go to <output_dir>/<disease>/<run_id>/<patient_id>.html,
+    # so runs and patients never overwrite each other.
 
-        disease = explain_output["disease"].capitalize()
-        probability = explain_output["probability"] * 100
-        risk = explain_output["risk_level"]
-        shap_values = explain_output["shap_values"]
-        contributions = explain_output["contributions"]
+    def __init__(self, output_dir="reports", top_k=10, n_jobs=None):
+        self.output_dir = output_dir
+        self.top_k = top_k
+        self.n_jobs = n_jobs
 
-        # Metrics
-        lr_metrics = prediction_output["lr_metrics"]
-        rf_metrics = prediction_output["rf_metrics"]
-        lgb_metrics = prediction_output["lgb_metrics"]
+    def _shared_context(self, disease, prediction_output):
 
+        # Everything that is the same for every patient of a cohort is
+        # rendered once, including the model comparison table.
+        report_template, comparison_template = _templates()
         best_model = prediction_output["best_model"]
-        best_metrics = prediction_output["best_metrics"]
-
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # ======================================================
-        # SHAP Table (Top 10 Features)
-        # ======================================================
-        rows = ""
-        for feature in list(shap_values.keys())[:10]:
-            rows += f"""
-            <tr>
-                <td>{feature}</td>
-                <td>{shap_values[feature]}</td>
-                <td>{contributions[feature]}</td>
-            </tr>
-            """
-
-        # ======================================================
-        # Clinical Interpretation
-        # ======================================================
-        interpretation = f"""
-        The patient shows a <b>{risk}</b> for {disease} with a predicted probability 
-        of <b>{probability:.2f}%</b>. The optimal predictive model selected was 
-        <b>{best_model}</b> based on AUC performance comparison. 
-        SHAP-based explainability highlights the most influential physiological 
-        parameters contributing to this risk estimation.
-
-        This AI-generated assessment is intended to support clinical 
-        decision-making and should be reviewed by qualified healthcare professionals.
-        """
-
-        # ======================================================
-        # HTML Report
-        # ======================================================
-        html = f"""
-        <html>
-        <head>
-            <title>{disease} Medical Assessment Report</title>
-            <style>
-                body {{
-                    font-family: Arial;
-                    margin: 40px;
-                    background-color: #f8f9fa;
-                }}
-                h1 {{
-                    color: #2c3e50;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-top: 20px;
-                }}
-                th, td {{
-                    border: 1px solid #ccc;
-                    padding: 8px;
-                    text-align: center;
-                }}
-                th {{
-                    background-color: #2980b9;
-                    color: white;
-                }}
-                .highlight {{
-                    background-color: #d4edda;
-                    font-weight: bold;
-                }}
-                .prob-box {{
-                    margin-top: 30px;
-                    padding: 20px;
-                    border: 2px solid #e74c3c;
-                    font-size: 20px;
-                    text-align: center;
-                    background-color: #fff;
-                }}
-                .section {{
-                    margin-top: 30px;
-                }}
-            </style>
-        </head>
-        <body>
-
-        <h1>Medical Assessment Report</h1>
-        <p><i>Generated on: {timestamp}</i></p>
-
-        <div class="section">
-            <h2>Disease: {disease}</h2>
-            <p><b>Best Model Selected:</b> {best_model}</p>
-        </div>
-
-        <div class="section">
-            <h2>Model Performance Comparison</h2>
-            <table>
-                <tr>
-                    <th>Model</th>
-                    <th>Accuracy</th>
-                    <th>Recall</th>
-                    <th>F1 Score</th>
-                    <th>AUC</th>
-                </tr>
-
-                <tr class="{'highlight' if best_model == 'Logistic Regression' else ''}">
-                    <td>Logistic Regression</td>
-                    <td>{lr_metrics['accuracy']:.4f}</td>
-                    <td>{lr_metrics['recall']:.4f}</td>
-                    <td>{lr_metrics['f1']:.4f}</td>
-                    <td>{lr_metrics['auc']:.4f}</td>
-                </tr>
-
-                <tr class="{'highlight' if best_model == 'Random Forest' else ''}">
-                    <td>Random Forest</td>
-                    <td>{rf_metrics['accuracy']:.4f}</td>
-                    <td>{rf_metrics['recall']:.4f}</td>
-                    <td>{rf_metrics['f1']:.4f}</td>
-                    <td>{rf_metrics['auc']:.4f}</td>
-                </tr>
-
-                <tr class="{'highlight' if best_model == 'LightGBM' else ''}">
-                    <td>LightGBM</td>
-                    <td>{lgb_metrics['accuracy']:.4f}</td>
-                    <td>{lgb_metrics['recall']:.4f}</td>
-                    <td>{lgb_metrics['f1']:.4f}</td>
-                    <td>{lgb_metrics['auc']:.4f}</td>
-                </tr>
-
-            </table>
-        </div>
-
-        <div class="section">
-            <h2>Physiological Data & SHAP Contributions</h2>
-            <table>
-                <tr>
-                    <th>Feature</th>
-                    <th>SHAP Value</th>
-                    <th>Contribution</th>
-                </tr>
-                {rows}
-            </table>
-        </div>
-
-        <div class="prob-box">
-            Predicted Probability: {probability:.2f}% <br>
-            Risk Level: {risk}
-        </div>
-
-        <div class="section">
-            <h2>Interpretation</h2>
-            <p>{interpretation}</p>
-        </div>
-
-        </body>
-        </html>
-        """
-
-        os.makedirs("reports", exist_ok=True)
-        file_path = f"reports/{disease.lower()}_report.html"
-
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(html)
-
-        return file_path
\ No newline at end of file
+
+        comparison = comparison_template.render(
+            models=[
+                (name, prediction_output[key]) for name, key in MODEL_ROWS
+                if prediction_output.get(key) is not None
+            ],
+            best_model=best_model
+        )
+
+        return report_template, {
+            "disease": disease.capitalize(),
+            "best_model": best_model,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "model_comparison": Markup(comparison)
+        }
+
+    def _run_dir(self, disease, run_id):
+
+        run_dir = os.path.join(self.output_dir, disease.lower(), run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        return run_dir
+
+    def run(self, explain_output, prediction_output, patient_id="patient_0", run_id=None):
+
+        disease = explain_output["disease"]
+        shap_values = explain_output["shap_values"]
+
+        # Top-k by |SHAP|, not the first k in column order
+        features = list(shap_values)
+        top = top_contributions(
+            np.array([list(shap_values.values())], dtype=np.float64), features, self.top_k
+        )[0]
+
+        for row in top:
+            row["contribution"] = explain_output["contributions"][row["feature"]]
+
+        template, context = self._shared_context(disease, prediction_output)
+
+        html = template.render(
+            **context,
+            patient_id=patient_id,
+            features=top,
+            probability=explain_output["probability"] * 100,
+            risk=explain_output["risk_level"]
+        )
+
+        run_dir = self._run_dir(disease, run_id or new_run_id())
+        file_path = os.path.join(run_dir, f"{_safe_name(patient_id)}.html")
+        _write_atomic(file_path, html)
+
+        return file_path
+
+    def run_cohort(self, cohort_output, prediction_output, patient_ids=None, run_id=None):
+
+        # cohort_output comes from ExplainabilityAgent.explain_cohort
+        disease = cohort_output["disease"]
+        probabilities = np.asarray(cohort_output["probabilities"]) * 100
+        risks = cohort_output["risk_levels"]
+
+        if patient_ids is None:
+            patient_ids = [f"patient_{i}" for i in range(len(probabilities))]
+
+        if len({_safe_name(p) for p in patient_ids}) != len(patient_ids):
+            raise ValueError("Patient IDs must be unique (after filename sanitizing)")
+
+        # One vectorized partial sort over the whole (patients × features) matrix
+        shap_matrix = cohort_output["shap_matrix"]
+        columns = {name: j for j, name in enumerate(cohort_output["feature_names"])}
+
+        top = top_contributions(shap_matrix, cohort_output["feature_names"], self.top_k)
+
+        template, context = self._shared_context(disease, prediction_output)
+        run_id = run_id or new_run_id()
+        run_dir = self._run_dir(disease, run_id)
+
+        def render(i):
+            for row in top[i]:
+                row["contribution"] = "High" if shap_matrix[i, columns[row["feature"]]] > 0 else "Low"
+
+            html = template.render(
+                **context,
+                patient_id=patient_ids[i],
+                features=top[i],
+                probability=float(probabilities[i]),
+                risk=str(risks[i])
+            )
+            path = os.path.join(run_dir, f"{_safe_name(patient_ids[i])}.html")
+            _write_atomic(path, html)
+            return path
+
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            paths = list(pool.map(render, range(len(patient_ids))))
+
+        return {
+            "disease": disease,
+            "run_id": run_id,
+            "output_dir": run_dir,
+            "reports": len(paths),
+            "paths": paths
+        }
@@ -0,0 +1,81 @@
+# agents/scoring_agent.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.risk import risk_levels
+
+
+class BatchScoringAgent:
+
+    def run(self, prediction_output, patients, output_path=None, id_column=None):
+
+        model = prediction_output["model"]
+        preprocessor = prediction_output["preprocessor"]
+        disease = prediction_output["disease"]
+
+        # Fail before scoring rather than after it
+        if output_path is not None and str(output_path).endswith(".parquet"):
+            check_parquet_support()
+
+        # ======================================================
+        # 1️⃣ Load Cohort
+        # ======================================================
+        if isinstance(patients, (str, os.PathLike)):
+            patients = pd.read_csv(patients)
+
+        if patients.empty:
+            raise ValueError("Patient cohort is empty")
+
+        # ======================================================
+        # 2️⃣ Vectorized Transform + Single predict_proba Call
+        # ======================================================
+        X = preprocessor.transform(patients)
+        probabilities = model.predict_proba(X)[:, 1]
+
+        # ======================================================
+        # 3️⃣ Columnar Results
+        # ======================================================
+        results = {}
+
+        if id_column is not None:
+            if id_column not in patients.columns:
+                raise ValueError(f"ID column '{id_column}' not found in cohort")
+            results[id_column] = patients[id_column].to_numpy()
+        else:
+            results["patient_index"] = np.arange(len(patients))
+
+        results["probability"] = np.round(probabilities, 4)
+        results["risk_level"] = risk_levels(probabilities)
+
+        scores = pd.DataFrame(results)
+
+        if output_path is not None:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+            if output_path.endswith(".parquet"):
+                scores.to_parquet(output_path, index=False)
+            else:
+                scores.to_csv(output_path, index=False)
+
+        return {
+            "disease": disease,
+            "best_model": prediction_output["best_model"],
+            "patients": len(scores),
+            "risk_counts": scores["risk_level"].value_counts().to_dict(),
+            "scores": scores,
+            "output_path": output_path
+        }
+
+
+def check_parquet_support():
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError(
+            "Writing .parquet output needs pyarrow (pip install pyarrow); "
+            "use a .csv output path instead"
+        ) from None
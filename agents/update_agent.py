@@ -0,0 +1,236 @@
+# agents/update_agent.py
+
+import copy
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from agents.prediction_agent import evaluate_model
+from config.model_config import INCREMENTAL_CONFIG
+
+
+# ======================================================
+# Per-Model Update Paths
+# ======================================================
+def update_logistic_regression(model, X, y, config, history_rows):
+
+    # Averaged SGD on the same log-loss, started from the fitted
+    # coefficients. LogisticRegression's penalty per row is 1 / (C · n);
+    # n here is every row the model has been fitted on (history + this
+    # batch), not the batch alone, so a small batch does not shrink the
+    # coefficients as if it were the whole training set. The result is
+    # written back into a LogisticRegression so the registry, SHAP and
+    # scoring see the same model type.
+    sgd = SGDClassifier(
+        loss="log_loss",
+        penalty="l2",
+        alpha=1.0 / (model.C * (history_rows + len(X))),
+        learning_rate="constant",
+        eta0=config["sgd_learning_rate"],
+        max_iter=config["sgd_epochs"],
+        tol=None,
+        average=True,
+        class_weight=model.class_weight,
+        random_state=config["random_state"]
+    )
+    # fit() updates coef_init in place: pass copies so the current
+    # model stays untouched if the update is rejected
+    sgd.fit(X, y, coef_init=model.coef_.copy(), intercept_init=model.intercept_.copy())
+
+    updated = copy.deepcopy(model)
+    updated.coef_ = sgd.coef_.copy()
+    updated.intercept_ = sgd.intercept_.copy()
+
+    return updated
+
+
+def update_lightgbm(model, X, y, config, history_rows):
+
+    import lightgbm as lgb
+
+    # Continue boosting from the registered booster: the old trees are
+    # kept and new rounds fit the residuals on the new rows only.
+    if not hasattr(model, "get_params"):
+        # BoosterClassifier from out-of-core training (lgb.train)
+        from utils.out_of_core import BoosterClassifier
+
+        booster = lgb.train(
+            model.params,
+            lgb.Dataset(X, label=np.asarray(y) == model.classes_[1]),
+            num_boost_round=config["lightgbm_rounds"],
+            init_model=model.booster_
+        )
+        return BoosterClassifier(booster, model.classes_, model.params)
+
+    updated = lgb.LGBMClassifier(
+        **{**model.get_params(), "n_estimators": config["lightgbm_rounds"]}
+    )
+    updated.fit(X, y, init_model=model.booster_)
+
+    return updated
+
+
+def update_random_forest(model, X, y, config, history_rows):
+
+    # warm_start grows extra trees on the new rows next to the existing
+    # ones; the forest then averages old and new trees.
+    updated = copy.deepcopy(model)
+    updated.set_params(
+        warm_start=True,
+        n_estimators=model.n_estimators + config["random_forest_trees"]
+    )
+    updated.fit(X, y)
+    updated.set_params(warm_start=False)
+
+    return updated
+
+
+UPDATERS = {
+    "Logistic Regression": update_logistic_regression,
+    "Random Forest": update_random_forest,
+    "LightGBM": update_lightgbm
+}
+
+METRIC_KEYS = {
+    "Logistic Regression": "lr_metrics",
+    "Random Forest": "rf_metrics",
+    "LightGBM": "lgb_metrics"
+}
+
+
+def frame_fingerprint(df):
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+
+class IncrementalUpdateAgent:
+
+    # Updates the registered (selected) model on a batch of new labeled
+    # rows at a cost proportional to the batch, not the full history.
+    # The candidate is accepted only if its AUC on a holdout of the new
+    # rows does not fall below the current model's.
+    #
+    # The fitted preprocessor stays frozen: trees and coefficients were
+    # fitted in its scaled space, so moving its medians / moments would
+    # change the current model's predictions before any update. They
+    # are refitted with the model on a full retrain.
+
+    def __init__(self, config=None):
+        self.config = dict(INCREMENTAL_CONFIG, **(config or {}))
+
+    def run(self, prediction_output, new_data):
+
+        start = time.perf_counter()
+        config = self.config
+
+        model = prediction_output["model"]
+        preprocessor = prediction_output["preprocessor"]
+        best_model = prediction_output["best_model"]
+        target_column = preprocessor.target_column
+
+        # ======================================================
+        # 1️⃣ New Labeled Rows
+        # ======================================================
+        if isinstance(new_data, (str, os.PathLike)):
+            new_data = pd.read_csv(new_data)
+
+        if target_column not in new_data.columns:
+            raise ValueError(f"Target column '{target_column}' not found in new rows")
+
+        new_data = new_data.dropna(subset=[target_column])
+        y = new_data[target_column]
+
+        if len(new_data) < config["min_rows"]:
+            raise ValueError(
+                f"Need at least {config['min_rows']} new labeled rows, got {len(new_data)}"
+            )
+
+        if y.nunique() != 2:
+            raise ValueError("New rows must contain both classes")
+
+        # ======================================================
+        # 2️⃣ Update / Holdout Split (stratified)
+        # ======================================================
+        train_rows, val_rows = train_test_split(
+            new_data,
+            test_size=config["validation_fraction"],
+            random_state=config["random_state"],
+            stratify=y
+        )
+        y_train = train_rows[target_column]
+        y_val = val_rows[target_column]
+
+        # Current model with its own preprocessing, on the same raw rows
+        incumbent_auc = roc_auc_score(
+            y_val, model.predict_proba(preprocessor.transform(val_rows))[:, 1]
+        )
+
+        # ======================================================
+        # 3️⃣ Candidate: Model Update (same preprocessing)
+        # ======================================================
+        # Rows behind the current model: its training rows plus the
+        # update rows of every accepted update before this one
+        parent_update = prediction_output.get("update")
+        if parent_update:
+            history_rows = parent_update["history_rows"] + parent_update["update_rows"]
+        else:
+            history_rows = int(preprocessor.scaler_.n_samples_seen_)
+
+        X_train = preprocessor.transform(train_rows)
+        X_val = preprocessor.transform(val_rows)
+
+        candidate = UPDATERS[best_model](model, X_train, y_train, config, history_rows)
+
+        holdout_metrics = evaluate_model(candidate, X_val, y_val)[0]
+
+        # ======================================================
+        # 4️⃣ Accept Only Without AUC Regression
+        # ======================================================
+        accepted = holdout_metrics["auc"] >= incumbent_auc - config["auc_tolerance"]
+
+        update = {
+            "parent_version": prediction_output.get("model_version"),
+            "method": UPDATERS[best_model].__name__,
+            "new_rows": len(new_data),
+            "update_rows": len(train_rows),
+            "validation_rows": len(val_rows),
+            "history_rows": history_rows,
+            "incumbent_auc": round(incumbent_auc, 4),
+            "candidate_auc": round(holdout_metrics["auc"], 4),
+            "holdout_metrics": holdout_metrics,
+            "accepted": bool(accepted),
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+        # ======================================================
+        # 5️⃣ Metrics on the Original Test Split
+        # ======================================================
+        # The holdout only decides acceptance (kept under "update"). The
+        # stored metrics, SHAP background and report rows stay on the
+        # test split the other models were compared on.
+        test_metrics, test_probs = evaluate_model(
+            candidate, prediction_output["X_test"], prediction_output["y_test"]
+        )
+
+        # Same shape as DiseasePredictionAgent output, so the registry
+        # can store it as a new version
+        output = dict(prediction_output)
+        output.update({
+            METRIC_KEYS[best_model]: test_metrics,
+            "model": candidate,
+            "best_metrics": test_metrics,
+            "selected_probs": test_probs,
+            "training_times": {best_model: update["seconds"]},
+            "stage_key": hashlib.sha256(
+                f"{prediction_output.get('stage_key')}:{frame_fingerprint(new_data)}".encode()
+            ).hexdigest(),
+            "update": update
+        })
+
+        return output
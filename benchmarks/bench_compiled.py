@@ -0,0 +1,80 @@
+# benchmarks/bench_compiled.py
+#
+# predict_proba latency of the registered model vs its compiled node
+# arrays (utils.tree_compiler) per batch size, on rows of the test split.
+#
+#   python -m benchmarks.bench_compiled heart --batch-sizes 1 8 64 1024
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from crew.orchestrator import MedicalCrewOrchestrator
+from main import datasets
+from utils.tree_compiler import compile_model, verify_compiled
+
+
+def _median_seconds(predict, X, repeat):
+
+    predict(X)
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+
+    return float(np.median(timings))
+
+
+def run_benchmark(disease, batch_sizes, repeat):
+
+    prediction_output, _ = MedicalCrewOrchestrator().load_or_train(disease, datasets[disease])
+
+    model = prediction_output["model"]
+    best_model = prediction_output["best_model"]
+    X_test = prediction_output["X_test"]
+
+    start = time.perf_counter()
+    compiled = compile_model(model, best_model)
+    compile_seconds = time.perf_counter() - start
+
+    max_diff = verify_compiled(model, compiled, X_test)
+
+    results = []
+    for batch_size in batch_sizes:
+        rows = np.resize(np.arange(len(X_test)), batch_size)
+        X = pd.DataFrame(X_test.to_numpy()[rows], columns=X_test.columns)
+
+        original = _median_seconds(model.predict_proba, X, repeat)
+        fast = _median_seconds(compiled.predict_proba, X, repeat)
+
+        results.append({
+            "disease": disease,
+            "model": best_model,
+            "batch_size": batch_size,
+            "original_ms": round(original * 1000, 3),
+            "compiled_ms": round(fast * 1000, 3),
+            "original_us_per_row": round(original / batch_size * 1e6, 2),
+            "compiled_us_per_row": round(fast / batch_size * 1e6, 2),
+            "speedup": round(original / fast, 2),
+            "max_abs_diff": max_diff,
+            "compile_seconds": round(compile_seconds, 3)
+        })
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark compiled tree scoring.")
+    parser.add_argument("disease", choices=sorted(datasets))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 256, 1024])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for row in run_benchmark(args.disease, args.batch_sizes, args.repeat):
+        print(json.dumps(row))
@@ -0,0 +1,101 @@
+# benchmarks/bench_import.py
+#
+# Cold-start import latency: each target is imported in a fresh
+# interpreter (python -X importtime), repeated a few times. Reports the
+# median wall time, the slowest top-level packages and which optional
+# heavy dependencies were pulled in.
+#
+#   python -m benchmarks.bench_import --repeat 5 --max-seconds 3.0
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_PACKAGES = ["crewai", "litellm", "langchain", "shap", "lightgbm", "sklearn", "pandas"]
+
+DEFAULT_TARGETS = ["main", "crew.orchestrator", "service.scoring_service"]
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _import_once(target, cwd):
+
+    probe = (
+        "import json, sys\n"
+        f"import {target}\n"
+        f"print(json.dumps([p for p in {HEAVY_PACKAGES!r} if p in sys.modules]))\n"
+    )
+
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=cwd, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": cwd}
+    )
+    elapsed = time.perf_counter() - start
+
+    # Cumulative microseconds of every third-party top-level package
+    top_level = {}
+    for match in _IMPORTTIME.finditer(completed.stderr):
+        name = match.group(4).split(".")[0]
+        if os.path.exists(os.path.join(cwd, name)) or os.path.exists(os.path.join(cwd, f"{name}.py")):
+            continue
+        cumulative = int(match.group(2))
+        top_level[name] = max(top_level.get(name, 0), cumulative)
+
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return elapsed, top_level, loaded
+
+
+def run_benchmark(targets, repeat, cwd, top=8):
+
+    results = []
+
+    for target in targets:
+        runs = [_import_once(target, cwd) for _ in range(repeat)]
+        walls = [r[0] for r in runs]
+        top_level, loaded = runs[-1][1], runs[-1][2]
+
+        slowest = sorted(top_level.items(), key=lambda item: -item[1])[:top]
+
+        results.append({
+            "target": target,
+            "repeat": repeat,
+            "median_seconds": round(statistics.median(walls), 4),
+            "min_seconds": round(min(walls), 4),
+            "heavy_modules_loaded": loaded,
+            "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest}
+        })
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time.")
+    parser.add_argument("--targets", nargs="+", default=DEFAULT_TARGETS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="Exit with status 1 if any target's median exceeds this."
+    )
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = run_benchmark(args.targets, args.repeat, root)
+
+    for row in results:
+        print(json.dumps(row))
+
+    if args.max_seconds is not None:
+        slow = [r["target"] for r in results if r["median_seconds"] > args.max_seconds]
+        if slow:
+            print(f"Cold start above {args.max_seconds}s: {', '.join(slow)}", file=sys.stderr)
+            sys.exit(1)
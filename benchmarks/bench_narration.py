@@ -0,0 +1,71 @@
+# benchmarks/bench_narration.py
+#
+# Narration latency / throughput against the local fake Ollama server.
+#
+#   python -m benchmarks.bench_narration --prompts 32 --latency 0.25
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from crew.fake_ollama import start_fake_ollama
+from crew.narration import AsyncNarrator
+
+
+def run_benchmark(prompts, latency, jitter, concurrency_levels, timeout):
+
+    server, base_url = start_fake_ollama(latency=latency, jitter=jitter)
+
+    requests = [
+        {
+            "prompt": f"Disease: heart\nProbability: {i / prompts * 100:.2f}%\nPatient {i}",
+            "fallback": "fallback"
+        }
+        for i in range(prompts)
+    ]
+
+    results = []
+
+    try:
+        for concurrency in concurrency_levels:
+            narrator = AsyncNarrator(
+                base_url=base_url, max_concurrency=concurrency, timeout=timeout
+            )
+
+            start = time.perf_counter()
+            outputs = narrator.narrate_many(requests)
+            elapsed = time.perf_counter() - start
+
+            latencies = np.array([o["latency_seconds"] for o in outputs])
+
+            results.append({
+                "concurrency": concurrency,
+                "prompts": prompts,
+                "wall_seconds": round(elapsed, 4),
+                "prompts_per_second": round(prompts / elapsed, 2),
+                "p50_latency_seconds": round(float(np.percentile(latencies, 50)), 4),
+                "p99_latency_seconds": round(float(np.percentile(latencies, 99)), 4),
+                "fallbacks": sum(o["source"] == "fallback" for o in outputs)
+            })
+    finally:
+        server.shutdown()
+
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark async LLM narration.")
+    parser.add_argument("--prompts", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for row in run_benchmark(
+        args.prompts, args.latency, args.jitter, args.concurrency, args.timeout
+    ):
+        print(json.dumps(row))
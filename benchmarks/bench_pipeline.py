@@ -0,0 +1,243 @@
+# benchmarks/bench_pipeline.py
+#
+# Per-agent time / memory benchmark on synthetic datasets shaped like
+# each DISEASE_CONFIG schema. Every (disease, rows, columns) case runs
+# Data → Feature → Prediction → Explainability → Report in a scratch
+# directory; narration goes to the fake Ollama server, so no LLM runs.
+# Results are written as JSON; with --baseline, stages that got slower
+# (or hungrier) than the stored run beyond --tolerance are flagged and
+# the exit status is 1.
+#
+#   python -m benchmarks.bench_pipeline --diseases heart ckd --rows 1000 100000 \
+#       --columns 0 200 --output benchmarks/results/latest.json \
+#       --baseline benchmarks/results/baseline.json
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from agents.data_agent import DataValidationAgent
+from agents.explainability_agent import ExplainabilityAgent
+from agents.feature_agent import FeatureSelectionAgent
+from agents.prediction_agent import DiseasePredictionAgent
+from agents.report_agent import ReportAgent, _templates
+from benchmarks.synthetic import write_synthetic_csv
+from config.disease_config import DISEASE_CONFIG
+from crew.fake_ollama import start_fake_ollama
+from crew.narration import AsyncNarrator, fallback_risk_text
+from main import datasets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rss_peak_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(stage, fn):
+
+    tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    output = fn()
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return output, {
+        "stage": stage,
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4),
+        "peak_traced_mb": round(peak / 2**20, 2),
+        "rss_peak_mb": round(_rss_peak_mb(), 1)
+    }
+
+
+def run_case(disease, n_rows, n_columns, workdir, llm_base_url, seed=0):
+
+    dataset_path = os.path.join(workdir, f"{disease}-{n_rows}x{n_columns or 'native'}.csv")
+
+    start = time.perf_counter()
+    dataset = write_synthetic_csv(
+        dataset_path, disease, n_rows, n_columns or None,
+        dataset_path=os.path.join(ROOT, datasets[disease]) if disease in datasets else None,
+        seed=seed
+    )
+    generate_seconds = time.perf_counter() - start
+
+    stages = []
+
+    data_output, m = measure("data", lambda: DataValidationAgent().run(disease, dataset_path))
+    stages.append(m)
+
+    feature_output, m = measure("feature", lambda: FeatureSelectionAgent().run(data_output))
+    stages.append(m)
+
+    prediction_output, m = measure("prediction", lambda: DiseasePredictionAgent().run(feature_output))
+    stages.append(m)
+
+    explainer = ExplainabilityAgent()
+    explain_output, m = measure("explain", lambda: explainer.run(prediction_output))
+    stages.append(m)
+
+    cohort_output, m = measure("explain_cohort", lambda: explainer.explain_cohort(prediction_output))
+    stages.append(m)
+
+    reporter = ReportAgent(output_dir=os.path.join(workdir, "reports"))
+    _, m = measure("report", lambda: reporter.run(explain_output, prediction_output))
+    stages.append(m)
+
+    _, m = measure("report_cohort", lambda: reporter.run_cohort(cohort_output, prediction_output))
+    stages.append(m)
+
+    # Stubbed LLM: the fake server answers instantly
+    narrator = AsyncNarrator(base_url=llm_base_url, cache=None)
+    _, m = measure("narration", lambda: narrator.narrate_many([
+        {
+            "prompt": f"Explain the {explain_output['risk_level']} for {disease}",
+            "fallback": fallback_risk_text(
+                disease, explain_output["probability"], explain_output["risk_level"]
+            )
+        }
+    ]))
+    stages.append(m)
+
+    os.remove(dataset_path)
+
+    return {
+        "disease": disease,
+        "rows": n_rows,
+        "columns": dataset["columns"] - 1,
+        "generate_seconds": round(generate_seconds, 4),
+        "features_after_selection": len(prediction_output["feature_columns"]),
+        "best_model": prediction_output["best_model"],
+        "stages": stages
+    }
+
+
+def _case_key(case):
+    return f"{case['disease']}/{case['rows']}x{case['columns']}"
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.05, min_mb=5.0):
+
+    # A stage regresses when it is both relatively (tolerance) and
+    # absolutely (min_seconds / min_mb) worse than the baseline.
+    previous = {
+        (_case_key(case), stage["stage"]): stage
+        for case in baseline["cases"] for stage in case["stages"]
+    }
+
+    regressions = []
+
+    for case in results["cases"]:
+        for stage in case["stages"]:
+            old = previous.get((_case_key(case), stage["stage"]))
+            if old is None:
+                continue
+
+            for metric, floor in (("wall_seconds", min_seconds), ("peak_traced_mb", min_mb)):
+                before, after = old[metric], stage[metric]
+                if after > before * (1 + tolerance) and after - before > floor:
+                    regressions.append({
+                        "case": _case_key(case),
+                        "stage": stage["stage"],
+                        "metric": metric,
+                        "baseline": before,
+                        "current": after,
+                        "ratio": round(after / before, 2) if before else None
+                    })
+
+    return regressions
+
+
+def run_suite(diseases, rows, columns, workdir=None, seed=0):
+
+    owned = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="bench-pipeline-")
+    cwd = os.getcwd()
+
+    server, base_url = start_fake_ollama(latency=0.0)
+
+    # Compile report templates up front so only the first case would
+    # otherwise pay for it
+    _templates()
+
+    try:
+        # Agents write caches relative to the working directory
+        os.chdir(workdir)
+        cases = [
+            run_case(disease, n_rows, n_columns, workdir, base_url, seed)
+            for disease in diseases
+            for n_rows in rows
+            for n_columns in columns
+        ]
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        if owned:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": cases
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark each agent on synthetic data.")
+    parser.add_argument("--diseases", nargs="+", default=sorted(DISEASE_CONFIG), choices=sorted(DISEASE_CONFIG))
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument(
+        "--columns", type=int, nargs="+", default=[0],
+        help="Feature columns per case; 0 keeps the disease schema's own width."
+    )
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", help="Stored results to check for regressions.")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write results to --baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--workdir", help="Keep generated data / reports here instead of a temp dir.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run_suite(args.diseases, args.rows, args.columns, args.workdir, args.seed)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for case in results["cases"]:
+        for stage in case["stages"]:
+            print(json.dumps({"case": _case_key(case), **stage}))
+
+    print("Results written:", args.output)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print("Baseline saved:", args.baseline)
+
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), tolerance=args.tolerance)
+
+        for regression in regressions:
+            print("REGRESSION", json.dumps(regression))
+
+        sys.exit(1 if regressions else 0)
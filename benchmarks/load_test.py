@@ -0,0 +1,146 @@
+# benchmarks/load_test.py
+#
+# Closed-loop load test for the scoring service: N client threads with
+# keep-alive connections each send single-patient requests back to back.
+# Reports p50 / p99 latency and requests per second per concurrency level.
+#
+#   python main.py serve heart --port 8080 &
+#   python -m benchmarks.load_test heart --url http://127.0.0.1:8080
+#
+# Without --url the service is started in-process (simpler, but the
+# clients then share the interpreter with the server).
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+from config.disease_config import DISEASE_CONFIG
+
+
+def sample_patients(dataset_path, disease, n=256, random_state=0):
+
+    df = pd.read_csv(dataset_path)
+    df = df.drop(columns=[DISEASE_CONFIG[disease]["target"]], errors="ignore")
+    df = df.sample(n=min(n, len(df)), random_state=random_state)
+
+    # NaN is not valid JSON → send missing values as null
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _client(base_url, disease, bodies, count, latencies, errors, barrier):
+
+    url = urlparse(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+    barrier.wait()
+
+    for i in range(count):
+        body = bodies[i % len(bodies)]
+        start = time.perf_counter()
+
+        try:
+            connection.request(
+                "POST", f"/predict/{disease}", body=body,
+                headers={"Content-Type": "application/json"}
+            )
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+            ok = False
+
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(i)
+
+    connection.close()
+
+
+def run_load_test(base_url, disease, patients, concurrency_levels, requests_per_client):
+
+    bodies = [json.dumps(p).encode("utf-8") for p in patients]
+    results = []
+
+    for concurrency in concurrency_levels:
+        latencies, errors = [], []
+        barrier = threading.Barrier(concurrency + 1)
+
+        threads = [
+            threading.Thread(
+                target=_client,
+                args=(base_url, disease, bodies[c::concurrency] or bodies,
+                      requests_per_client, latencies, errors, barrier)
+            )
+            for c in range(concurrency)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        barrier.wait()
+        start = time.perf_counter()
+
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.perf_counter() - start
+        latencies = np.array(latencies)
+
+        results.append({
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "errors": len(errors),
+            "wall_seconds": round(elapsed, 4),
+            "requests_per_second": round(len(latencies) / elapsed, 2),
+            "p50_latency_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+            "p99_latency_ms": round(float(np.percentile(latencies, 99)) * 1000, 2)
+        })
+
+    return results
+
+
+if __name__ == "__main__":
+
+    from main import datasets
+
+    parser = argparse.ArgumentParser(description="Load test the local scoring service.")
+    parser.add_argument("disease", choices=sorted(datasets))
+    parser.add_argument("--url", help="Running service (default: start one in-process).")
+    parser.add_argument("--patients", type=int, default=256, help="Distinct patients sampled from the dataset.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client thread.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    patients = sample_patients(datasets[args.disease], args.disease, args.patients)
+
+    server = service = None
+    base_url = args.url
+
+    if base_url is None:
+        from service.scoring_service import ScoringService, start_scoring_service
+
+        service = ScoringService(
+            {args.disease: datasets[args.disease]},
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms
+        ).load()
+        server, base_url = start_scoring_service(service)
+
+    try:
+        for row in run_load_test(
+            base_url, args.disease, patients, args.concurrency, args.requests
+        ):
+            print(json.dumps(row))
+    finally:
+        if server is not None:
+            server.shutdown()
+            service.close()
@@ -0,0 +1,152 @@
+# benchmarks/synthetic.py
+#
+# Synthetic clinical datasets for benchmarking. The schema of each
+# disease comes from its shipped CSV when there is one (column names,
+# binary / integer / float / categorical kinds and value ranges);
+# otherwise a generic mixed schema around DISEASE_CONFIG's target is
+# used. Extra float columns pad the schema to any requested width.
+#
+#   python -m benchmarks.synthetic ckd --rows 1000000 --columns 500 --output /tmp/ckd_1m.csv
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from config.disease_config import DISEASE_CONFIG
+
+SCHEMA_SAMPLE_ROWS = 5000
+
+
+def infer_schema(df, target):
+
+    schema = []
+
+    for column in df.columns:
+        if column == target:
+            continue
+
+        values = df[column].dropna()
+
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            categories = sorted(values.astype(str).unique().tolist()) or ["unknown"]
+            schema.append({"name": column, "kind": "category", "categories": categories})
+        elif values.nunique() <= 2 and set(values.unique()) <= {0, 1}:
+            schema.append({"name": column, "kind": "binary", "p": float(values.mean())})
+        elif np.allclose(values, np.round(values)):
+            schema.append({
+                "name": column, "kind": "integer",
+                "low": int(values.min()), "high": int(values.max())
+            })
+        else:
+            schema.append({
+                "name": column, "kind": "float",
+                "mean": float(values.mean()), "std": float(values.std()) or 1.0
+            })
+
+    return schema
+
+
+def default_schema():
+
+    return (
+        [{"name": f"num_{i}", "kind": "float", "mean": 0.0, "std": 1.0} for i in range(8)]
+        + [{"name": f"count_{i}", "kind": "integer", "low": 0, "high": 10} for i in range(4)]
+        + [{"name": f"flag_{i}", "kind": "binary", "p": 0.3} for i in range(4)]
+        + [{"name": f"cat_{i}", "kind": "category", "categories": ["A", "B", "C"]} for i in range(2)]
+    )
+
+
+def disease_schema(disease, dataset_path=None, n_columns=None):
+
+    # n_columns: total feature columns (None → the schema's own width)
+    target = DISEASE_CONFIG[disease]["target"]
+
+    if dataset_path is not None and os.path.exists(dataset_path):
+        schema = infer_schema(pd.read_csv(dataset_path, nrows=SCHEMA_SAMPLE_ROWS), target)
+    else:
+        schema = default_schema()
+
+    if n_columns is not None:
+        if n_columns < len(schema):
+            schema = schema[:n_columns]
+        else:
+            schema = schema + [
+                {"name": f"extra_{i}", "kind": "float", "mean": 0.0, "std": 1.0}
+                for i in range(n_columns - len(schema))
+            ]
+
+    return target, schema
+
+
+def generate_frame(target, schema, n_rows, rng, missing_rate=0.01):
+
+    columns = {}
+    signal = np.zeros(n_rows)
+
+    for i, spec in enumerate(schema):
+        kind = spec["kind"]
+
+        if kind == "float":
+            z = rng.standard_normal(n_rows)
+            values = spec["mean"] + spec["std"] * z
+        elif kind == "integer":
+            values = rng.integers(spec["low"], spec["high"] + 1, n_rows)
+            z = (values - values.mean()) / (values.std() or 1.0)
+        elif kind == "binary":
+            values = (rng.random(n_rows) < spec["p"]).astype(np.int8)
+            z = values - spec["p"]
+        else:
+            codes = rng.integers(0, len(spec["categories"]), n_rows)
+            values = np.asarray(spec["categories"], dtype=object)[codes]
+            z = codes - codes.mean()
+
+        # The first few columns drive the label, so models have signal
+        if i < 5:
+            signal += z * (1.0 if i % 2 == 0 else -0.7)
+
+        if missing_rate and kind in ("float", "integer"):
+            values = values.astype(np.float64)
+            values[rng.random(n_rows) < missing_rate] = np.nan
+
+        columns[spec["name"]] = values
+
+    probability = 1.0 / (1.0 + np.exp(-(signal + rng.normal(0, 1.0, n_rows))))
+    columns[target] = (rng.random(n_rows) < probability).astype(np.int8)
+
+    return pd.DataFrame(columns)
+
+
+def write_synthetic_csv(path, disease, n_rows, n_columns=None, dataset_path=None,
+                        chunk_rows=250_000, seed=0):
+
+    # Written in chunks so 10M-row files never exist in memory at once
+    target, schema = disease_schema(disease, dataset_path, n_columns)
+    rng = np.random.default_rng(seed)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    for start in range(0, n_rows, chunk_rows):
+        chunk = generate_frame(target, schema, min(chunk_rows, n_rows - start), rng)
+        chunk.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+    return {"path": path, "rows": n_rows, "columns": len(schema) + 1, "target": target}
+
+
+if __name__ == "__main__":
+
+    from main import datasets
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic clinical dataset.")
+    parser.add_argument("disease", choices=sorted(DISEASE_CONFIG))
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--columns", type=int, default=None, help="Feature columns (default: schema width).")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(write_synthetic_csv(
+        args.output, args.disease, args.rows, args.columns,
+        dataset_path=datasets.get(args.disease), seed=args.seed
+    ))
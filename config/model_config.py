@@ -0,0 +1,83 @@
+# config/model_config.py
+
+MODEL_CONFIG = {
+    "split": {
+        "test_size": 0.3,
+        "val_fraction_of_holdout": 0.5,
+        "random_state": 42
+    },
+    "training": {
+        # Total cores for the candidate comparison (None = all cores).
+        # Split between concurrent models and each library's threads.
+        "n_jobs": None
+    },
+    "logistic_regression": {
+        "max_iter": 3000,
+        "class_weight": "balanced"
+    },
+    "random_forest": {
+        "n_estimators": 400,
+        "max_depth": 10,
+        "class_weight": "balanced",
+        "random_state": 42
+    },
+    "lightgbm": {
+        "n_estimators": 600,
+        "learning_rate": 0.03,
+        "max_depth": 8,
+        "num_leaves": 48,
+        "random_state": 42,
+        "verbose": -1
+    },
+    "selection": {
+        # Models are compared on the validation split; the test split is
+        # only used for the reported metrics.
+        "metric": "auc",
+        "lightgbm_early_stopping_rounds": 50
+    },
+    "search": {
+        # Successive halving over RF / LightGBM configurations
+        # (python main.py <disease> --search). Resource = trees / rounds.
+        "n_candidates": 9,
+        "eta": 3,
+        "min_resource": 50,
+        "max_resource": 800,
+        "budget_seconds": 300,
+        "random_state": 42,
+        "space": {
+            "random_forest": {
+                "max_depth": [6, 8, 10, 14, None],
+                "min_samples_leaf": [1, 2, 4, 8],
+                "max_features": ["sqrt", 0.3, 0.5]
+            },
+            "lightgbm": {
+                "learning_rate": [0.01, 0.03, 0.05, 0.1],
+                "num_leaves": [15, 31, 48, 63],
+                "max_depth": [-1, 6, 8, 10],
+                "min_child_samples": [10, 20, 40],
+                "subsample": [0.7, 0.85, 1.0],
+                "subsample_freq": [1],
+                "colsample_bytree": [0.6, 0.8, 1.0]
+            }
+        }
+    }
+}
+
+# Incremental updates (python main.py update <disease> NEW_ROWS_CSV).
+# Kept out of MODEL_CONFIG so changing them does not invalidate the
+# registered models.
+INCREMENTAL_CONFIG = {
+    # Share of the new rows held out for the accept / reject check
+    "validation_fraction": 0.3,
+    "min_rows": 50,
+    "random_state": 42,
+    # The update is kept only if holdout AUC >= incumbent AUC - tolerance
+    "auc_tolerance": 0.0,
+    # LightGBM: extra boosting rounds on top of the registered booster
+    "lightgbm_rounds": 100,
+    # Random Forest: trees grown on the new rows and added to the forest
+    "random_forest_trees": 50,
+    # Logistic Regression: SGD epochs from the fitted coefficients
+    "sgd_epochs": 5,
+    "sgd_learning_rate": 0.01
+}
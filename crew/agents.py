@@ -1,55 +1,76 @@
-from crewai import Agent
-from .llm_config import ollama_llm
-
-# ---------------------------
-# NON-LLM AGENTS
-# ---------------------------
-
-data_agent = Agent(
-    role="Data Validation Specialist",
-    goal="Validate and prepare clinical dataset.",
-    backstory="Handles structured medical datasets.",
-    llm=ollama_llm,  # 🔥 IMPORTANT
-    allow_delegation=False,
-    verbose=False,
-)
-
-feature_agent = Agent(
-    role="Feature Engineering Specialist",
-    goal="Perform feature engineering and remove correlations.",
-    backstory="Expert in preprocessing medical features.",
-    llm=ollama_llm,  # 🔥 IMPORTANT
-    allow_delegation=False,
-    verbose=False,
-)
-
-prediction_agent = Agent(
-    role="Disease Prediction Specialist",
-    goal="Train ML models and select best model.",
-    backstory="Medical ML expert.",
-    llm=ollama_llm,  # 🔥 IMPORTANT
-    allow_delegation=False,
-    verbose=False,
-)
-
-# ---------------------------
-# LLM AGENTS (Ollama Mistral)
-# ---------------------------
-
-risk_agent = Agent(
-    role="Risk Assessment Agent",
-    goal="Interpret SHAP values and explain risk level.",
-    backstory="Clinical AI explanation specialist.",
-    llm=ollama_llm,
-    allow_delegation=False,
-    verbose=True,
-)
-
-report_agent = Agent(
-    role="Medical Report Generation Agent",
-    goal="Generate structured medical summary report.",
-    backstory="Produces professional clinical documentation.",
-    llm=ollama_llm,
-    allow_delegation=False,
-    verbose=True,
-)
\ No newline at end of file
+import threading
+
+from .llm_config import get_ollama_llm
+
+# Agent settings; the crewai Agent objects are built on first access
+# (get_agent(name) or `from crew.agents import risk_agent`).
+AGENT_SPECS = {
+
+    # ---------------------------
+    # NON-LLM AGENTS
+    # ---------------------------
+
+    "data_agent": dict(
+        role="Data Validation Specialist",
+        goal="Validate and prepare clinical dataset.",
+        backstory="Handles structured medical datasets.",
+        allow_delegation=False,
+        verbose=False,
+    ),
+
+    "feature_agent": dict(
+        role="Feature Engineering Specialist",
+        goal="Perform feature engineering and remove correlations.",
+        backstory="Expert in preprocessing medical features.",
+        allow_delegation=False,
+        verbose=False,
+    ),
+
+    "prediction_agent": dict(
+        role="Disease Prediction Specialist",
+        goal="Train ML models and select best model.",
+        backstory="Medical ML expert.",
+        allow_delegation=False,
+        verbose=False,
+    ),
+
+    # ---------------------------
+    # LLM AGENTS (Ollama Mistral)
+    # ---------------------------
+
+    "risk_agent": dict(
+        role="Risk Assessment Agent",
+        goal="Interpret SHAP values and explain risk level.",
+        backstory="Clinical AI explanation specialist.",
+        allow_delegation=False,
+        verbose=True,
+    ),
+
+    "report_agent": dict(
+        role="Medical Report Generation Agent",
+        goal="Generate structured medical summary report.",
+        backstory="Produces professional clinical documentation.",
+        allow_delegation=False,
+        verbose=True,
+    ),
+}
+
+_agents = {}
+_agents_lock = threading.Lock()
+
+
+def get_agent(name):
+
+    with _agents_lock:
+        if name not in _agents:
+            from crewai import Agent
+            _agents[name] = Agent(llm=get_ollama_llm(), **AGENT_SPECS[name])
+
+        return _agents[name]
+
+
+def __getattr__(name):
+
+    if name in AGENT_SPECS:
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
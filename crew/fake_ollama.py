@@ -0,0 +1,117 @@
+# crew/fake_ollama.py
+#
+# Local stand-in for the Ollama HTTP API (POST /api/generate,
+# GET /api/tags) so narration latency and throughput can be measured
+# without a model. Responses are deterministic for a given prompt.
+#
+#   python -m crew.fake_ollama --port 11434 --latency 0.5
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+
+        body = json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (e.g. narrator timeout)
+            pass
+
+    def do_GET(self):
+
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": f"{self.server.model}:latest"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        prompt = payload.get("prompt", "")
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+        # Latency = fixed part + per-prompt jitter derived from the hash,
+        # so benchmark runs are repeatable.
+        jitter = (int(digest[:8], 16) / 0xFFFFFFFF) * self.server.jitter
+        time.sleep(self.server.latency + jitter)
+
+        with self.server.lock:
+            self.server.requests_served += 1
+            served = self.server.requests_served
+
+        if self.server.fail_every and served % self.server.fail_every == 0:
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        summary = " ".join(prompt.split())[:160]
+
+        self._send_json(200, {
+            "model": payload.get("model", self.server.model),
+            "response": f"[fake-{self.server.model} {digest[:8]}] {summary}",
+            "done": True
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_ollama(host="127.0.0.1", port=0, latency=0.5, jitter=0.0,
+                      fail_every=0, model="mistral"):
+
+    server = ThreadingHTTPServer((host, port), FakeOllamaHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.fail_every = fail_every
+    server.model = model
+    server.requests_served = 0
+    server.lock = threading.Lock()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://{host}:{server.server_address[1]}"
+    return server, base_url
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per generation.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra deterministic delay (max seconds).")
+    parser.add_argument("--fail-every", type=int, default=0, help="Return HTTP 500 every Nth request.")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_ollama(
+        args.host, args.port, args.latency, args.jitter, args.fail_every
+    )
+    print(f"Fake Ollama listening on {base_url}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+_WHITESPACE = re.compile(r"\s+")
+_PERCENT = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+_PLACEHOLDER = re.compile(r"\{\{percent (\d+) (\d+)\}\}")
+
+# Bumped when the stored response format changes (v2: percent templates)
+CACHE_FORMAT = 2
+
+
+def normalize_prompt(prompt, probability_bucket=1.0):
+
+    # Collapse whitespace/case and snap every percentage onto a bucket
+    # grid, so "Probability: 82.63%" and "Probability: 82.10%" share a key.
+    def bucket(match):
+        value = float(match.group(1))
+        if probability_bucket:
+            value = (value // probability_bucket) * probability_bucket
+        return f"{value:g}%"
+
+    text = _WHITESPACE.sub(" ", prompt).strip().lower()
+    return _PERCENT.sub(bucket, text)
+
+
+def to_template(response, prompt):
+
+    # Percentages in the response that quote a prompt percentage (at the
+    # response's own precision) become placeholders, so a response cached
+    # for 82.63% is rendered with 82.10% for another prompt in the bucket.
+    values = [float(value) for value in _PERCENT.findall(prompt)]
+
+    def placeholder(match):
+        number = match.group(1)
+        decimals = len(number.partition(".")[2])
+        for index, value in enumerate(values):
+            if f"{value:.{decimals}f}" == number:
+                return match.group(0).replace(number, f"{{{{percent {index} {decimals}}}}}", 1)
+        return match.group(0)
+
+    return _PERCENT.sub(placeholder, response)
+
+
+def render_template(template, prompt):
+
+    values = [float(value) for value in _PERCENT.findall(prompt)]
+
+    def render(match):
+        index, decimals = int(match.group(1)), int(match.group(2))
+        if index >= len(values):
+            return match.group(0)
+        return f"{values[index]:.{decimals}f}"
+
+    return _PLACEHOLDER.sub(render, template)
+
+
+class LLMResponseCache:
+
+    # SQLite-backed so the cache survives restarts and can be shared by
+    # concurrent narrations. Eviction: entries older than ttl_seconds
+    # expire, and beyond max_entries the least recently used go first.
+    # Responses are stored as templates (see to_template) and rendered
+    # with the exact percentages of the prompt being looked up.
+
+    def __init__(self, path="models/llm_cache.sqlite", max_entries=10000,
+                 ttl_seconds=30 * 24 * 3600, probability_bucket=1.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.probability_bucket = probability_bucket
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)"
+            )
+
+    def key(self, model, prompt):
+
+        normalized = normalize_prompt(prompt, self.probability_bucket)
+        return hashlib.sha256(
+            f"{CACHE_FORMAT}\n{model}\n{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, model, prompt):
+
+        key = self.key(model, prompt)
+        now = time.time()
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.evictions += 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return render_template(row[0], prompt)
+
+    def put(self, model, prompt, response):
+
+        key = self.key(model, prompt)
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, model, to_template(response, prompt), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+
+        if self.ttl_seconds:
+            expired = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            self.evictions += expired
+
+        size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = size - self.max_entries
+
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+
+    def clear(self):
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        lookups = self.hits + self.misses
+
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        self._conn.close()
@@ -1,7 +1,35 @@
-from crewai import LLM
+from functools import lru_cache
 
-ollama_llm = LLM(
-    model="ollama/mistral",
-    base_url="http://localhost:11434",
-    provider="ollama"
-)
\ No newline at end of file
+OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_MODEL = "mistral"
+
+# Narration response cache (crew/llm_cache.py). Percentages in prompts
+# are snapped to probability_bucket-point buckets when building the key;
+# a hit quotes the prompt's exact percentages, not the cached ones.
+LLM_CACHE_CONFIG = {
+    "path": "models/llm_cache.sqlite",
+    "max_entries": 10000,
+    "ttl_seconds": 30 * 24 * 3600,
+    "probability_bucket": 1.0
+}
+
+
+@lru_cache(maxsize=None)
+def get_ollama_llm():
+
+    # crewai is only imported (and the client built) on first use
+    from crewai import LLM
+
+    return LLM(
+        model=f"ollama/{OLLAMA_MODEL}",
+        base_url=OLLAMA_BASE_URL,
+        provider="ollama"
+    )
+
+
+def __getattr__(name):
+
+    # Keeps `from crew.llm_config import ollama_llm` working
+    if name == "ollama_llm":
+        return get_ollama_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from .llm_config import LLM_CACHE_CONFIG, OLLAMA_BASE_URL, OLLAMA_MODEL
+from .llm_cache import LLMResponseCache
+from utils.tracing import span
+
+
+# ======================================================
+# Deterministic Fallback Texts
+# ======================================================
+def fallback_risk_text(disease, probability, risk_level):
+    return (
+        f"The model estimates a {probability * 100:.2f}% probability of "
+        f"{disease}, which falls in the {risk_level} band. The SHAP table in "
+        f"the report lists the features that contributed most to this estimate. "
+        f"Automated narration was unavailable; please review the values directly."
+    )
+
+
+def fallback_report_text(disease, best_model, probability, risk_level):
+    return (
+        f"{disease.capitalize()} assessment: {risk_level} with a predicted "
+        f"probability of {probability * 100:.2f}% ({best_model}). "
+        f"This summary was generated without the language model and should be "
+        f"reviewed by a qualified clinician."
+    )
+
+
+# ======================================================
+# Minimal Async HTTP Client (Ollama /api/generate)
+# ======================================================
+async def _read_body(reader, headers):
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).strip() or b"0", 16)
+            if size == 0:
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+        return body
+
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+
+    return await reader.read()
+
+
+async def post_json(url, payload):
+
+    parts = urlsplit(url)
+    host = parts.hostname
+    port = parts.port or 80
+    body = json.dumps(payload).encode("utf-8")
+
+    reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+        request = (
+            f"POST {parts.path or '/'} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n"
+        ).encode("ascii") + body
+
+        writer.write(request)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        data = await _read_body(reader, headers)
+
+    finally:
+        writer.close()
+
+    if status != 200:
+        raise RuntimeError(f"LLM server returned HTTP {status}")
+
+    return json.loads(data)
+
+
+def default_llm_cache():
+    return LLMResponseCache(**LLM_CACHE_CONFIG)
+
+
+# ======================================================
+# Narrator
+# ======================================================
+class AsyncNarrator:
+
+    def __init__(self, base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL,
+                 max_concurrency=4, timeout=60.0, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cache = cache
+
+    async def generate(self, prompt):
+
+        payload = {"model": self.model, "prompt": prompt, "stream": False}
+        response = await post_json(f"{self.base_url}/api/generate", payload)
+
+        return response["response"].strip()
+
+    async def _narrate_one(self, semaphore, request):
+
+        with span("llm", task=request.get("name"), model=self.model) as current:
+            result = await self._generate_or_fallback(semaphore, request)
+            current.set(source=result["source"], error=result["error"])
+
+        return result
+
+    async def _generate_or_fallback(self, semaphore, request):
+
+        start = time.perf_counter()
+
+        # sqlite calls run on a thread so they never block the event loop
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, self.model, request["prompt"])
+            if cached is not None:
+                return {
+                    "text": cached,
+                    "source": "cache",
+                    "error": None,
+                    "latency_seconds": round(time.perf_counter() - start, 4)
+                }
+
+        async with semaphore:
+            try:
+                text = await asyncio.wait_for(
+                    self.generate(request["prompt"]), timeout=self.timeout
+                )
+                source = "llm"
+                error = None
+            except asyncio.TimeoutError:
+                text = request["fallback"]
+                source = "fallback"
+                error = f"timed out after {self.timeout}s"
+            except Exception as exc:
+                # Refused connections, HTTP errors and bad payloads all
+                # degrade to the deterministic text.
+                text = request["fallback"]
+                source = "fallback"
+                error = f"{type(exc).__name__}: {exc}"
+
+        # Only real generations are cached, never fallback text
+        if self.cache is not None and source == "llm":
+            await asyncio.to_thread(self.cache.put, self.model, request["prompt"], text)
+
+        return {
+            "text": text,
+            "source": source,
+            "error": error,
+            "latency_seconds": round(time.perf_counter() - start, 4)
+        }
+
+    async def narrate_many_async(self, requests):
+
+        # requests: [{"prompt": str, "fallback": str}, ...]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        return await asyncio.gather(
+            *(self._narrate_one(semaphore, request) for request in requests)
+        )
+
+    def narrate_many(self, requests):
+        return asyncio.run(self.narrate_many_async(requests))
@@ -1,67 +1,424 @@
-from crewai import Crew, Task
-from .agents import (
-    data_agent,
-    feature_agent,
-    prediction_agent,
-    risk_agent,
-    report_agent
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache, partial
+
+from .llm_config import OLLAMA_MODEL
+from .narration import (
+    AsyncNarrator,
+    default_llm_cache,
+    fallback_report_text,
+    fallback_risk_text
 )
+from .scheduler import DAGScheduler, TaskGraph, warm_imports
 
 from agents.data_agent import DataValidationAgent
 from agents.feature_agent import FeatureSelectionAgent
 from agents.prediction_agent import DiseasePredictionAgent
 from agents.explainability_agent import ExplainabilityAgent
 from agents.report_agent import ReportAgent
+from agents.scoring_agent import BatchScoringAgent
+from agents.update_agent import IncrementalUpdateAgent
+from agents.out_of_core_agent import OutOfCoreLightGBMAgent
+from agents.batch_job_agent import BatchJobAgent
+from config.disease_config import DISEASE_CONFIG
+from config.model_config import MODEL_CONFIG
+from utils import (
+    dataset_cache,
+    feature_selection,
+    preprocessing,
+    risk,
+    shap_engine,
+    streaming_ingest,
+    training_executor
+)
+from utils.model_registry import ModelRegistry
+from utils.stage_cache import StageCache, code_version
+from utils.training_executor import CoreBudget, resolve_core_budget
+from utils.tracing import span, submit_in_context, use_tracer
+
+
+def explain_stage(stage_cache, explain_tool, code, registry):
+
+    # STEP 4 as a module-level function, so the scheduler can run it in
+    # a worker process; registry is load_or_train's (output, source)
+    prediction_output = registry[0]
+
+    with span("shap", disease=prediction_output["disease"]) as current:
+        explain_output, _, hit = stage_cache.run(
+            "shap",
+            lambda: explain_tool.run(prediction_output),
+            upstream=prediction_output["stage_key"],
+            # n_jobs / chunk_size change speed, not the attributions
+            config={
+                "mode": explain_tool.mode,
+                "background_size": explain_tool.background_size
+            },
+            code=code
+        )
+        current.set(
+            cache="hit" if hit else "miss",
+            rows=1,
+            features=len(explain_output["shap_values"])
+        )
+
+    return explain_output, hit
+
+
+@lru_cache(maxsize=4)
+def registered_model(root, disease, version):
+
+    # Worker-side: each process loads a registry version once, so later
+    # runs reuse the same model object (and its cached SHAP engine)
+    return ModelRegistry(root).load(disease, version)
+
+
+def explain_registered(stage_cache, explain_tool, code, model_ref):
+
+    # STEP 4 for a worker process: only (registry root, disease,
+    # version) is sent, the model is read from the registry there
+    return explain_stage(stage_cache, explain_tool, code, (registered_model(*model_ref), None))
 
 
 class MedicalCrewOrchestrator:
 
-    def __init__(self):
-        self.data_tool = DataValidationAgent()
+    # Span names of the pipeline steps (cProfile targets for --profile-dir)
+    TRACED_STAGES = ("registry", "data", "feature", "prediction", "shap", "narration", "report")
+
+    def __init__(self, narration="async", narrator=None, llm_cache=True,
+                 stage_cache=True, search=False, tracer=None, low_memory=False,
+                 out_of_core=False, cpu_executor="thread"):
+        self.search = search
+        self.low_memory = low_memory
+        # out_of_core: LightGBM from a chunked, memory-mapped binned
+        # Dataset instead of in-memory Data → Feature → Prediction
+        self.out_of_core = out_of_core
+        # utils.tracing.Tracer: JSON-line spans for every step (None → off)
+        self.tracer = tracer
+        self.data_tool = DataValidationAgent(low_memory=low_memory)
         self.feature_tool = FeatureSelectionAgent()
-        self.prediction_tool = DiseasePredictionAgent()
+        self.prediction_tool = DiseasePredictionAgent(search=search)
         self.explain_tool = ExplainabilityAgent()
         self.report_tool = ReportAgent()
+        self.scoring_tool = BatchScoringAgent()
+        self.update_tool = IncrementalUpdateAgent()
+        self.out_of_core_tool = OutOfCoreLightGBMAgent()
+        self.job_tool = BatchJobAgent()
+        self.registry = ModelRegistry()
+        self.stage_cache = StageCache(enabled=stage_cache)
+        # Runs the steps of run() as a dependency graph; "process" moves
+        # SHAP into a worker process (see crew/scheduler.py)
+        self.scheduler = DAGScheduler(cpu_executor=cpu_executor)
+
+        # Source files behind each stage; editing one re-runs that stage
+        # and everything downstream of it.
+        self.stage_code = {
+            "data": code_version(
+                inspect.getmodule(DataValidationAgent),
+                preprocessing, streaming_ingest, dataset_cache
+            ),
+            "feature": code_version(
+                inspect.getmodule(FeatureSelectionAgent),
+                preprocessing, feature_selection
+            ),
+            "prediction": code_version(
+                inspect.getmodule(DiseasePredictionAgent), training_executor
+            ),
+            "shap": code_version(inspect.getmodule(ExplainabilityAgent), risk, shap_engine),
+            "out_of_core": code_version(inspect.getmodule(OutOfCoreLightGBMAgent))
+        }
+
+        # "async": concurrent Ollama calls with timeouts + fallback text
+        # "crew":  sequential CrewAI kickoff with the risk/report agents
+        # "none":  fallback text only; crewai is never imported
+        if narration not in ("async", "crew", "none"):
+            raise ValueError(f"Unsupported narration backend: {narration}")
+
+        # llm_cache: True → persistent cache from LLM_CACHE_CONFIG,
+        # False/None → always call the model, or an LLMResponseCache
+        if llm_cache is True:
+            llm_cache = default_llm_cache() if narration != "none" else None
+
+        self.llm_cache = llm_cache or None
+        self.narration = narration
+        self.narrator = narrator or AsyncNarrator(cache=self.llm_cache)
+
+    def model_options(self):
+
+        # Options that change the trained model (part of the registry
+        # fingerprint); low_memory is only added when on, so existing
+        # registry entries keep matching.
+        options = {"search": self.search}
+        if self.low_memory:
+            options["low_memory"] = True
+        if self.out_of_core:
+            options["out_of_core"] = True
+        return options
+
+    def _tracing(self):
+
+        # An orchestrator without its own tracer keeps the caller's
+        return use_tracer(self.tracer) if self.tracer is not None else nullcontext()
+
+    def _predict(self, feature_output, core_budget):
+
+        if core_budget is None:
+            return self.prediction_tool.run(feature_output)
+
+        budget, share = core_budget
+        with budget.reserve(share) as cores:
+            return DiseasePredictionAgent(n_jobs=cores, search=self.search).run(
+                feature_output
+            )
+
+    def _train_out_of_core(self, disease, dataset_path, fingerprint, core_budget=None):
+
+        # Replaces STEP 1-3; the agent keeps its own binned-Dataset cache
+        with span("prediction", disease=disease, out_of_core=True) as current:
+            if core_budget is None:
+                prediction_output = self.out_of_core_tool.run(disease, dataset_path)
+            else:
+                budget, share = core_budget
+                with budget.reserve(share) as cores:
+                    prediction_output = self.out_of_core_tool.run(
+                        disease, dataset_path, n_jobs=cores
+                    )
+            details = prediction_output["out_of_core"]
+            current.set(
+                rows=details["rows"],
+                features=len(prediction_output["feature_columns"]),
+                best_model=prediction_output["best_model"],
+                store_hit=details["store_hit"],
+                binary_dataset_hit=details["binary_dataset_hit"]
+            )
+
+        prediction_output["stage_key"] = self.stage_cache.key(
+            "out_of_core",
+            upstream=fingerprint["dataset"],
+            config=fingerprint["config"],
+            code=self.stage_code["out_of_core"]
+        )
+        prediction_output["stage_cache"] = {
+            "data": "out_of_core",
+            "feature": "out_of_core",
+            "prediction": "out_of_core"
+        }
+
+        return prediction_output
+
+    def train(self, disease, dataset_path, fingerprint, core_budget=None,
+              refresh=False):
 
-    def run(self, disease, dataset_path):
+        if self.out_of_core:
+            prediction_output = self._train_out_of_core(
+                disease, dataset_path, fingerprint, core_budget
+            )
+            version = self.registry.save(disease, prediction_output, fingerprint)
+            prediction_output["model_version"] = version
+            return prediction_output
+
+        cache_report = {}
 
         # -----------------------
         # STEP 1: Data
         # -----------------------
-        data_output = self.data_tool.run(disease, dataset_path)
+        with span("data", disease=disease) as current:
+            data_output, data_key, hit = self.stage_cache.run(
+                "data",
+                lambda: self.data_tool.run(disease, dataset_path),
+                upstream=fingerprint["dataset"],
+                config={
+                    "disease": disease,
+                    "target": DISEASE_CONFIG[disease],
+                    **({"low_memory": True} if self.low_memory else {})
+                },
+                code=self.stage_code["data"],
+                refresh=refresh
+            )
+            cache_report["data"] = "hit" if hit else "miss"
+            current.set(
+                cache=cache_report["data"],
+                rows=data_output["X"].shape[0],
+                features=data_output["X"].shape[1]
+            )
 
         # -----------------------
         # STEP 2: Feature
         # -----------------------
-        feature_output = self.feature_tool.run(data_output)
+        with span("feature", disease=disease) as current:
+            feature_output, feature_key, hit = self.stage_cache.run(
+                "feature",
+                lambda: self.feature_tool.run(data_output),
+                upstream=data_key,
+                config=vars(self.feature_tool),
+                code=self.stage_code["feature"],
+                refresh=refresh
+            )
+            cache_report["feature"] = "hit" if hit else "miss"
+            current.set(
+                cache=cache_report["feature"],
+                rows=feature_output["X"].shape[0],
+                features=feature_output["X"].shape[1]
+            )
 
         # -----------------------
         # STEP 3: Prediction
         # -----------------------
-        prediction_output = self.prediction_tool.run(feature_output)
+        # The core budget changes speed, not the models, so it is not
+        # part of the key.
+        with span("prediction", disease=disease) as current:
+            prediction_output, prediction_key, hit = self.stage_cache.run(
+                "prediction",
+                lambda: self._predict(feature_output, core_budget),
+                upstream=feature_key,
+                config={
+                    "models": {k: v for k, v in MODEL_CONFIG.items() if k != "training"},
+                    "search": self.search
+                },
+                code=self.stage_code["prediction"],
+                refresh=refresh
+            )
+            cache_report["prediction"] = "hit" if hit else "miss"
+            current.set(
+                cache=cache_report["prediction"],
+                rows=feature_output["X"].shape[0],
+                features=len(prediction_output["feature_columns"]),
+                best_model=prediction_output["best_model"]
+            )
 
-        # -----------------------
-        # STEP 4: SHAP (No LLM)
-        # -----------------------
-        explain_output = self.explain_tool.run(prediction_output)
+        prediction_output["stage_key"] = prediction_key
+        prediction_output["stage_cache"] = cache_report
+
+        version = self.registry.save(disease, prediction_output, fingerprint)
+        prediction_output["model_version"] = version
+
+        return prediction_output
+
+    def load_or_train(self, disease, dataset_path, retrain=False, core_budget=None):
+
+        # Inference-only path: reuse the registered model when neither
+        # the dataset nor the disease/model config changed.
+        with span("registry", disease=disease) as current:
+            fingerprint = self.registry.fingerprint(
+                disease, dataset_path, options=self.model_options()
+            )
+            version = None if retrain else self.registry.find(disease, fingerprint)
+
+            if version is not None:
+                prediction_output = self.registry.load(disease, version)
+
+            current.set(hit=version is not None, model_version=version)
+
+        if version is not None:
+            prediction_output["stage_cache"] = {
+                "data": "skipped",
+                "feature": "skipped",
+                "prediction": "skipped"
+            }
+            return prediction_output, "registry"
+
+        # --retrain also bypasses the stage cache
+        prediction_output = self.train(
+            disease, dataset_path, fingerprint,
+            core_budget=core_budget, refresh=retrain
+        )
+        return prediction_output, "trained"
+
+    def score(self, disease, dataset_path, patients, output_path=None,
+              id_column=None, retrain=False):
+
+        with self._tracing(), span("score", disease=disease) as current:
+            prediction_output, model_source = self.load_or_train(
+                disease, dataset_path, retrain=retrain
+            )
+
+            scoring_output = self.scoring_tool.run(
+                prediction_output,
+                patients,
+                output_path=output_path,
+                id_column=id_column
+            )
+            current.set(rows=scoring_output["patients"])
+
+        scoring_output["model_source"] = model_source
+        scoring_output["model_version"] = prediction_output["model_version"]
+
+        return scoring_output
+
+    def submit_job(self, disease, dataset_path, patients, job_dir, id_column=None,
+                   retrain=False, **job_options):
+
+        # Sharded, resumable scoring + SHAP + reports: the registered
+        # model and the cohort shards go into job_dir, workers
+        # (BatchJobAgent.work, any number, any machine sharing job_dir)
+        # do the rest. job_options: shard_rows, lease_seconds, ...
+        with self._tracing(), span("job_submit", disease=disease) as current:
+            prediction_output, model_source = self.load_or_train(
+                disease, dataset_path, retrain=retrain
+            )
+
+            job_tool = BatchJobAgent(**job_options) if job_options else self.job_tool
+            job = job_tool.submit(
+                prediction_output, patients, job_dir, self.registry, id_column=id_column
+            )
+            current.set(rows=job["rows"], shards=job["shards"], model_version=job["model_version"])
+
+        job["model_source"] = model_source
+        return job
+
+    def update(self, disease, dataset_path, new_data):
+
+        # Incremental refresh of the registered model on new labeled
+        # rows. An accepted update is saved as a new version under the
+        # same fingerprint, so later runs / score / serve load it.
+        with self._tracing(), span("update", disease=disease) as current:
+            prediction_output, model_source = self.load_or_train(disease, dataset_path)
+            fingerprint = self.registry.fingerprint(
+                disease, dataset_path, options=self.model_options()
+            )
+
+            update_output = self.update_tool.run(prediction_output, new_data)
+            update = update_output["update"]
+
+            version = prediction_output["model_version"]
+            if update["accepted"]:
+                version = self.registry.save(disease, update_output, fingerprint)
+
+            current.set(
+                rows=update["new_rows"],
+                accepted=update["accepted"],
+                incumbent_auc=update["incumbent_auc"],
+                candidate_auc=update["candidate_auc"],
+                model_version=version
+            )
+
+        return {
+            "disease": disease,
+            "best_model": prediction_output["best_model"],
+            "base_model_source": model_source,
+            "model_version": version,
+            "update": update
+        }
+
+    def narration_requests(self, disease, prediction_output, explain_output):
+
+        probability = explain_output["probability"]
+        risk_level = explain_output["risk_level"]
+        best_model = prediction_output["best_model"]
 
         # -----------------------
         # STEP 5: LLM Risk Explanation
         # -----------------------
         risk_prompt = f"""
         Disease: {disease}
-        Probability: {explain_output['probability']*100:.2f}%
-        Risk Level: {explain_output['risk_level']}
+        Probability: {probability*100:.2f}%
+        Risk Level: {risk_level}
 
         Explain briefly (3-4 lines) why this risk level was assigned 
         based on key contributing features.
         Keep it concise and clinical.
         """
-        risk_task = Task(
-            description=risk_prompt,
-            agent=risk_agent,
-            expected_output="Detailed clinical explanation."
-        )
 
         # -----------------------
         # STEP 6: LLM Report Narrative
@@ -70,15 +427,86 @@ class MedicalCrewOrchestrator:
         Generate a concise medical summary (3-4 lines) for:
 
         Disease: {disease}
-        Best Model: {prediction_output['best_model']}
-        Probability: {explain_output['probability']*100:.2f}%
-        Risk Level: {explain_output['risk_level']}
+        Best Model: {best_model}
+        Probability: {probability*100:.2f}%
+        Risk Level: {risk_level}
 
         Provide professional clinical language.
         """
 
+        return {
+            "risk_explanation": {
+                "prompt": risk_prompt,
+                "fallback": fallback_risk_text(disease, probability, risk_level)
+            },
+            "report_summary": {
+                "prompt": report_prompt,
+                "fallback": fallback_report_text(
+                    disease, best_model, probability, risk_level
+                )
+            }
+        }
+
+    def narrate(self, disease, prediction_output, explain_output):
+
+        with span("narration", disease=disease, backend=self.narration):
+            return self._narrate(disease, prediction_output, explain_output)
+
+    def _narrate(self, disease, prediction_output, explain_output):
+
+        requests = self.narration_requests(disease, prediction_output, explain_output)
+
+        if self.narration == "crew":
+            return self._narrate_with_crew(requests)
+
+        if self.narration == "none":
+            output = {"backend": "none"}
+            for name, request in requests.items():
+                output[name] = request["fallback"]
+                output[f"{name}_source"] = "disabled"
+            return output
+
+        # The two prompts are independent: send them concurrently
+        results = self.narrator.narrate_many(
+            [dict(request, name=name) for name, request in requests.items()]
+        )
+
+        output = {"backend": "async"}
+        for name, result in zip(requests, results):
+            output[name] = result["text"]
+            output[f"{name}_source"] = result["source"]
+
+        return output
+
+    def _narrate_with_crew(self, requests):
+
+        if self.llm_cache is not None:
+            cached = {
+                name: self.llm_cache.get(OLLAMA_MODEL, request["prompt"])
+                for name, request in requests.items()
+            }
+
+            if all(text is not None for text in cached.values()):
+                output = {"backend": "crew"}
+                for name, text in cached.items():
+                    output[name] = text
+                    output[f"{name}_source"] = "cache"
+                return output
+
+        from crewai import Crew, Task
+        from .agents import get_agent
+
+        risk_agent = get_agent("risk_agent")
+        report_agent = get_agent("report_agent")
+
+        risk_task = Task(
+            description=requests["risk_explanation"]["prompt"],
+            agent=risk_agent,
+            expected_output="Detailed clinical explanation."
+        )
+
         report_task = Task(
-            description=report_prompt,
+            description=requests["report_summary"]["prompt"],
             agent=report_agent,
             expected_output="Professional medical summary."
         )
@@ -91,17 +519,188 @@ class MedicalCrewOrchestrator:
 
         crew_output = crew.kickoff()
 
+        if self.llm_cache is not None:
+            for name, task_output in zip(requests, crew_output.tasks_output):
+                self.llm_cache.put(OLLAMA_MODEL, requests[name]["prompt"], task_output.raw)
+
+        return {
+            "backend": "crew",
+            "risk_explanation": crew_output.tasks_output[0].raw,
+            "risk_explanation_source": "llm",
+            "report_summary": crew_output.tasks_output[1].raw,
+            "report_summary_source": "llm",
+            "crew_output": crew_output
+        }
+
+    def run_many(self, dataset_paths, retrain=False, n_jobs=None):
+
+        # One process, one pool: every disease pipeline runs on its own
+        # thread, and training / SHAP reserve cores from a shared budget
+        # so the diseases do not oversubscribe the machine.
+        if n_jobs is None:
+            n_jobs = MODEL_CONFIG["training"]["n_jobs"]
+
+        budget = CoreBudget(resolve_core_budget(n_jobs))
+        share = max(1, budget.total // len(dataset_paths))
+
+        with self._tracing(), ThreadPoolExecutor(max_workers=len(dataset_paths)) as pool:
+            futures = {
+                disease: submit_in_context(
+                    pool, self.run, disease, path, retrain, (budget, share)
+                )
+                for disease, path in dataset_paths.items()
+            }
+
+        results = {}
+        summary = {}
+
+        for disease, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as exc:
+                summary[disease] = {"status": "failed", "error": str(exc)}
+                continue
+
+            results[disease] = result
+            summary[disease] = {
+                "status": "ok",
+                "model_source": result["model_source"],
+                "model_version": result["model_version"],
+                "best_model": result["prediction_output"]["best_model"],
+                "probability": result["explain_output"]["probability"],
+                "risk_level": result["explain_output"]["risk_level"],
+                "critical_path": result["schedule"]["critical_path"],
+                "report_path": result["report_path"]
+            }
+
+        return {
+            "core_budget": budget.total,
+            "results": results,
+            "summary": summary
+        }
+
+    def run(self, disease, dataset_path, retrain=False, core_budget=None):
+
+        with self._tracing(), span("pipeline", disease=disease) as current:
+            result = self._run(disease, dataset_path, retrain, core_budget)
+            current.set(
+                model_source=result["model_source"],
+                model_version=result["model_version"],
+                best_model=result["prediction_output"]["best_model"]
+            )
+
+        return result
+
+    def _run(self, disease, dataset_path, retrain=False, core_budget=None):
+
+        # Steps as a dependency graph: narration needs only the
+        # probability and risk level, so it runs next to SHAP, and the
+        # HTML report (which never uses the LLM text) does not wait for it.
+        #
+        #   registry → risk → narration
+        #            ↘ shap → report
+        graph = TaskGraph()
+
         # -----------------------
-        # STEP 7: Generate HTML Report (Your Existing Tool)
+        # STEP 0: Model Registry (trains on a miss)
+        # -----------------------
+        graph.add(
+            "registry",
+            lambda: self.load_or_train(
+                disease, dataset_path, retrain=retrain, core_budget=core_budget
+            ),
+            kind="local",
+            describe=lambda registry: {"model_source": registry[1]}
+        )
+
+        shap_fn = partial(explain_stage, self.stage_cache, self.explain_tool, self.stage_code["shap"])
+        shap_deps, shap_after = ["registry"], ()
+
+        if self.scheduler.cpu_executor == "process":
+            # Start the worker and import SHAP while the registry loads
+            graph.add(
+                "cpu_warmup",
+                partial(warm_imports, __name__),
+                kind="cpu"
+            )
+            # The worker gets a registry reference instead of the pickled model
+            graph.add(
+                "model_ref",
+                lambda registry: (
+                    os.path.abspath(self.registry.root),
+                    disease,
+                    registry[0]["model_version"]
+                ),
+                deps=["registry"],
+                kind="local"
+            )
+            shap_fn = partial(explain_registered, self.stage_cache, self.explain_tool, self.stage_code["shap"])
+            shap_deps, shap_after = ["model_ref"], ("cpu_warmup",)
+
+        # -----------------------
+        # STEP 4a: Probability + Risk Level
         # -----------------------
-        report_path = self.report_tool.run(
-            explain_output,
-            prediction_output
+        graph.add(
+            "risk",
+            lambda registry: self.explain_tool.risk(registry[0]),
+            deps=["registry"],
+            kind="local"
         )
 
+        # -----------------------
+        # STEP 4b: SHAP (No LLM)
+        # -----------------------
+        graph.add(
+            "shap",
+            shap_fn,
+            deps=shap_deps,
+            kind="cpu",
+            after=shap_after,
+            # The engine fans out to n_jobs worker processes
+            cores=self.explain_tool.n_jobs,
+            guard=None if core_budget is None else (
+                lambda: core_budget[0].reserve(self.explain_tool.n_jobs)
+            ),
+            describe=lambda shap: {"cache": "hit" if shap[1] else "miss"}
+        )
+
+        # -----------------------
+        # STEP 5-6: LLM Risk Explanation + Report Narrative
+        # -----------------------
+        graph.add(
+            "narration",
+            lambda registry, risk_output: self.narrate(disease, registry[0], risk_output),
+            deps=["registry", "risk"],
+            kind="io"
+        )
+
+        # -----------------------
+        # STEP 7: Generate HTML Report (Your Existing Tool)
+        # -----------------------
+        def report(registry, shap):
+            with span("report", disease=disease) as current:
+                report_path = self.report_tool.run(shap[0], registry[0])
+                current.set(path=report_path)
+            return report_path
+
+        graph.add("report", report, deps=["registry", "shap"], kind="local")
+
+        results, schedule = self.scheduler.run(graph)
+
+        prediction_output, model_source = results["registry"]
+        explain_output, shap_hit = results["shap"]
+
+        stage_cache_report = dict(prediction_output["stage_cache"])
+        stage_cache_report["shap"] = "hit" if shap_hit else "miss"
+
         return {
+            "model_source": model_source,
+            "model_version": prediction_output["model_version"],
             "prediction_output": prediction_output,
             "explain_output": explain_output,
-            "llm_output": crew_output,
-            "report_path": report_path
-        }
\ No newline at end of file
+            "llm_output": results["narration"],
+            "stage_cache": stage_cache_report,
+            "llm_cache": self.llm_cache.stats() if self.llm_cache is not None else None,
+            "report_path": results["report"],
+            "schedule": schedule
+        }
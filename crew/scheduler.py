@@ -0,0 +1,243 @@
+# crew/scheduler.py
+#
+# Runs the steps of one pipeline run as a dependency graph: a node
+# starts as soon as all of its dependencies have finished, so
+# independent steps overlap and the run takes as long as its longest
+# chain (the critical path) instead of the sum of its steps.
+#
+#   graph = TaskGraph()
+#   graph.add("registry", load, kind="local")
+#   graph.add("shap", explain, deps=["registry"], kind="cpu")
+#   graph.add("narration", narrate, deps=["registry"], kind="io")
+#   results, schedule = DAGScheduler().run(graph)
+#
+# A node is called with its dependencies' results as positional
+# arguments, in the order of `deps`; `after` only orders (results are
+# not passed). Node kinds:
+#   "io":    thread (LLM / network calls that mostly wait)
+#   "local": thread, never pickled (steps sharing in-process state such
+#            as the registry, caches or the core budget)
+#   "cpu":   process pool when the scheduler has one, else a thread;
+#            fn and its inputs / output must then be picklable, and
+#            its spans are sent back and written by this process
+# `cores` declares how many cores a node keeps busy (e.g. a SHAP node
+# that fans out to a worker pool); it is reported in the schedule and
+# is what a guard should reserve.
+
+import importlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from utils.tracing import emit_records, run_traced, span, submit_in_context, trace_context
+
+NODE_KINDS = ("io", "local", "cpu")
+
+
+class TaskNode:
+
+    def __init__(self, name, fn, deps=(), kind="local", after=(), guard=None, describe=None,
+                 cores=1):
+        if kind not in NODE_KINDS:
+            raise ValueError(f"Unsupported node kind: {kind}")
+
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.after = tuple(after)
+        self.kind = kind
+        self.cores = max(1, int(cores))
+        # guard(): context manager held in this process while the node
+        # runs (e.g. a CoreBudget reservation)
+        self.guard = guard
+        # describe(result) → span attributes, computed in this process
+        self.describe = describe
+
+    @property
+    def upstream(self):
+        return self.deps + self.after
+
+
+class TaskGraph:
+
+    def __init__(self):
+        self.nodes = {}
+
+    def add(self, name, fn, deps=(), kind="local", after=(), guard=None, describe=None,
+            cores=1):
+
+        if name in self.nodes:
+            raise ValueError(f"Duplicate node: {name}")
+
+        missing = [dep for dep in (*deps, *after) if dep not in self.nodes]
+        if missing:
+            # Dependencies are declared first, so the graph cannot cycle
+            raise ValueError(f"Node '{name}' depends on unknown nodes: {missing}")
+
+        self.nodes[name] = TaskNode(name, fn, deps, kind, after, guard, describe, cores)
+        return self
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def warm_imports(*modules):
+
+    # "cpu" node that starts a pool worker and imports what later nodes
+    # need, while other nodes are still running
+    for module in modules:
+        importlib.import_module(module)
+    return list(modules)
+
+
+def critical_path(graph, timings):
+
+    # Walk back from the node that finished last, always through the
+    # dependency that finished last: the chain that bounded the run.
+    if not timings:
+        return []
+
+    name = max(timings, key=lambda n: timings[n]["end"])
+    path = [name]
+
+    while graph.nodes[name].upstream:
+        name = max(graph.nodes[name].upstream, key=lambda n: timings[n]["end"])
+        path.append(name)
+
+    return path[::-1]
+
+
+class DAGScheduler:
+
+    # cpu_executor: "thread" runs "cpu" nodes on threads (the heavy
+    # libraries release the GIL); "process" sends them to a spawned
+    # process pool of cpu_workers, shared across runs of this scheduler.
+
+    def __init__(self, cpu_executor="thread", cpu_workers=1):
+        if cpu_executor not in ("thread", "process"):
+            raise ValueError(f"Unsupported CPU executor: {cpu_executor}")
+
+        self.cpu_executor = cpu_executor
+        self.cpu_workers = cpu_workers
+        self._processes = None
+        self._lock = threading.Lock()
+
+    def _process_pool(self):
+
+        # spawn: forking a process that already runs threads (narration,
+        # OpenMP) can deadlock the child
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._processes
+
+    def executor_for(self, node):
+        return "process" if node.kind == "cpu" and self.cpu_executor == "process" else "thread"
+
+    def _execute(self, node, args, origin):
+
+        executor = self.executor_for(node)
+
+        with span("dag_node", node=node.name, kind=node.kind, executor=executor,
+                  cores=node.cores) as current:
+            with node.guard() if node.guard is not None else nullcontext():
+                start = time.perf_counter()
+
+                if executor == "process":
+                    # Spans opened in the worker come back with the result
+                    future = self._process_pool().submit(
+                        run_traced, trace_context(), node.fn, *args
+                    )
+                    try:
+                        result, records = future.result()
+                    except Exception as e:
+                        emit_records(getattr(e, "trace_records", []))
+                        raise
+                    emit_records(records)
+                else:
+                    result = node.fn(*args)
+
+                end = time.perf_counter()
+
+            if node.describe is not None:
+                current.set(**node.describe(result))
+
+        return result, {
+            "kind": node.kind,
+            "executor": executor,
+            "cores": node.cores,
+            "deps": list(node.upstream),
+            "start": round(start - origin, 4),
+            "end": round(end - origin, 4),
+            "seconds": round(end - start, 4)
+        }
+
+    def run(self, graph):
+
+        # Returns (results by node name, schedule report). The first
+        # failing node's exception is raised once running nodes finish;
+        # nodes that have not started yet are skipped.
+        origin = time.perf_counter()
+
+        results = {}
+        timings = {}
+        pending = dict(graph.nodes)
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=max(1, len(graph))) as pool:
+            while pending or running:
+                if error is None:
+                    ready = [
+                        node for node in pending.values()
+                        if all(dep in results for dep in node.upstream)
+                    ]
+
+                    for node in ready:
+                        del pending[node.name]
+                        args = [results[dep] for dep in node.deps]
+                        future = submit_in_context(pool, self._execute, node, args, origin)
+                        running[future] = node.name
+                else:
+                    pending.clear()
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name], timings[name] = future.result()
+                    except Exception as exc:
+                        if error is None:
+                            error = exc
+
+        if error is not None:
+            raise error
+
+        path = critical_path(graph, timings)
+        wall_seconds = time.perf_counter() - origin
+
+        return results, {
+            "wall_seconds": round(wall_seconds, 4),
+            "serial_seconds": round(sum(t["seconds"] for t in timings.values()), 4),
+            # Busy core time: multi-core nodes count once per core
+            "core_seconds": round(sum(t["seconds"] * t["cores"] for t in timings.values()), 4),
+            "critical_path": path,
+            "critical_path_seconds": round(sum(timings[name]["seconds"] for name in path), 4),
+            "nodes": timings
+        }
+
+    def close(self):
+
+        with self._lock:
+            if self._processes is not None:
+                self._processes.shutdown()
+                self._processes = None
@@ -1,3 +1,5 @@
+import argparse
+import os
 import sys
 from crew.orchestrator import MedicalCrewOrchestrator
 
@@ -9,28 +11,546 @@ datasets = {
 }
 
 
-if __name__ == "__main__":
+def add_tracing_args(parser):
+
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="Write one JSON line per pipeline span to PATH ('-' for stderr)."
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also record the tracemalloc peak per span (slower)."
+    )
+    parser.add_argument(
+        "--profile-dir",
+        metavar="DIR",
+        help="Dump a cProfile .prof file per pipeline stage into DIR."
+    )
+
+
+def build_tracer(args):
+
+    if not (args.trace or args.profile_dir):
+        return None
+
+    from utils.tracing import Tracer
+
+    return Tracer(
+        output=args.trace or os.devnull,
+        memory=args.trace_memory,
+        profile_dir=args.profile_dir,
+        profile_spans=MedicalCrewOrchestrator.TRACED_STAGES
+    )
+
+
+def parse_args(argv):
+
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        usage="python main.py [heart|diabetes|ckd|all] [--retrain] [--n-jobs N] "
+              "[--narration async|crew] [--no-llm] [--no-llm-cache] [--no-stage-cache] [--search] "
+              "[--low-memory] [--out-of-core] [--cpu-executor thread|process] "
+              "[--trace PATH] [--trace-memory] [--profile-dir DIR]"
+    )
+    parser.add_argument("disease")
+    parser.add_argument(
+        "--retrain",
+        action="store_true",
+        help="Ignore the model registry and retrain from the dataset."
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=None,
+        help="Global core budget shared by all pipelines (default: all cores)."
+    )
+    parser.add_argument(
+        "--narration",
+        choices=["async", "crew"],
+        default="async",
+        help="LLM narration backend: concurrent Ollama calls or CrewAI kickoff."
+    )
+    parser.add_argument(
+        "--no-llm",
+        action="store_true",
+        help="Skip LLM narration (fallback text only); crewai is never imported."
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Always call the LLM instead of reusing cached narrations."
+    )
+    parser.add_argument(
+        "--no-stage-cache",
+        action="store_true",
+        help="Do not memoize data/feature/prediction/SHAP stage outputs on disk."
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Budgeted successive-halving search over RF / LightGBM settings."
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="float32 features, no intermediate copies (lower peak RSS on large data)."
+    )
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Train LightGBM from a chunked, memory-mapped binned dataset (larger than RAM)."
+    )
+    parser.add_argument(
+        "--cpu-executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Run SHAP on a thread or in a worker process, next to the LLM narration."
+    )
+    add_tracing_args(parser)
+
+    args = parser.parse_args(argv)
+
+    if args.no_llm:
+        args.narration = "none"
+
+    return args
+
+
+def run_all(args):
+
+    orchestrator = MedicalCrewOrchestrator(
+        narration=args.narration,
+        llm_cache=not args.no_llm_cache,
+        stage_cache=not args.no_stage_cache,
+        search=args.search,
+        tracer=build_tracer(args),
+        low_memory=args.low_memory,
+        out_of_core=args.out_of_core,
+        cpu_executor=args.cpu_executor
+    )
+
+    # Diseases without a dataset file are skipped, not failed
+    available = {d: path for d, path in datasets.items() if os.path.exists(path)}
+    skipped = [d for d in datasets if d not in available]
+
+    if not available:
+        print("No dataset files found:", ", ".join(datasets.values()))
+        return 1
+
+    result = orchestrator.run_many(available, retrain=args.retrain, n_jobs=args.n_jobs)
+
+    print("\n=======================================")
+    print("Core Budget:", result["core_budget"])
+
+    for disease in skipped:
+        print("---------------------------------------")
+        print("Disease:", disease)
+        print("Skipped: dataset not found at", datasets[disease])
+
+    for disease, summary in result["summary"].items():
+        print("---------------------------------------")
+        print("Disease:", disease)
+
+        if summary["status"] != "ok":
+            print("Failed:", summary["error"])
+            continue
+
+        print("Model Source:", summary["model_source"], f"(v{summary['model_version']})")
+        print("Best Model:", summary["best_model"])
+        print("Probability:", summary["probability"]*100, "%")
+        print("Risk Level:", summary["risk_level"])
+        print("Critical Path:", " → ".join(summary["critical_path"]))
+        print("Report Generated:", summary["report_path"])
+
+    print("=======================================\n")
+
+    failed = [d for d, s in result["summary"].items() if s["status"] != "ok"]
+    return 1 if failed else 0
+
+
+def parse_score_args(argv):
+
+    parser = argparse.ArgumentParser(
+        prog="main.py score",
+        usage="python main.py score [heart|diabetes|ckd] PATIENTS_CSV "
+              "[--output PATH] [--id-column COLUMN] [--retrain] [--trace PATH]"
+    )
+    parser.add_argument("disease")
+    parser.add_argument("patients", help="CSV file with one row per patient.")
+    parser.add_argument(
+        "--output",
+        help="Results file (.csv or .parquet). "
+             "Defaults to reports/<disease>_scores.csv."
+    )
+    parser.add_argument("--id-column", help="Patient identifier column to keep.")
+    parser.add_argument(
+        "--retrain",
+        action="store_true",
+        help="Ignore the model registry and retrain from the dataset."
+    )
+    add_tracing_args(parser)
+
+    return parser.parse_args(argv)
+
+
+def run_score(argv):
+
+    args = parse_score_args(argv)
+    disease = args.disease
+
+    if disease not in datasets:
+        print("Invalid disease selection.")
+        sys.exit(1)
+
+    output_path = args.output or f"reports/{disease}_scores.csv"
+
+    if output_path.endswith(".parquet"):
+        from agents.scoring_agent import check_parquet_support
+
+        try:
+            check_parquet_support()
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+
+    # Scoring never narrates: no LLM client, no LLM cache file
+    orchestrator = MedicalCrewOrchestrator(
+        narration="none", llm_cache=False, tracer=build_tracer(args)
+    )
+
+    result = orchestrator.score(
+        disease,
+        datasets[disease],
+        args.patients,
+        output_path=output_path,
+        id_column=args.id_column,
+        retrain=args.retrain
+    )
+
+    print("\n=======================================")
+    print("Model Source:", result["model_source"], f"(v{result['model_version']})")
+    print("Best Model:", result["best_model"])
+    print("Patients Scored:", result["patients"])
+    print("Risk Levels:", result["risk_counts"])
+    print("Results Written:", result["output_path"])
+    print("=======================================\n")
+
+
+def parse_update_args(argv):
+
+    parser = argparse.ArgumentParser(
+        prog="main.py update",
+        usage="python main.py update [heart|diabetes|ckd] NEW_ROWS_CSV [--low-memory] [--out-of-core] "
+              "[--trace PATH]"
+    )
+    parser.add_argument("disease")
+    parser.add_argument("new_rows", help="CSV of new labeled rows (same columns as the dataset).")
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Update the model registered with --low-memory."
+    )
+    parser.add_argument(
+        "--out-of-core",
+        action="store_true",
+        help="Update the model registered with --out-of-core."
+    )
+    add_tracing_args(parser)
+
+    return parser.parse_args(argv)
+
+
+def run_update(argv):
+
+    args = parse_update_args(argv)
+    disease = args.disease
+
+    if disease not in datasets:
+        print("Invalid disease selection.")
+        sys.exit(1)
+
+    orchestrator = MedicalCrewOrchestrator(
+        narration="none",
+        llm_cache=False,
+        tracer=build_tracer(args),
+        low_memory=args.low_memory,
+        out_of_core=args.out_of_core
+    )
+
+    result = orchestrator.update(disease, datasets[disease], args.new_rows)
+    update = result["update"]
+
+    print("\n=======================================")
+    print("Best Model:", result["best_model"], f"(from v{update['parent_version']})")
+    print("New Rows:", update["new_rows"], f"({update['update_rows']} update / {update['validation_rows']} holdout)")
+    print("Holdout AUC:", update["incumbent_auc"], "→", update["candidate_auc"])
+    if update["accepted"]:
+        print("Update Accepted: saved as", f"v{result['model_version']}")
+    else:
+        print("Update Rejected: AUC regressed, keeping", f"v{result['model_version']}")
+    print("Seconds:", update["seconds"])
+    print("=======================================\n")
+
+    return 0 if update["accepted"] else 2
+
+
+def parse_serve_args(argv):
+
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        usage="python main.py serve [heart|diabetes|ckd ...] [--host HOST] [--port PORT] "
+              "[--max-batch-size N] [--max-wait-ms MS] [--top-k K] [--no-compile]"
+    )
+    parser.add_argument(
+        "diseases",
+        nargs="*",
+        help="Models to load at startup (default: every disease with a dataset)."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=64,
+        help="Largest micro-batch passed to predict_proba / SHAP."
+    )
+    parser.add_argument(
+        "--max-wait-ms",
+        type=float,
+        default=5.0,
+        help="How long a request may wait for others to join its batch."
+    )
+    parser.add_argument("--top-k", type=int, default=5, help="Contributions returned per patient.")
+    parser.add_argument(
+        "--no-compile",
+        action="store_true",
+        help="Score with the original model instead of the compiled node arrays."
+    )
+
+    return parser.parse_args(argv)
+
+
+def run_serve(argv):
 
-    if len(sys.argv) != 2:
-        print("Usage: python main.py [heart|diabetes|ckd]")
+    import threading
+    from service.scoring_service import ScoringService, start_scoring_service
+
+    args = parse_serve_args(argv)
+    diseases = args.diseases or [d for d in datasets if os.path.exists(datasets[d])]
+
+    unknown = [d for d in diseases if d not in datasets]
+    if unknown:
+        print("Invalid disease selection:", ", ".join(unknown))
         sys.exit(1)
 
-    disease = sys.argv[1]
+    service = ScoringService(
+        {d: datasets[d] for d in diseases},
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        top_k=args.top_k,
+        compile_models=not args.no_compile
+    ).load()
+
+    server, base_url = start_scoring_service(service, args.host, args.port)
+
+    print("\n=======================================")
+    for disease, info in service.health()["models"].items():
+        compiled = "compiled" if info["compiled"]["compiled"] else "not compiled"
+        print(f"Loaded {disease}: {info['best_model']} (v{info['model_version']}, {compiled})")
+    print("Scoring service listening on", base_url)
+    print("POST", f"{base_url}/predict/<disease>")
+    print("=======================================\n")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        service.close()
+
+
+def parse_job_args(argv):
+
+    parser = argparse.ArgumentParser(
+        prog="main.py job",
+        usage="python main.py job submit [heart|diabetes|ckd] PATIENTS_CSV JOB_DIR "
+              "[--shard-rows N] [--id-column COLUMN] [--lease-seconds S] [--max-attempts N] [--retrain]\n"
+              "       python main.py job work JOB_DIR [--workers N] [--max-shards N]\n"
+              "       python main.py job status JOB_DIR\n"
+              "       python main.py job merge JOB_DIR [--output PATH]"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Split a cohort into shards on a job queue.")
+    submit.add_argument("disease")
+    submit.add_argument("patients", help="CSV file with one row per patient.")
+    submit.add_argument("job_dir", help="Job directory (shared by all workers).")
+    submit.add_argument("--shard-rows", type=int, default=5000, help="Patients per shard.")
+    submit.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=300,
+        help="A claimed shard goes back to the queue if its worker stops heartbeating this long."
+    )
+    submit.add_argument("--max-attempts", type=int, default=3, help="Tries per shard before it fails.")
+    submit.add_argument("--id-column", help="Patient identifier column to keep.")
+    submit.add_argument(
+        "--retrain",
+        action="store_true",
+        help="Ignore the model registry and retrain from the dataset."
+    )
+    add_tracing_args(submit)
+
+    work = commands.add_parser("work", help="Process shards until the queue is empty.")
+    work.add_argument("job_dir")
+    work.add_argument("--workers", type=int, default=1, help="Worker processes on this machine.")
+    work.add_argument("--max-shards", type=int, help="Stop each worker after N shards.")
+    add_tracing_args(work)
+
+    status = commands.add_parser("status", help="Shard counts and errors.")
+    status.add_argument("job_dir")
+
+    merge = commands.add_parser("merge", help="Concatenate shard results of a finished job.")
+    merge.add_argument("job_dir")
+    merge.add_argument("--output", help="Results file (default: JOB_DIR/scores.csv).")
+
+    return parser.parse_args(argv)
+
+
+def run_job(argv):
+
+    import json
+    from agents.batch_job_agent import BatchJobAgent, run_worker
+
+    args = parse_job_args(argv)
+
+    if args.command == "submit":
+        if args.disease not in datasets:
+            print("Invalid disease selection.")
+            return 1
+
+        orchestrator = MedicalCrewOrchestrator(
+            narration="none", llm_cache=False, tracer=build_tracer(args)
+        )
+        job = orchestrator.submit_job(
+            args.disease,
+            datasets[args.disease],
+            args.patients,
+            args.job_dir,
+            id_column=args.id_column,
+            retrain=args.retrain,
+            shard_rows=args.shard_rows,
+            lease_seconds=args.lease_seconds,
+            max_attempts=args.max_attempts
+        )
+
+        print("\n=======================================")
+        print("Job:", job["job_id"], f"({job['job_dir']})")
+        print("Model:", job["best_model"], f"(v{job['model_version']}, {job['model_source']})")
+        print("Patients:", job["rows"], "in", job["shards"], "shards")
+        print("Run workers with: python main.py job work", job["job_dir"])
+        print("=======================================\n")
+        return 0
+
+    if args.command == "work":
+        if args.workers <= 1:
+            from contextlib import nullcontext
+            from utils.tracing import use_tracer
+
+            tracer = build_tracer(args)
+            with use_tracer(tracer) if tracer is not None else nullcontext():
+                results = [run_worker(args.job_dir, max_shards=args.max_shards)]
+        else:
+            # Independent processes: each claims shards from the queue
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(
+                max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                futures = [
+                    pool.submit(run_worker, args.job_dir, max_shards=args.max_shards)
+                    for _ in range(args.workers)
+                ]
+                results = [future.result() for future in futures]
+
+        for result in results:
+            print(json.dumps(result))
+
+        status = BatchJobAgent().status(args.job_dir)
+        print(json.dumps(status))
+        return 0 if status["failed"] == 0 else 1
+
+    if args.command == "status":
+        status = BatchJobAgent().status(args.job_dir)
+        print(json.dumps(status, indent=2))
+        return 0 if status["failed"] == 0 else 1
+
+    result = BatchJobAgent().merge(args.job_dir, output_path=args.output)
+
+    print("\n=======================================")
+    print("Job:", result["job_id"])
+    print("Patients Scored:", result["patients"])
+    print("Risk Levels:", result["risk_counts"])
+    print("Results Written:", result["output_path"])
+    print("=======================================\n")
+    return 0
+
+
+if __name__ == "__main__":
+
+    if sys.argv[1:2] == ["score"]:
+        run_score(sys.argv[2:])
+        sys.exit(0)
+
+    if sys.argv[1:2] == ["update"]:
+        sys.exit(run_update(sys.argv[2:]))
+
+    if sys.argv[1:2] == ["job"]:
+        sys.exit(run_job(sys.argv[2:]))
+
+    if sys.argv[1:2] == ["serve"]:
+        run_serve(sys.argv[2:])
+        sys.exit(0)
+
+    args = parse_args(sys.argv[1:])
+    disease = args.disease
+
+    if disease == "all":
+        sys.exit(run_all(args))
 
     if disease not in datasets:
         print("Invalid disease selection.")
         sys.exit(1)
 
-    orchestrator = MedicalCrewOrchestrator()
+    orchestrator = MedicalCrewOrchestrator(
+        narration=args.narration,
+        llm_cache=not args.no_llm_cache,
+        stage_cache=not args.no_stage_cache,
+        search=args.search,
+        tracer=build_tracer(args),
+        low_memory=args.low_memory,
+        out_of_core=args.out_of_core,
+        cpu_executor=args.cpu_executor
+    )
 
-    result = orchestrator.run(disease, datasets[disease])
+    result = orchestrator.run(disease, datasets[disease], retrain=args.retrain)
 
     prediction = result["prediction_output"]
     explain = result["explain_output"]
 
     print("\n=======================================")
+    print("Model Source:", result["model_source"], f"(v{result['model_version']})")
     print("Best Model:", prediction["best_model"])
     print("Probability:", explain["probability"]*100, "%")
     print("Risk Level:", explain["risk_level"])
+    print("Stage Cache:", result["stage_cache"])
+    schedule = result["schedule"]
+    print(
+        "Critical Path:", " → ".join(schedule["critical_path"]),
+        f"({schedule['critical_path_seconds']:.2f}s of {schedule['serial_seconds']:.2f}s serial,",
+        f"{schedule['core_seconds']:.2f}s core, {schedule['wall_seconds']:.2f}s wall)"
+    )
     print("Report Generated:", result["report_path"])
-    print("=======================================\n")
\ No newline at end of file
+    print("=======================================\n")
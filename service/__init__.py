@@ -0,0 +1,6 @@
+"""Local HTTP scoring service with micro-batched inference."""
+
+__all__ = [
+    "micro_batcher",
+    "scoring_service"
+]
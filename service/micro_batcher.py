@@ -0,0 +1,116 @@
+# service/micro_batcher.py
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class MicroBatcher:
+
+    # Coalesces concurrent single-item submissions into one call of
+    # `handler(items) -> results`. A batch is flushed when it reaches
+    # max_batch_size or max_wait_ms after its first item arrived, so an
+    # idle service answers a lone request after at most max_wait_ms.
+
+    def __init__(self, handler, max_batch_size=64, max_wait_ms=5.0, name="micro-batcher"):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+        self.thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+
+        future = Future()
+        self.queue.put((item, future))
+        return future
+
+    def _collect(self, first):
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        stop = False
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                entry = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if entry is _STOP:
+                stop = True
+                break
+
+            batch.append(entry)
+
+        return batch, stop
+
+    def _run_batch(self, batch):
+
+        items = [item for item, _ in batch]
+
+        try:
+            results = self.handler(items)
+        except Exception:
+            # One bad item must not fail its neighbours: retry one by one
+            for item, future in batch:
+                try:
+                    future.set_result(self.handler([item])[0])
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _loop(self):
+
+        while True:
+            first = self.queue.get()
+            if first is _STOP:
+                return
+
+            batch, stop = self._collect(first)
+
+            # Counted before the results go out, so stats() already
+            # includes every answered item
+            with self.lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+            self._run_batch(batch)
+
+            if stop:
+                return
+
+    def stats(self):
+
+        with self.lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0
+            }
+
+    def close(self):
+
+        self.queue.put(_STOP)
+        self.thread.join()
@@ -0,0 +1,224 @@
+# service/scoring_service.py
+#
+# Long-lived local HTTP scoring service. Models are loaded once (from
+# the registry, training only if nothing is registered) and concurrent
+# single-patient requests are coalesced into micro-batches, so
+# preprocessing, predict_proba and SHAP run once per batch. Tree
+# ensembles are compiled to flat node arrays at load (utils.tree_compiler)
+# and checked against the original model on its test split.
+#
+#   python main.py serve heart ckd --port 8080 --max-wait-ms 5
+#
+#   POST /predict/<disease>   {"age": 63, "sex": 1, ...}
+#   GET  /health
+#   GET  /stats
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from agents.explainability_agent import ExplainabilityAgent
+from service.micro_batcher import MicroBatcher
+from utils.risk import risk_levels
+from utils.shap_engine import top_contributions
+from utils.tree_compiler import compile_for_scoring
+
+
+class DiseaseScorer:
+
+    def __init__(self, prediction_output, top_k=5, compile_model=True, compiled_max_rows=256):
+        self.disease = prediction_output["disease"]
+        self.best_model = prediction_output["best_model"]
+        self.model_version = prediction_output.get("model_version")
+        self.model = prediction_output["model"]
+        self.preprocessor = prediction_output["preprocessor"]
+        self.top_k = top_k
+
+        # predict_proba goes through the compiled evaluator when it
+        # compiles and matches the original model
+        self.predictor = self.model
+        self.compilation = {"compiled": False, "reason": "disabled"}
+
+        if compile_model:
+            self.predictor, self.compilation = compile_for_scoring(
+                self.model, self.best_model, prediction_output["X_test"],
+                max_rows=compiled_max_rows
+            )
+
+        # Explainer is built here, not on the first request
+        self.engine = ExplainabilityAgent().engine(prediction_output)
+
+    def score_batch(self, patients):
+
+        for patient in patients:
+            if not isinstance(patient, dict):
+                raise ValueError("Patient payload must be a JSON object")
+
+        X = self.preprocessor.transform(pd.DataFrame.from_records(patients))
+        probabilities = self.predictor.predict_proba(X)[:, 1]
+        risks = risk_levels(probabilities)
+
+        contributions = top_contributions(
+            self.engine.explain(X), self.engine.feature_names, self.top_k
+        )
+
+        return [
+            {
+                "disease": self.disease,
+                "best_model": self.best_model,
+                "model_version": self.model_version,
+                "probability": round(float(probability), 4),
+                "risk_level": str(risk),
+                "top_contributions": top,
+                "batch_size": len(patients)
+            }
+            for probability, risk, top in zip(probabilities, risks, contributions)
+        ]
+
+
+class ScoringService:
+
+    def __init__(self, dataset_paths, orchestrator=None, max_batch_size=64,
+                 max_wait_ms=5.0, top_k=5, request_timeout=30.0, compile_models=True):
+        self.dataset_paths = dataset_paths
+        self.orchestrator = orchestrator
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.top_k = top_k
+        self.request_timeout = request_timeout
+        self.compile_models = compile_models
+
+        self.scorers = {}
+        self.batchers = {}
+
+    def load(self):
+
+        if self.orchestrator is None:
+            from crew.orchestrator import MedicalCrewOrchestrator
+            self.orchestrator = MedicalCrewOrchestrator()
+
+        for disease, path in self.dataset_paths.items():
+            prediction_output, _ = self.orchestrator.load_or_train(disease, path)
+
+            scorer = DiseaseScorer(
+                prediction_output, top_k=self.top_k, compile_model=self.compile_models
+            )
+            self.scorers[disease] = scorer
+            self.batchers[disease] = MicroBatcher(
+                scorer.score_batch,
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+                name=f"batcher-{disease}"
+            )
+
+        return self
+
+    def predict(self, disease, patient):
+
+        if disease not in self.batchers:
+            raise KeyError(disease)
+
+        return self.batchers[disease].submit(patient).result(self.request_timeout)
+
+    def health(self):
+
+        return {
+            "status": "ok",
+            "models": {
+                disease: {
+                    "best_model": scorer.best_model,
+                    "model_version": scorer.model_version,
+                    "compiled": scorer.compilation
+                }
+                for disease, scorer in self.scorers.items()
+            }
+        }
+
+    def stats(self):
+        return {disease: b.stats() for disease, b in self.batchers.items()}
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, payload):
+
+        body = json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+
+        if self.path == "/health":
+            self._send_json(200, self.server.service.health())
+        elif self.path == "/stats":
+            self._send_json(200, self.server.service.stats())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length)
+
+        if not self.path.startswith("/predict/"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        disease = self.path[len("/predict/"):].strip("/")
+
+        if disease not in self.server.service.batchers:
+            self._send_json(404, {"error": f"no model loaded for '{disease}'"})
+            return
+
+        try:
+            patient = json.loads(raw or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": f"invalid JSON: {e}"})
+            return
+
+        try:
+            result = self.server.service.predict(disease, patient)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+
+    # Default listen backlog (5) refuses connections under bursty load
+    request_queue_size = 128
+
+
+def start_scoring_service(service, host="127.0.0.1", port=0):
+
+    server = ScoringHTTPServer((host, port), ScoringHandler)
+    server.daemon_threads = True
+    server.service = service
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://{host}:{server.server_address[1]}"
+    return server, base_url
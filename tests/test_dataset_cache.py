@@ -0,0 +1,71 @@
+# tests/test_dataset_cache.py
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.dataset_cache import downcast_frame, load_dataset
+
+pytest.importorskip("pyarrow")
+
+
+def write_rows(path, n_rows=100, seed=0):
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "age": rng.integers(30, 80, n_rows),
+        "chol": rng.normal(220, 30, n_rows).round(3),
+        "half": rng.integers(0, 8, n_rows) / 2,
+        "smoker": rng.choice(["yes", "no"], n_rows)
+    })
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+
+def test_cached_load_matches_csv(tmp_path):
+
+    path = tmp_path / "rows.csv"
+    expected = write_rows(path)
+    cache_dir = tmp_path / "cache"
+
+    first = load_dataset(str(path), cache_dir=str(cache_dir))
+    second = load_dataset(str(path), cache_dir=str(cache_dir))
+
+    pd.testing.assert_frame_equal(first, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(second, expected, check_dtype=False)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_changed_file_replaces_its_old_caches(tmp_path):
+
+    path = tmp_path / "rows.csv"
+    other = tmp_path / "other" / "rows.csv"
+    other.parent.mkdir()
+    cache_dir = str(tmp_path / "cache")
+
+    write_rows(path)
+    write_rows(other)
+    load_dataset(str(path), cache_dir=cache_dir)
+    load_dataset(str(path), cache_dir=cache_dir, downcast=True)
+    load_dataset(str(other), cache_dir=cache_dir)
+
+    expected = write_rows(path, seed=1)
+    os.utime(path, ns=(0, 10**18))
+    df = load_dataset(str(path), cache_dir=cache_dir)
+
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    # The new cache of rows.csv and the untouched cache of other/rows.csv
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_downcast_is_exact(tmp_path):
+
+    df = write_rows(tmp_path / "rows.csv")
+    small = downcast_frame(df)
+
+    assert small["age"].dtype == np.int8
+    assert small["half"].dtype == np.float32
+    assert small["chol"].dtype == np.float64
+    pd.testing.assert_frame_equal(small, df, check_dtype=False)
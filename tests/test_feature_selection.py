@@ -0,0 +1,79 @@
+# tests/test_feature_selection.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.feature_selection import correlated_columns
+
+
+def dense_rule(X, threshold=0.90):
+
+    # The original rule: X.corr() in float64 over its upper triangle
+    corr_matrix = X.corr().abs()
+    upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
+    return [column for column in upper.columns if any(upper[column] > threshold)]
+
+
+def make_frame(n_rows=500, n_cols=40, seed=0):
+
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(n_rows, n_cols // 4))
+
+    # Groups of columns built from the same base at varying noise, so
+    # correlations spread around the threshold
+    columns = {}
+    for j in range(n_cols):
+        noise = rng.uniform(0.05, 0.8)
+        columns[f"f{j}"] = base[:, j % base.shape[1]] + noise * rng.normal(size=n_rows)
+    columns["constant"] = np.ones(n_rows)
+
+    return pd.DataFrame(columns)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 256])
+def test_matches_dense_rule(block_size):
+
+    X = make_frame()
+
+    assert correlated_columns(X, block_size=block_size) == dense_rule(X)
+
+
+def test_matches_dense_rule_with_missing_values():
+
+    X = make_frame(seed=1)
+    rng = np.random.default_rng(1)
+    X = X.mask(rng.random(X.shape) < 0.1)
+
+    assert correlated_columns(X, block_size=5) == dense_rule(X)
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.95])
+def test_matches_dense_rule_across_thresholds(threshold):
+
+    X = make_frame(seed=2)
+
+    assert correlated_columns(X, threshold=threshold, block_size=9) == dense_rule(X, threshold)
+
+
+@pytest.mark.parametrize("offset", [1e-7, -1e-7])
+def test_borderline_pair_decides_in_float64(offset):
+
+    # Sample |corr| exactly threshold ± offset: below float32 resolution
+    rng = np.random.default_rng(3)
+    a = rng.normal(size=20000)
+    b = rng.normal(size=20000)
+    a = (a - a.mean()) / a.std()
+    b -= b.mean() + (b @ a) / (a @ a) * a
+    b /= b.std()
+
+    corr = 0.9 + offset
+    X = pd.DataFrame({"a": a, "b": corr * a + np.sqrt(1 - corr**2) * b})
+
+    assert correlated_columns(X) == dense_rule(X) == (["b"] if offset > 0 else [])
+
+
+def test_too_small_frames():
+
+    assert correlated_columns(pd.DataFrame({"a": [1.0], "b": [2.0]})) == []
+    assert correlated_columns(pd.DataFrame({"a": [1.0, 2.0, 3.0]})) == []
@@ -0,0 +1,157 @@
+# tests/test_job_queue.py
+
+import os
+import time
+
+import pytest
+
+from utils.job_queue import FileQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return FileQueue(str(tmp_path / "queue"), lease_seconds=60, max_attempts=3).create()
+
+
+def expire(queue, task_id):
+
+    # Backdate the lease heartbeat instead of sleeping past it
+    path = queue._path("running", task_id)
+    old = time.time() - 10 * queue.lease_seconds
+    os.utime(path, (old, old))
+
+
+def test_put_is_idempotent_in_every_state(queue):
+
+    assert queue.put("shard-0", {"rows": 10})
+    assert not queue.put("shard-0", {"rows": 10})
+
+    record = queue.claim("worker-a")
+    assert not queue.put("shard-0", {"rows": 10})
+
+    queue.complete(record, {"ok": True})
+    assert not queue.put("shard-0", {"rows": 10})
+    assert queue.counts() == {"pending": 0, "running": 0, "done": 1, "failed": 0}
+
+
+def test_claim_takes_oldest_pending_once(queue):
+
+    for task_id in ("shard-2", "shard-0", "shard-1"):
+        queue.put(task_id, {})
+
+    claimed = [queue.claim(f"worker-{i}") for i in range(4)]
+
+    assert [record["task_id"] for record in claimed[:3]] == ["shard-0", "shard-1", "shard-2"]
+    assert claimed[3] is None
+    assert all(record["attempts"] == 1 for record in claimed[:3])
+
+
+def test_unexpired_lease_is_not_requeued(queue):
+
+    queue.put("shard-0", {})
+    queue.claim("worker-a")
+
+    assert queue.requeue_expired() == []
+    assert queue.claim("worker-b") is None
+
+
+def test_expired_lease_goes_back_to_pending(queue):
+
+    queue.put("shard-0", {})
+    queue.claim("worker-a")
+    expire(queue, "shard-0")
+
+    assert queue.requeue_expired() == ["shard-0"]
+    assert queue.counts()["pending"] == 1
+
+    # The original worker learns it lost the lease
+    assert not queue.heartbeat("shard-0")
+
+    record = queue.claim("worker-b")
+    assert record["worker_id"] == "worker-b"
+    assert record["attempts"] == 2
+
+
+def test_expired_lease_fails_after_max_attempts(queue):
+
+    queue.put("shard-0", {})
+
+    for attempt in range(queue.max_attempts):
+        record = queue.claim(f"worker-{attempt}")
+        assert record["attempts"] == attempt + 1
+        expire(queue, "shard-0")
+
+    assert queue.requeue_expired() == ["shard-0"]
+    assert queue.counts() == {"pending": 0, "running": 0, "done": 0, "failed": 1}
+    assert queue.claim("worker-x") is None
+
+
+def test_expired_lease_of_finished_task_is_dropped(queue):
+
+    # Worker checkpointed to done/ but died before removing running/
+    queue.put("shard-0", {})
+    record = queue.claim("worker-a")
+    queue._write(queue._path("done", "shard-0"), dict(record, result={}))
+    expire(queue, "shard-0")
+
+    assert queue.requeue_expired() == []
+    assert queue.counts() == {"pending": 0, "running": 0, "done": 1, "failed": 0}
+
+
+def test_release_retries_then_fails(queue):
+
+    queue.put("shard-0", {})
+
+    states = []
+    for _ in range(queue.max_attempts):
+        record = queue.claim("worker-a")
+        states.append(queue.release(record, "boom"))
+
+    assert states == ["pending", "pending", "failed"]
+    assert queue.tasks("failed")[0]["errors"] == ["boom"] * queue.max_attempts
+
+
+def test_every_task_is_delivered_at_least_once(queue):
+
+    # Worker a dies holding every other task it claims; once those
+    # leases expire, worker b picks them up and everything finishes.
+    task_ids = [f"shard-{i}" for i in range(6)]
+    for task_id in task_ids:
+        queue.put(task_id, {})
+
+    abandoned = []
+    deliveries = {}
+
+    while (record := queue.claim("worker-a")) is not None:
+        deliveries[record["task_id"]] = deliveries.get(record["task_id"], 0) + 1
+        if len(deliveries) % 2:
+            abandoned.append(record["task_id"])
+        else:
+            queue.complete(record, {"worker": "a"})
+
+    for task_id in abandoned:
+        expire(queue, task_id)
+
+    while (record := queue.claim("worker-b")) is not None:
+        deliveries[record["task_id"]] = deliveries.get(record["task_id"], 0) + 1
+        queue.complete(record, {"worker": "b"})
+
+    assert sorted(deliveries) == task_ids
+    assert all(deliveries[task_id] == 2 for task_id in abandoned)
+    assert queue.counts() == {"pending": 0, "running": 0, "done": 6, "failed": 0}
+
+    done = {record["task_id"]: record for record in queue.tasks("done")}
+    assert {task_id for task_id in done if done[task_id]["result"]["worker"] == "b"} == set(abandoned)
+
+
+def test_lease_keeps_a_slow_task_claimed(tmp_path):
+
+    queue = FileQueue(str(tmp_path / "queue"), lease_seconds=0.3).create()
+    queue.put("shard-0", {})
+    queue.claim("worker-a")
+
+    with queue.lease("shard-0"):
+        time.sleep(0.6)
+        assert queue.requeue_expired() == []
+
+    assert queue.counts()["running"] == 1
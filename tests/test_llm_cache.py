@@ -0,0 +1,142 @@
+# tests/test_llm_cache.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from crew.llm_cache import LLMResponseCache, normalize_prompt, render_template, to_template
+from crew.narration import AsyncNarrator
+
+PROMPT = "Disease: heart\n  Probability: {}%\nRisk Level: High Risk"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_normalize_prompt_buckets_percentages():
+
+    assert normalize_prompt(PROMPT.format("82.63")) == normalize_prompt(PROMPT.format("82.10"))
+    assert normalize_prompt(PROMPT.format("82.63")) != normalize_prompt(PROMPT.format("83.01"))
+    assert normalize_prompt("A   b\n C") == "a b c"
+
+    # Wider buckets, and exact keys with bucketing off
+    assert normalize_prompt("at 82.6%", 5.0) == normalize_prompt("at 84.9%", 5.0)
+    assert normalize_prompt("at 82.6%", 0) != normalize_prompt("at 82.7%", 0)
+
+
+def test_template_round_trip_keeps_other_percentages():
+
+    prompt = PROMPT.format("82.63")
+    response = "Estimated 82.63% (about 83 %), above the 70% line."
+
+    template = to_template(response, prompt)
+
+    assert "70%" in template
+    assert render_template(template, prompt) == response
+    assert render_template(template, PROMPT.format("82.10")) == (
+        "Estimated 82.10% (about 82 %), above the 70% line."
+    )
+
+
+def test_hit_quotes_the_exact_probability(cache):
+
+    cache.put("mistral", PROMPT.format("82.63"), "Probability is 82.63%.")
+
+    assert cache.get("mistral", PROMPT.format("82.10")) == "Probability is 82.10%."
+    assert cache.get("mistral", PROMPT.format("83.50")) is None
+    assert cache.get("llama", PROMPT.format("82.63")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_expired_entries_are_evicted(tmp_path):
+
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=0.05)
+    cache.put("mistral", "prompt", "text")
+    time.sleep(0.1)
+
+    assert cache.get("mistral", "prompt") is None
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_least_recently_used_entries_go_first(tmp_path):
+
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+
+    cache.put("mistral", "first", "1")
+    time.sleep(0.01)
+    cache.put("mistral", "second", "2")
+    time.sleep(0.01)
+    cache.get("mistral", "first")
+    time.sleep(0.01)
+    cache.put("mistral", "third", "3")
+
+    assert cache.get("mistral", "second") is None
+    assert cache.get("mistral", "first") == "1"
+    assert cache.get("mistral", "third") == "3"
+    cache.close()
+
+
+def test_cache_survives_reopening(tmp_path):
+
+    path = str(tmp_path / "cache.sqlite")
+    LLMResponseCache(path).put("mistral", "prompt", "text")
+
+    assert LLMResponseCache(path).get("mistral", "prompt") == "text"
+
+
+class SlowCache:
+
+    # Blocking lookups, like sqlite on a busy disk
+    def __init__(self, delay):
+        self.delay = delay
+        self.threads = set()
+        self.stored = {}
+
+    def get(self, model, prompt):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return None
+
+    def put(self, model, prompt, response):
+        self.stored[prompt] = response
+
+
+class EchoNarrator(AsyncNarrator):
+
+    async def generate(self, prompt):
+        await asyncio.sleep(0.01)
+        return f"echo {prompt}"
+
+
+def test_cache_calls_do_not_block_the_event_loop():
+
+    cache = SlowCache(delay=0.3)
+    narrator = EchoNarrator(cache=cache, max_concurrency=4)
+    requests = [{"prompt": f"p{i}", "fallback": "f"} for i in range(4)]
+
+    start = time.perf_counter()
+    results = narrator.narrate_many(requests)
+    elapsed = time.perf_counter() - start
+
+    # Four 0.3 s lookups overlap instead of running back to back
+    assert elapsed < 0.9
+    assert threading.get_ident() not in cache.threads
+    assert [result["text"] for result in results] == [f"echo p{i}" for i in range(4)]
+    assert cache.stored == {f"p{i}": f"echo p{i}" for i in range(4)}
+
+
+def test_fallback_text_is_never_cached(cache):
+
+    narrator = AsyncNarrator(base_url="http://127.0.0.1:9", timeout=1.0, cache=cache)
+    result = narrator.narrate_many([{"prompt": "p", "fallback": "deterministic"}])[0]
+
+    assert result["source"] == "fallback"
+    assert result["text"] == "deterministic"
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,98 @@
+# tests/test_main.py
+
+import pytest
+
+import main
+
+
+class RecordingOrchestrator:
+
+    # Stands in for MedicalCrewOrchestrator: records what run_many gets
+    calls = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def run_many(self, dataset_paths, retrain=False, n_jobs=None):
+        RecordingOrchestrator.calls.append(dict(dataset_paths))
+        return {
+            "core_budget": 1,
+            "results": {},
+            "summary": {
+                disease: {"status": "failed", "error": "boom"} if disease == "bad" else {
+                    "status": "ok",
+                    "model_source": "registry",
+                    "model_version": 1,
+                    "best_model": "LightGBM",
+                    "probability": 0.5,
+                    "risk_level": "Moderate",
+                    "critical_path": ["registry", "shap", "report"],
+                    "report_path": "reports/x.html"
+                }
+                for disease in dataset_paths
+            }
+        }
+
+
+def test_run_all_skips_missing_datasets(tmp_path, monkeypatch, capsys):
+
+    present = tmp_path / "heart.csv"
+    present.write_text("a,b\n1,0\n")
+
+    monkeypatch.setattr(main, "MedicalCrewOrchestrator", RecordingOrchestrator)
+    monkeypatch.setattr(main, "datasets", {
+        "heart": str(present),
+        "diabetes": str(tmp_path / "missing.csv")
+    })
+    RecordingOrchestrator.calls.clear()
+
+    assert main.run_all(main.parse_args(["all", "--no-llm"])) == 0
+    assert RecordingOrchestrator.calls == [{"heart": str(present)}]
+    assert "Skipped: dataset not found" in capsys.readouterr().out
+
+
+def test_run_all_fails_on_a_failed_pipeline(tmp_path, monkeypatch):
+
+    present = tmp_path / "bad.csv"
+    present.write_text("a,b\n1,0\n")
+
+    monkeypatch.setattr(main, "MedicalCrewOrchestrator", RecordingOrchestrator)
+    monkeypatch.setattr(main, "datasets", {"bad": str(present)})
+
+    assert main.run_all(main.parse_args(["all", "--no-llm"])) == 1
+
+
+def test_run_all_without_any_dataset(tmp_path, monkeypatch):
+
+    monkeypatch.setattr(main, "MedicalCrewOrchestrator", RecordingOrchestrator)
+    monkeypatch.setattr(main, "datasets", {"heart": str(tmp_path / "missing.csv")})
+
+    assert main.run_all(main.parse_args(["all", "--no-llm"])) == 1
+
+
+class KwargsOrchestrator:
+
+    # Records constructor arguments and stops before any work
+    created = []
+
+    def __init__(self, **kwargs):
+        KwargsOrchestrator.created.append(kwargs)
+        raise SystemExit(0)
+
+
+@pytest.mark.parametrize("argv, runner", [
+    (["heart", "patients.csv"], main.run_score),
+    (["submit", "heart", "patients.csv", "jobs/x"], main.run_job)
+])
+def test_commands_without_narration_skip_the_llm_cache(argv, runner, tmp_path, monkeypatch):
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "MedicalCrewOrchestrator", KwargsOrchestrator)
+    KwargsOrchestrator.created.clear()
+
+    with pytest.raises(SystemExit):
+        runner(argv)
+
+    assert KwargsOrchestrator.created[0]["narration"] == "none"
+    assert KwargsOrchestrator.created[0]["llm_cache"] is False
+    assert not (tmp_path / "models" / "llm_cache.sqlite").exists()
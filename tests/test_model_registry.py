@@ -0,0 +1,129 @@
+# tests/test_model_registry.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from utils.model_registry import ModelRegistry, config_fingerprint, dataset_fingerprint
+from utils.preprocessing import ClinicalPreprocessor
+
+TARGET = "target"
+
+
+def prediction_output():
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "age": rng.normal(55, 10, 200).round(),
+        "bp": rng.normal(130, 15, 200).round()
+    })
+    df[TARGET] = (df["age"] + rng.normal(scale=10, size=200) > 55).astype(int)
+
+    preprocessor = ClinicalPreprocessor(TARGET)
+    X, y = preprocessor.fit_transform(df)
+    model = LogisticRegression().fit(X, y)
+    metrics = {"auc": 0.9}
+
+    return {
+        "disease": "heart",
+        "model": model,
+        "preprocessor": preprocessor,
+        "X_test": X.iloc[:20],
+        "y_test": y.iloc[:20],
+        "selected_probs": model.predict_proba(X.iloc[:20])[:, 1],
+        "best_model": "Logistic Regression",
+        "best_metrics": metrics,
+        "lr_metrics": metrics,
+        "rf_metrics": None,
+        "lgb_metrics": None
+    }
+
+
+def write_csv(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_dataset_fingerprint_follows_content(tmp_path):
+
+    path = tmp_path / "rows.csv"
+    write_csv(path, "a,target\n1,0\n")
+    first = dataset_fingerprint(path)
+
+    write_csv(path, "a,target\n2,0\n")
+    os.utime(path, ns=(0, 10**18))
+
+    assert dataset_fingerprint(path) != first
+    assert len(first) == 64
+
+
+def test_config_fingerprint_includes_options():
+
+    assert config_fingerprint("heart") == config_fingerprint("heart", {})
+    assert config_fingerprint("heart") != config_fingerprint("heart", {"search": True})
+    assert config_fingerprint("heart") != config_fingerprint("ckd")
+
+
+def test_save_find_and_load(tmp_path):
+
+    registry = ModelRegistry(tmp_path / "models")
+    output = prediction_output()
+    fingerprint = {"dataset": "d1", "config": "c1"}
+
+    assert registry.find("heart", fingerprint) is None
+    with pytest.raises(FileNotFoundError):
+        registry.load("heart")
+
+    assert registry.save("heart", output, fingerprint) == 1
+    assert registry.save("heart", output, {"dataset": "d2", "config": "c1"}) == 2
+
+    assert registry.versions("heart") == [1, 2]
+    assert registry.find("heart", fingerprint) == 1
+
+    loaded = registry.load("heart")
+    assert loaded["model_version"] == 2
+    assert loaded["feature_columns"] == list(output["X_test"].columns)
+    np.testing.assert_allclose(
+        loaded["model"].predict_proba(loaded["X_test"])[:, 1], output["selected_probs"]
+    )
+
+
+def test_incomplete_version_is_skipped(tmp_path):
+
+    registry = ModelRegistry(tmp_path / "models")
+    registry.save("heart", prediction_output(), {"dataset": "d", "config": "c"})
+
+    # A save still writing: the directory exists, metadata.json does not
+    registry._reserve_version("heart")
+
+    assert registry.versions("heart") == [1, 2]
+    assert registry.load("heart")["model_version"] == 1
+    with pytest.raises(FileNotFoundError):
+        registry.load("heart", version=2)
+
+
+def test_concurrent_saves_get_distinct_versions(tmp_path):
+
+    registry = ModelRegistry(tmp_path / "models")
+
+    with ThreadPoolExecutor(8) as pool:
+        reserved = list(pool.map(lambda _: registry._reserve_version("heart")[0], range(32)))
+
+    assert sorted(reserved) == list(range(1, 33))
+
+
+def test_export_copies_one_version(tmp_path):
+
+    registry = ModelRegistry(tmp_path / "models")
+    output = prediction_output()
+    registry.save("heart", output, {"dataset": "d", "config": "c"})
+    registry.save("heart", output, {"dataset": "d", "config": "c"})
+
+    exported = registry.export("heart", 1, tmp_path / "job" / "models")
+
+    assert exported.versions("heart") == [1]
+    assert exported.load("heart")["model_version"] == 1
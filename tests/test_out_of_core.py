@@ -0,0 +1,61 @@
+# tests/test_out_of_core.py
+
+import numpy as np
+import pandas as pd
+
+from utils.out_of_core import reservoir_rows
+
+TARGET = "target"
+
+
+def write_rare_class(path, n_rows=5000, n_rare=3):
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "row": np.arange(n_rows),
+        "age": rng.integers(30, 80, n_rows),
+        TARGET: 0
+    })
+    df.loc[n_rows - n_rare:, TARGET] = 1
+    df.to_csv(path, index=False)
+
+    return df
+
+
+def test_uniform_sample_can_miss_a_rare_class(tmp_path):
+
+    path = tmp_path / "rows.csv"
+    write_rare_class(path)
+
+    sample, total_rows = reservoir_rows(path, 100, chunksize=512)
+
+    assert total_rows == 5000
+    assert len(sample) == 100
+    assert sample["row"].is_unique
+    assert set(sample[TARGET]) == {0}
+
+
+def test_every_class_is_kept(tmp_path):
+
+    path = tmp_path / "rows.csv"
+    df = write_rare_class(path)
+
+    uniform, _ = reservoir_rows(path, 100, chunksize=512)
+    sample, _ = reservoir_rows(path, 100, chunksize=512, target_column=TARGET, min_class_rows=10)
+
+    # The uniform rows plus every rare row; no row twice
+    assert sample["row"].is_unique
+    assert set(uniform["row"]) <= set(sample["row"])
+    assert set(df.loc[df[TARGET] == 1, "row"]) <= set(sample["row"])
+    assert len(sample) <= 100 + 2 * 10
+
+
+def test_class_rows_already_sampled_are_not_repeated(tmp_path):
+
+    path = tmp_path / "rows.csv"
+    write_rare_class(path, n_rows=200, n_rare=100)
+
+    sample, _ = reservoir_rows(path, 200, chunksize=64, target_column=TARGET)
+
+    assert len(sample) == 200
+    assert sample["row"].is_unique
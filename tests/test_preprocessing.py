@@ -0,0 +1,120 @@
+# tests/test_preprocessing.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from agents.feature_agent import FeatureSelectionAgent
+from utils.preprocessing import ClinicalPreprocessor, preprocess_data
+
+TARGET = "target"
+
+
+def reference_preprocess(df, target_column):
+
+    # The original pandas pipeline (drop_duplicates / fillna /
+    # get_dummies / StandardScaler) that ClinicalPreprocessor replaced
+    df = df.drop_duplicates()
+
+    X = df.drop(columns=[target_column])
+    y = df[target_column]
+
+    numeric_cols = X.select_dtypes(include="number").columns
+    categorical_cols = X.select_dtypes(exclude="number").columns
+
+    X[numeric_cols] = X[numeric_cols].fillna(X[numeric_cols].median())
+    X[categorical_cols] = X[categorical_cols].fillna("Unknown")
+
+    X = pd.get_dummies(X, drop_first=True)
+    X[numeric_cols] = StandardScaler().fit_transform(X[numeric_cols])
+
+    return X, y
+
+
+def make_rows(n_rows=300, seed=0):
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "age": rng.normal(55, 10, n_rows).round(),
+        "bp": rng.normal(130, 15, n_rows).round(),
+        "chol": rng.normal(220, 30, n_rows).round(),
+        "smoker": rng.choice(["yes", "no", "former"], n_rows)
+    })
+    df.loc[::7, "bp"] = np.nan
+    df.loc[::11, "smoker"] = np.nan
+    df[TARGET] = (df["age"] + rng.normal(scale=10, size=n_rows) > 55).astype(int)
+
+    return pd.concat([df, df.iloc[:10]], ignore_index=True)
+
+
+def test_fit_transform_matches_reference():
+
+    df = make_rows()
+
+    X, y = ClinicalPreprocessor(TARGET).fit_transform(df)
+    X_ref, y_ref = reference_preprocess(df, TARGET)
+
+    assert list(X.columns) == list(X_ref.columns)
+    pd.testing.assert_frame_equal(X, X_ref, check_dtype=False)
+    pd.testing.assert_series_equal(y, y_ref)
+
+
+def test_preprocess_data_is_the_preprocessor():
+
+    df = make_rows()
+
+    X, y = preprocess_data(df, TARGET)
+    X_fit, _ = ClinicalPreprocessor(TARGET).fit_transform(df)
+
+    pd.testing.assert_frame_equal(X, X_fit)
+
+
+def test_missing_target_is_an_error():
+
+    with pytest.raises(ValueError, match="not found"):
+        ClinicalPreprocessor(TARGET).fit_transform(make_rows().drop(columns=[TARGET]))
+    with pytest.raises(ValueError, match="fitted"):
+        ClinicalPreprocessor(TARGET).transform(make_rows())
+
+
+def test_transform_replays_training_features():
+
+    df = make_rows()
+    preprocessor = ClinicalPreprocessor(TARGET)
+    X, y = preprocessor.fit_transform(df)
+
+    features = FeatureSelectionAgent().run({
+        "disease": "heart", "X": X, "y": y, "preprocessor": preprocessor
+    })
+
+    # Raw rows (duplicates removed) back through the fitted preprocessor
+    raw = df.drop_duplicates()
+    replayed = preprocessor.transform(raw)
+
+    assert list(replayed.columns) == preprocessor.feature_names_
+    pd.testing.assert_frame_equal(replayed, features["X"], check_dtype=False)
+
+
+def test_transform_handles_missing_columns_and_unseen_categories():
+
+    preprocessor = ClinicalPreprocessor(TARGET)
+    preprocessor.fit_transform(make_rows())
+
+    patient = pd.DataFrame([{"age": 60, "smoker": "never", "extra": 1}])
+    X = preprocessor.transform(patient)
+
+    assert list(X.columns) == preprocessor.feature_names_
+    assert not X.isna().any().any()
+    assert not X.filter(like="smoker_").any().any()
+
+
+def test_low_memory_is_float32():
+
+    df = make_rows()
+
+    X, _ = ClinicalPreprocessor(TARGET, low_memory=True).fit_transform(df)
+    X_ref, _ = ClinicalPreprocessor(TARGET).fit_transform(df)
+
+    assert X["age"].dtype == np.float32
+    np.testing.assert_allclose(X.to_numpy(dtype=float), X_ref.to_numpy(dtype=float), atol=1e-5)
@@ -0,0 +1,107 @@
+# tests/test_report_agent.py
+
+import os
+
+import numpy as np
+import pytest
+
+from agents.report_agent import ReportAgent
+
+FEATURES = [f"f{i}" for i in range(12)]
+
+
+def prediction_output():
+
+    metrics = {"accuracy": 0.8, "recall": 0.7, "f1": 0.75, "auc": 0.85}
+    return {
+        "best_model": "Random Forest",
+        "lr_metrics": metrics,
+        "rf_metrics": metrics,
+        "lgb_metrics": None
+    }
+
+
+def explain_output():
+
+    # |SHAP| grows with the feature index, so f11 .. f2 are the top 10
+    values = {name: (-1) ** i * (i + 1) / 100 for i, name in enumerate(FEATURES)}
+    return {
+        "disease": "heart",
+        "shap_values": values,
+        "contributions": {name: "High" if v > 0 else "Low" for name, v in values.items()},
+        "probability": 0.42,
+        "risk_level": "Moderate"
+    }
+
+
+def cohort_output(n_patients=5):
+
+    rng = np.random.default_rng(0)
+    return {
+        "disease": "heart",
+        "probabilities": rng.random(n_patients),
+        "risk_levels": ["Low"] * n_patients,
+        "shap_matrix": rng.normal(size=(n_patients, len(FEATURES))),
+        "feature_names": FEATURES
+    }
+
+
+def test_runs_never_overwrite_each_other(tmp_path):
+
+    agent = ReportAgent(output_dir=str(tmp_path))
+
+    first = agent.run(explain_output(), prediction_output())
+    second = agent.run(explain_output(), prediction_output())
+
+    assert first != second
+    assert os.path.exists(first) and os.path.exists(second)
+    assert os.path.dirname(os.path.dirname(first)) == os.path.join(str(tmp_path), "heart")
+
+
+def test_report_lists_top_k_by_magnitude(tmp_path):
+
+    path = ReportAgent(output_dir=str(tmp_path)).run(
+        explain_output(), prediction_output(), run_id="run-1"
+    )
+
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+
+    assert path == os.path.join(str(tmp_path), "heart", "run-1", "patient_0.html")
+    assert html.index("f11") < html.index("f10") < html.index("f2")
+    assert "f1<" not in html and "f0<" not in html
+
+
+def test_patient_ids_stay_inside_the_run_dir(tmp_path):
+
+    path = ReportAgent(output_dir=str(tmp_path)).run(
+        explain_output(), prediction_output(), patient_id="../../etc/passwd", run_id="run-1"
+    )
+
+    run_dir = os.path.join(str(tmp_path), "heart", "run-1")
+    assert os.path.dirname(path) == run_dir
+
+
+def test_cohort_reports_one_file_per_patient(tmp_path):
+
+    agent = ReportAgent(output_dir=str(tmp_path), n_jobs=2)
+    ids = ["A-1", "A-2", "B 3", "B/4", "C5"]
+
+    result = agent.run_cohort(cohort_output(), prediction_output(), patient_ids=ids)
+
+    assert result["reports"] == 5
+    assert sorted(os.listdir(result["output_dir"])) == sorted(
+        ["A-1.html", "A-2.html", "B_3.html", "B_4.html", "C5.html"]
+    )
+
+    again = agent.run_cohort(cohort_output(), prediction_output(), patient_ids=ids)
+    assert again["output_dir"] != result["output_dir"]
+
+
+def test_cohort_ids_must_stay_unique_after_sanitizing(tmp_path):
+
+    agent = ReportAgent(output_dir=str(tmp_path))
+    ids = ["A/1", "A_1", "B", "C", "D"]
+
+    with pytest.raises(ValueError, match="unique"):
+        agent.run_cohort(cohort_output(), prediction_output(), patient_ids=ids)
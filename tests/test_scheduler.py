@@ -0,0 +1,216 @@
+# tests/test_scheduler.py
+
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from crew.scheduler import DAGScheduler, TaskGraph, critical_path
+from utils.training_executor import CoreBudget
+from utils.tracing import Tracer, span, use_tracer
+
+
+def sleeper(seconds, value, log=None, lock=threading.Lock()):
+
+    def run(*args):
+        if log is not None:
+            with lock:
+                log.append(value)
+        time.sleep(seconds)
+        return (value, args)
+
+    return run
+
+
+def test_nodes_start_after_their_dependencies():
+
+    #   a → b → d
+    #   a → c ↗
+    graph = TaskGraph()
+    graph.add("a", sleeper(0.05, "a"))
+    graph.add("b", sleeper(0.05, "b"), deps=["a"])
+    graph.add("c", sleeper(0.01, "c"), deps=["a"])
+    graph.add("d", sleeper(0.0, "d"), deps=["b", "c"])
+
+    results, schedule = DAGScheduler().run(graph)
+    nodes = schedule["nodes"]
+
+    for name, node in graph.nodes.items():
+        for dep in node.upstream:
+            assert nodes[name]["start"] >= nodes[dep]["end"]
+
+    # Results of deps are passed positionally, in `deps` order
+    assert results["b"] == ("b", (("a", ()),))
+    assert [dep for dep, _ in results["d"][1]] == ["b", "c"]
+
+
+def test_independent_nodes_overlap():
+
+    graph = TaskGraph()
+    graph.add("root", sleeper(0.0, "root"))
+    for name in ("x", "y", "z"):
+        graph.add(name, sleeper(0.3, name), deps=["root"], kind="io")
+
+    _, schedule = DAGScheduler().run(graph)
+
+    assert schedule["serial_seconds"] >= 0.9
+    assert schedule["wall_seconds"] < 0.8
+
+
+def test_after_orders_without_passing_results():
+
+    log = []
+    graph = TaskGraph()
+    graph.add("warmup", sleeper(0.05, "warmup", log))
+    graph.add("work", sleeper(0.0, "work", log), after=["warmup"])
+
+    results, schedule = DAGScheduler().run(graph)
+
+    assert log == ["warmup", "work"]
+    assert results["work"] == ("work", ())
+    assert schedule["nodes"]["work"]["deps"] == ["warmup"]
+
+
+def test_critical_path_follows_the_longest_chain():
+
+    graph = TaskGraph()
+    graph.add("registry", sleeper(0.05, "registry"))
+    graph.add("risk", sleeper(0.0, "risk"), deps=["registry"])
+    graph.add("narration", sleeper(0.4, "narration"), deps=["registry", "risk"], kind="io")
+    graph.add("shap", sleeper(0.05, "shap"), deps=["registry"], kind="cpu")
+    graph.add("report", sleeper(0.0, "report"), deps=["registry", "shap"])
+
+    _, schedule = DAGScheduler().run(graph)
+
+    assert schedule["critical_path"] == ["registry", "risk", "narration"]
+    assert schedule["critical_path_seconds"] <= schedule["wall_seconds"] + 1e-3
+
+
+def test_critical_path_from_timings():
+
+    graph = TaskGraph()
+    graph.add("a", None)
+    graph.add("b", None, deps=["a"])
+    graph.add("c", None, deps=["a"])
+    graph.add("d", None, deps=["b"], after=["c"])
+
+    timings = {
+        "a": {"end": 1.0},
+        "b": {"end": 2.0},
+        "c": {"end": 5.0},
+        "d": {"end": 6.0}
+    }
+
+    assert critical_path(graph, timings) == ["a", "c", "d"]
+    assert critical_path(graph, {}) == []
+
+
+def test_failure_skips_downstream_nodes():
+
+    ran = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    graph = TaskGraph()
+    graph.add("bad", fail)
+    graph.add("after_bad", lambda _: ran.append("after_bad"), deps=["bad"])
+
+    with pytest.raises(RuntimeError, match="boom"):
+        DAGScheduler().run(graph)
+
+    assert ran == []
+
+
+def test_graph_rejects_unknown_and_duplicate_nodes():
+
+    graph = TaskGraph()
+    graph.add("a", None)
+
+    with pytest.raises(ValueError):
+        graph.add("a", None)
+
+    with pytest.raises(ValueError):
+        graph.add("b", None, deps=["missing"])
+
+    with pytest.raises(ValueError):
+        graph.add("c", None, kind="gpu")
+
+
+def test_guard_is_held_while_the_node_runs():
+
+    events = []
+
+    class Guard:
+        def __enter__(self):
+            events.append("enter")
+
+        def __exit__(self, *exc):
+            events.append("exit")
+
+    graph = TaskGraph()
+    graph.add("shap", lambda: events.append("run"), kind="cpu", guard=Guard)
+
+    DAGScheduler().run(graph)
+
+    assert events == ["enter", "run", "exit"]
+
+
+def test_declared_cores_are_reported_and_reserved():
+
+    budget = CoreBudget(4)
+    seen = []
+
+    def shap():
+        seen.append(budget._available)
+
+    graph = TaskGraph()
+    graph.add("risk", sleeper(0.0, "risk"))
+    graph.add("shap", shap, kind="cpu", cores=3, guard=lambda: budget.reserve(3))
+
+    _, schedule = DAGScheduler().run(graph)
+
+    assert seen == [1]
+    assert schedule["nodes"]["shap"]["cores"] == 3
+    assert schedule["nodes"]["risk"]["cores"] == 1
+    assert schedule["core_seconds"] >= schedule["serial_seconds"]
+
+
+def traced_square(value):
+
+    # Module level: process-pool nodes are pickled
+    with span("square", value=value):
+        return value * value
+
+
+def test_process_node_spans_join_the_trace():
+
+    output = io.StringIO()
+    tracer = Tracer(output)
+
+    graph = TaskGraph()
+    graph.add("root", lambda: 3)
+    graph.add("square", traced_square, deps=["root"], kind="cpu")
+
+    scheduler = DAGScheduler(cpu_executor="process")
+    try:
+        with use_tracer(tracer):
+            results, schedule = scheduler.run(graph)
+    finally:
+        scheduler.close()
+
+    assert results["square"] == 9
+    assert schedule["nodes"]["square"]["executor"] == "process"
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    worker = next(record for record in records if record["name"] == "square")
+    node = next(
+        record for record in records
+        if record["name"] == "dag_node" and record["attributes"]["node"] == "square"
+    )
+
+    assert worker["trace_id"] == tracer.trace_id
+    assert worker["parent_id"] == node["span_id"]
+    assert worker["attributes"] == {"value": 3}
@@ -0,0 +1,90 @@
+# tests/test_scoring_agent.py
+
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from agents.scoring_agent import BatchScoringAgent
+from utils.preprocessing import ClinicalPreprocessor
+from utils.risk import risk_level
+
+
+def make_cohort(n_rows=200, seed=0):
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "PatientID": [f"P{i:04d}" for i in range(n_rows)],
+        "age": rng.normal(55, 10, n_rows).round(),
+        "bp": rng.normal(130, 15, n_rows).round(),
+        "smoker": rng.choice(["yes", "no"], n_rows)
+    })
+    df["target"] = ((df["age"] - 55) / 10 + (df["smoker"] == "yes") > 0.5).astype(int)
+    return df
+
+
+@pytest.fixture(scope="module")
+def prediction_output():
+
+    train = make_cohort().drop(columns=["PatientID"])
+    preprocessor = ClinicalPreprocessor("target")
+    X, y = preprocessor.fit_transform(train)
+
+    return {
+        "disease": "heart",
+        "best_model": "Logistic Regression",
+        "model": LogisticRegression().fit(X, y),
+        "preprocessor": preprocessor
+    }
+
+
+def test_cohort_scores_match_row_by_row(prediction_output):
+
+    cohort = make_cohort(50, seed=1).drop(columns=["target"])
+    result = BatchScoringAgent().run(prediction_output, cohort, id_column="PatientID")
+    scores = result["scores"]
+
+    assert result["patients"] == 50
+    assert list(scores.columns) == ["PatientID", "probability", "risk_level"]
+
+    for i in (0, 17, 49):
+        row = prediction_output["preprocessor"].transform(cohort.iloc[[i]])
+        probability = prediction_output["model"].predict_proba(row)[0, 1]
+        assert scores["probability"].iloc[i] == round(probability, 4)
+        assert scores["risk_level"].iloc[i] == risk_level(probability)
+
+    assert sum(result["risk_counts"].values()) == 50
+
+
+def test_scores_are_written_as_csv_and_parquet(prediction_output, tmp_path):
+
+    pytest.importorskip("pyarrow")
+    cohort = make_cohort(20, seed=2)
+
+    for name, read in (("scores.csv", pd.read_csv), ("scores.parquet", pd.read_parquet)):
+        path = str(tmp_path / "out" / name)
+        scores = BatchScoringAgent().run(prediction_output, cohort, output_path=path)["scores"]
+        pd.testing.assert_frame_equal(read(path), scores, check_dtype=False)
+
+
+def test_parquet_without_pyarrow_is_refused_before_scoring(prediction_output, tmp_path, monkeypatch):
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ValueError, match="pyarrow"):
+        BatchScoringAgent().run(
+            prediction_output, make_cohort(5), output_path=str(tmp_path / "scores.parquet")
+        )
+
+    assert not (tmp_path / "scores.parquet").exists()
+
+
+def test_invalid_cohorts_are_refused(prediction_output):
+
+    with pytest.raises(ValueError, match="empty"):
+        BatchScoringAgent().run(prediction_output, make_cohort(0))
+
+    with pytest.raises(ValueError, match="ID column"):
+        BatchScoringAgent().run(prediction_output, make_cohort(5), id_column="MRN")
@@ -0,0 +1,183 @@
+# tests/test_scoring_service.py
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from service.micro_batcher import MicroBatcher
+from service.scoring_service import ScoringService, start_scoring_service
+from utils.preprocessing import ClinicalPreprocessor
+
+TARGET = "target"
+
+
+class BlockingHandler:
+
+    # Holds the first batch until released, so later submissions queue up
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if len(self.batches) == 1:
+            self.release.wait(5)
+        return [item * 10 for item in items]
+
+
+def test_queued_items_are_coalesced():
+
+    handler = BlockingHandler()
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=50)
+
+    first = batcher.submit(0)
+    while not handler.batches:
+        time.sleep(0.001)
+
+    futures = [batcher.submit(i) for i in range(1, 10)]
+    handler.release.set()
+
+    assert first.result(5) == 0
+    assert [f.result(5) for f in futures] == [i * 10 for i in range(1, 10)]
+    assert [len(batch) for batch in handler.batches] == [1, 4, 4, 1]
+
+    stats = batcher.stats()
+    assert stats["items"] == 10
+    assert stats["largest_batch"] == 4
+    batcher.close()
+
+
+def test_lone_item_waits_at_most_max_wait():
+
+    batcher = MicroBatcher(lambda items: items, max_wait_ms=20)
+
+    start = time.monotonic()
+    assert batcher.submit("x").result(5) == "x"
+    assert time.monotonic() - start < 1.0
+    batcher.close()
+
+
+def test_bad_item_does_not_fail_its_batch():
+
+    def handler(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(handler, max_wait_ms=200)
+    futures = [batcher.submit(item) for item in ("a", "bad", "c")]
+
+    assert futures[0].result(5) == "A"
+    assert futures[2].result(5) == "C"
+    with pytest.raises(ValueError, match="bad item"):
+        futures[1].result(5)
+    batcher.close()
+
+
+def test_close_answers_items_submitted_before_it():
+
+    batcher = MicroBatcher(lambda items: items, max_wait_ms=1000)
+    futures = [batcher.submit(i) for i in range(3)]
+    batcher.close()
+
+    assert [f.result(5) for f in futures] == [0, 1, 2]
+    assert not batcher.thread.is_alive()
+
+
+# ======================================================
+# HTTP service
+# ======================================================
+class RegistryStub:
+
+    def __init__(self, prediction_output):
+        self.prediction_output = prediction_output
+
+    def load_or_train(self, disease, path):
+        return dict(self.prediction_output, disease=disease), {}
+
+
+def prediction_output():
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "age": rng.normal(55, 10, 300).round(),
+        "bp": rng.normal(130, 15, 300).round(),
+        "smoker": rng.choice(["yes", "no"], 300)
+    })
+    df[TARGET] = ((df["age"] - 55) / 10 + (df["smoker"] == "yes") > 0.5).astype(int)
+
+    preprocessor = ClinicalPreprocessor(TARGET)
+    X, y = preprocessor.fit_transform(df)
+    model = LogisticRegression().fit(X, y)
+
+    return {
+        "best_model": "Logistic Regression",
+        "model": model,
+        "preprocessor": preprocessor,
+        "X_test": X.iloc[:100],
+        "y_test": y.iloc[:100],
+        "model_version": 1
+    }
+
+
+@pytest.fixture
+def server():
+
+    output = prediction_output()
+    service = ScoringService(
+        {"heart": "unused.csv"}, orchestrator=RegistryStub(output), max_wait_ms=20
+    ).load()
+    httpd, base_url = start_scoring_service(service)
+
+    yield service, base_url, output
+
+    httpd.shutdown()
+    service.close()
+
+
+def post(url, payload):
+
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), method="POST")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_predictions_match_the_model(server):
+
+    service, base_url, output = server
+    patients = [{"age": 40 + i, "bp": 120, "smoker": "yes" if i % 2 else "no"} for i in range(16)]
+
+    with ThreadPoolExecutor(16) as pool:
+        responses = list(pool.map(lambda p: post(f"{base_url}/predict/heart", p), patients))
+
+    X = output["preprocessor"].transform(pd.DataFrame(patients))
+    expected = output["model"].predict_proba(X)[:, 1]
+
+    assert [r["probability"] for r in responses] == [round(float(p), 4) for p in expected]
+    assert all(len(r["top_contributions"]) == 3 for r in responses)
+    assert service.stats()["heart"]["items"] == 16
+
+
+def test_errors_and_health(server):
+
+    _, base_url, _ = server
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(f"{base_url}/predict/unknown", {})
+    assert error.value.code == 404
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(f"{base_url}/predict/heart", [1, 2])
+    assert error.value.code == 400
+
+    with urllib.request.urlopen(f"{base_url}/health", timeout=10) as response:
+        health = json.loads(response.read())
+    assert health["models"]["heart"]["model_version"] == 1
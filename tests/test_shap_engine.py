@@ -0,0 +1,173 @@
+# tests/test_shap_engine.py
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from utils import shap_engine
+from utils.shap_engine import ShapEngine, get_engine, top_contributions
+
+shap = pytest.importorskip("shap")
+lgb = pytest.importorskip("lightgbm")
+
+
+def make_data(n_rows=400, seed=0):
+
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 5)), columns=[f"f{i}" for i in range(5)])
+    y = ((X["f0"] - X["f1"] + 0.5 * X["f2"] * X["f3"]) > 0).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def forest():
+    X, y = make_data()
+    return RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y), X
+
+
+@pytest.fixture
+def two_cores(monkeypatch):
+
+    # Worker pools are only used with n_jobs > 1, whatever the host has
+    monkeypatch.setattr("utils.training_executor.os.cpu_count", lambda: 2)
+
+
+def reference(explainer, X):
+    return shap_engine.positive_class_values(explainer.shap_values(X, check_additivity=False))
+
+
+def test_random_forest_matches_tree_explainer(forest):
+
+    model, X = forest
+    engine = ShapEngine(model, "Random Forest", X)
+
+    expected = reference(shap.TreeExplainer(model), X)
+    np.testing.assert_allclose(engine.explain(X), expected, atol=1e-6)
+
+
+def test_lightgbm_matches_tree_explainer():
+
+    X, y = make_data()
+    model = lgb.LGBMClassifier(n_estimators=30, verbose=-1).fit(X, y)
+    engine = ShapEngine(model, "LightGBM", X)
+
+    expected = reference(shap.TreeExplainer(model.booster_), X)
+    np.testing.assert_allclose(engine.explain(X), expected, atol=1e-5)
+
+
+def test_interventional_mode_matches_tree_explainer(forest):
+
+    model, X = forest
+    engine = ShapEngine(model, "Random Forest", X, mode="interventional", background_size=50)
+
+    background = shap_engine.sample_background(X, 50, 0)
+    explainer = shap.TreeExplainer(model, data=background, feature_perturbation="interventional")
+
+    np.testing.assert_allclose(engine.explain(X.iloc[:50]), reference(explainer, X.iloc[:50]), atol=1e-6)
+    assert engine.expected_value == pytest.approx(
+        shap_engine.positive_class_expected_value(explainer.expected_value)
+    )
+
+
+def test_chunked_workers_match_serial(forest, two_cores):
+
+    model, X = forest
+    engine = ShapEngine(model, "Random Forest", X, n_jobs=2, chunk_size=64)
+    assert engine.n_jobs == 2
+
+    try:
+        np.testing.assert_array_equal(
+            engine.explain(X), ShapEngine(model, "Random Forest", X).explain(X)
+        )
+    finally:
+        engine.close()
+
+
+def test_pools_stay_within_the_core_budget(forest, two_cores, monkeypatch):
+
+    model, X = forest
+    monkeypatch.setitem(shap_engine.MODEL_CONFIG["training"], "n_jobs", 2)
+
+    first = ShapEngine(model, "Random Forest", X, n_jobs=2, chunk_size=128)
+    second = ShapEngine(model, "Random Forest", X, n_jobs=2, chunk_size=128)
+
+    try:
+        first.explain(X)
+        assert first._pool is not None
+
+        # The idle pool of the first engine makes room for the second
+        second.explain(X)
+        assert first._pool is None
+        assert second._pool is not None
+        assert sum(shap_engine._POOLS.values()) <= 2
+    finally:
+        first.close()
+        second.close()
+
+
+def test_get_engine_reuses_per_model_background_and_settings(forest):
+
+    model, X = forest
+
+    engine = get_engine(model, "Random Forest", X)
+    assert get_engine(model, "Random Forest", X.copy()) is engine
+
+    assert get_engine(model, "Random Forest", X.iloc[:100]) is not engine
+    assert get_engine(model, "Random Forest", X, mode="interventional") is not engine
+    assert get_engine(model, "Random Forest", X, chunk_size=32) is not engine
+
+
+def test_get_engine_is_bounded(forest, monkeypatch):
+
+    model, X = forest
+    monkeypatch.setattr(shap_engine, "MAX_ENGINES", 2)
+    monkeypatch.setattr(shap_engine, "_ENGINES", type(shap_engine._ENGINES)())
+
+    engines = [get_engine(model, "Random Forest", X, chunk_size=size) for size in (16, 32, 64)]
+
+    assert len(shap_engine._ENGINES) == 2
+    assert get_engine(model, "Random Forest", X, chunk_size=16) is not engines[0]
+    assert get_engine(model, "Random Forest", X, chunk_size=64) is engines[2]
+
+
+def test_top_contributions_order_by_magnitude():
+
+    values = np.array([[0.1, -0.5, 0.3], [0.0, 0.2, -0.1]])
+    top = top_contributions(values, ["a", "b", "c"], k=2)
+
+    assert [item["feature"] for item in top[0]] == ["b", "c"]
+    assert [item["feature"] for item in top[1]] == ["b", "c"]
+    assert top[0][0]["shap_value"] == -0.5
+
+
+def test_logistic_regression_matches_linear_explainer():
+
+    X, y = make_data()
+    model = LogisticRegression().fit(X, y)
+    engine = ShapEngine(model, "Logistic Regression", X)
+
+    explainer = shap.LinearExplainer(model, X)
+    np.testing.assert_allclose(engine.explain(X), explainer.shap_values(X), atol=1e-5)
+    assert engine.expected_value == pytest.approx(float(np.ravel(explainer.expected_value)[-1]))
+
+
+def test_linear_models_do_not_import_shap():
+
+    code = (
+        "import sys\n"
+        "import numpy as np, pandas as pd\n"
+        "from sklearn.linear_model import LogisticRegression\n"
+        "from utils.shap_engine import ShapEngine\n"
+        "X = pd.DataFrame(np.random.default_rng(0).normal(size=(50, 3)), columns=list('abc'))\n"
+        "model = LogisticRegression().fit(X, X['a'] > 0)\n"
+        "ShapEngine(model, 'Logistic Regression', X).explain(X)\n"
+        "assert 'shap' not in sys.modules\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=root)
@@ -0,0 +1,93 @@
+# tests/test_stage_cache.py
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+from utils import stage_cache
+from utils.stage_cache import StageCache, code_version
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StageCache(str(tmp_path / "stage_cache"))
+
+
+def counted(value):
+
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return value
+
+    return fn, calls
+
+
+def test_second_run_is_a_hit(cache):
+
+    fn, calls = counted({"rows": 3})
+
+    first, key, hit = cache.run("data", fn, upstream="dataset", config={"a": 1}, code="v1")
+    second, same_key, second_hit = cache.run("data", fn, upstream="dataset", config={"a": 1}, code="v1")
+
+    assert (hit, second_hit) == (False, True)
+    assert key == same_key
+    assert first == second == {"rows": 3}
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("change", [
+    {"upstream": "other-dataset"},
+    {"config": {"a": 2}},
+    {"code": "v2"},
+    {"stage": "feature"}
+])
+def test_any_input_change_is_a_new_key(cache, change):
+
+    base = {"stage": "data", "upstream": "dataset", "config": {"a": 1}, "code": "v1"}
+    assert cache.key(**base) != cache.key(**dict(base, **change))
+
+
+def test_config_key_order_does_not_matter(cache):
+    assert cache.key("data", "u", {"a": 1, "b": 2}, "v") == cache.key("data", "u", {"b": 2, "a": 1}, "v")
+
+
+def test_refresh_recomputes_and_disabled_never_writes(cache, tmp_path):
+
+    fn, calls = counted(1)
+    cache.run("data", fn, upstream="u", config={}, code="v")
+    _, _, hit = cache.run("data", fn, upstream="u", config={}, code="v", refresh=True)
+
+    assert not hit and len(calls) == 2
+
+    disabled = StageCache(str(tmp_path / "disabled"), enabled=False)
+    disabled.run("data", fn, upstream="u", config={}, code="v")
+    assert not os.path.exists(tmp_path / "disabled")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+
+    payload = np.zeros(50_000)  # ~400 KB per entry
+    cache = StageCache(str(tmp_path / "stage_cache"), max_bytes=1_000_000)
+
+    cache.run("shap", lambda: payload, upstream="a", config={}, code="v")
+    time.sleep(0.05)
+    cache.run("shap", lambda: payload, upstream="b", config={}, code="v")
+    time.sleep(0.05)
+
+    # A hit refreshes "a", so "b" is now the least recently used
+    assert cache.run("shap", lambda: payload, upstream="a", config={}, code="v")[2]
+    time.sleep(0.05)
+    cache.run("shap", lambda: payload, upstream="c", config={}, code="v")
+
+    assert cache.evictions == 1
+    assert cache.run("shap", lambda: payload, upstream="a", config={}, code="v")[2]
+    assert not cache.run("shap", lambda: payload, upstream="b", config={}, code="v")[2]
+
+
+def test_code_version_tracks_source():
+    assert code_version(stage_cache) == code_version(stage_cache)
+    assert code_version(stage_cache) != code_version(stage_cache, os)
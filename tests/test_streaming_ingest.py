@@ -0,0 +1,96 @@
+# tests/test_streaming_ingest.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.data_agent import DataValidationAgent
+from utils.streaming_ingest import HashIndex, infer_dtypes, integer_labels, stream_validate
+
+TARGET = "target"
+
+
+def make_rows(n_rows, seed):
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "age": rng.integers(30, 80, n_rows),
+        "chol": rng.normal(220, 30, n_rows).round(1),
+        "smoker": rng.choice(["yes", "no"], n_rows)
+    })
+    df[TARGET] = (df["age"] + rng.normal(scale=10, size=n_rows) > 55).astype(int)
+
+    return df
+
+
+def test_hash_index_contains_added_hashes():
+
+    index = HashIndex()
+    for start in range(0, 1000, 100):
+        index.add(np.arange(start, start + 100, dtype=np.uint64) * 7)
+
+    assert len(index) == 1000
+    assert index.contains(np.array([0, 7, 6993], dtype=np.uint64)).all()
+    assert not index.contains(np.array([1, 7000], dtype=np.uint64)).any()
+
+
+def test_infer_dtypes_pins_the_target(tmp_path):
+
+    path = tmp_path / "rows.csv"
+    make_rows(50, seed=0).to_csv(path, index=False)
+
+    assert infer_dtypes(path, TARGET) == {
+        "age": "float64", "chol": "float64", "smoker": "str", TARGET: "float64"
+    }
+
+
+def test_duplicates_across_chunks_with_a_missing_label(tmp_path):
+
+    # The second chunk has a missing label, so unpinned it would parse
+    # the target as float and miss the repeat of the first chunk's row
+    df = make_rows(10, seed=1)
+    repeat = df[df[TARGET] == 1].iloc[[0]]
+    unlabeled = df.iloc[[1]].assign(**{TARGET: np.nan, "age": 99})
+    df = pd.concat([df, repeat, unlabeled], ignore_index=True)
+    df[TARGET] = df[TARGET].astype("Int64")
+
+    path = tmp_path / "rows.csv"
+    df.to_csv(path, index=False)
+
+    stats = stream_validate(path, TARGET, chunksize=10)
+
+    assert stats["duplicate_rows"] == 1
+    assert stats["unique_rows"] == 11
+
+
+def test_integer_labels():
+
+    assert integer_labels(pd.Series([0.0, 1.0])).dtype == np.int64
+    assert integer_labels([1.0, 0.0]) == [1, 0]
+    assert integer_labels(pd.Series([0.0, np.nan])).dtype == np.float64
+    assert integer_labels(pd.Series([0.5, 1.0])).dtype == np.float64
+    assert integer_labels(["no", "yes"]) == ["no", "yes"]
+
+
+@pytest.mark.parametrize("chunksize", [7, 64, 10000])
+def test_streaming_matches_in_memory(tmp_path, chunksize):
+
+    df = make_rows(300, seed=2)
+    df.loc[::11, "chol"] = np.nan
+    df = pd.concat([df, df.iloc[:25]], ignore_index=True)
+
+    path = tmp_path / "heart.csv"
+    df.to_csv(path, index=False)
+
+    in_memory = DataValidationAgent(streaming=False, columnar_cache=False).run("heart", str(path))
+    streamed = DataValidationAgent(streaming=True, chunksize=chunksize).run("heart", str(path))
+
+    assert streamed["metadata"]["streaming"]["duplicate_rows"] == len(df) - len(in_memory["y"])
+    assert streamed["metadata"]["class_distribution"] == in_memory["metadata"]["class_distribution"]
+    pd.testing.assert_series_equal(
+        streamed["y"].reset_index(drop=True), in_memory["y"].reset_index(drop=True)
+    )
+    pd.testing.assert_frame_equal(
+        streamed["X"].reset_index(drop=True), in_memory["X"].reset_index(drop=True),
+        check_dtype=False, atol=1e-9
+    )
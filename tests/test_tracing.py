@@ -0,0 +1,85 @@
+# tests/test_tracing.py
+
+import contextvars
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.tracing import Tracer, span, submit_in_context, use_tracer
+
+
+def records(buffer):
+    return {record["name"]: record for record in map(json.loads, buffer.getvalue().splitlines())}
+
+
+def allocate(mb):
+    return np.ones(mb * 2**20 // 8)
+
+
+def test_nested_serial_spans_get_peaks():
+
+    buffer = io.StringIO()
+
+    with use_tracer(Tracer(buffer, memory=True)):
+        with span("run"):
+            with span("child"):
+                data = allocate(8)
+                del data
+
+    spans = records(buffer)
+    assert spans["child"]["traced_peak_mb"] >= 7.5
+    assert spans["run"]["traced_peak_mb"] >= spans["child"]["traced_peak_mb"]
+
+
+def test_child_in_thread_pool_is_not_concurrent():
+
+    buffer = io.StringIO()
+
+    def work():
+        with span("worker"):
+            data = allocate(4)
+            del data
+
+    with use_tracer(Tracer(buffer, memory=True)):
+        with span("run"), ThreadPoolExecutor(1) as pool:
+            submit_in_context(pool, work).result()
+
+    spans = records(buffer)
+    assert spans["worker"]["traced_peak_mb"] >= 3.5
+    assert spans["run"]["traced_peak_mb"] is not None
+
+
+def test_overlapping_spans_record_no_peak():
+
+    buffer = io.StringIO()
+    both_open = threading.Barrier(2)
+
+    def work(name):
+        with span(name):
+            both_open.wait()
+            data = allocate(4)
+            del data
+            both_open.wait()
+
+    with use_tracer(Tracer(buffer, memory=True)):
+        with span("run"):
+            threads = [
+                threading.Thread(target=contextvars.copy_context().run, args=(work, name))
+                for name in ("shap", "narration")
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        with span("report"):
+            pass
+
+    spans = records(buffer)
+    assert spans["shap"]["traced_peak_mb"] is None
+    assert spans["narration"]["traced_peak_mb"] is None
+    assert spans["run"]["traced_peak_mb"] is None
+    assert spans["report"]["traced_peak_mb"] is not None
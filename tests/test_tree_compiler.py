@@ -0,0 +1,128 @@
+# tests/test_tree_compiler.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from utils.tree_compiler import (
+    CompiledScorer,
+    compile_for_scoring,
+    compile_model,
+    verify_compiled
+)
+
+lgb = pytest.importorskip("lightgbm")
+
+
+def make_data(n_rows=600, missing=0.0, zeros=0.0, seed=0):
+
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(n_rows, 6))
+    y = pd.Series(
+        (values[:, 0] + values[:, 1] * values[:, 2] + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    )
+
+    values[rng.random(values.shape) < zeros] = 0.0
+    values[rng.random(values.shape) < missing] = np.nan
+
+    return pd.DataFrame(values, columns=[f"f{i}" for i in range(6)]), y
+
+
+def assert_parity(model, model_name, X):
+
+    compiled = compile_model(model, model_name)
+
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9)
+    assert verify_compiled(model, compiled, X) <= 1e-9
+
+
+def test_random_forest_parity():
+
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+
+    assert_parity(model, "Random Forest", X)
+
+
+def test_random_forest_parity_with_missing_values():
+
+    X, y = make_data(missing=0.15)
+    model = RandomForestClassifier(n_estimators=25, random_state=0).fit(X, y)
+
+    # Also rows with every feature missing
+    X_check = pd.concat([X, pd.DataFrame(np.nan, index=[-1, -2], columns=X.columns)])
+    assert_parity(model, "Random Forest", X_check)
+
+
+@pytest.mark.parametrize("params", [
+    {},                                          # NaN → learned default
+    {"use_missing": False},                      # NaN treated as 0
+    {"zero_as_missing": True}                    # 0 and NaN → default
+], ids=["nan", "none", "zero"])
+def test_lightgbm_parity_with_missing_values(params):
+
+    X, y = make_data(missing=0.15, zeros=0.1)
+    model = lgb.LGBMClassifier(
+        n_estimators=30, num_leaves=15, min_child_samples=5, verbose=-1, **params
+    ).fit(X, y)
+
+    X_check = pd.concat([X, pd.DataFrame(np.nan, index=[-1], columns=X.columns)])
+    assert_parity(model, "LightGBM", X_check)
+
+
+def test_logistic_regression_parity():
+
+    X, y = make_data()
+    model = LogisticRegression().fit(X, y)
+
+    assert_parity(model, "Logistic Regression", X)
+
+
+def test_single_row_and_array_input():
+
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    compiled = compile_model(model, "Random Forest")
+
+    row = X.iloc[[3]]
+    np.testing.assert_allclose(
+        compiled.predict_proba(row), model.predict_proba(row), rtol=0, atol=1e-9
+    )
+    np.testing.assert_allclose(
+        compiled.predict_proba(row.to_numpy()), model.predict_proba(row), rtol=0, atol=1e-9
+    )
+
+
+def test_compile_for_scoring_switches_on_batch_size():
+
+    X, y = make_data()
+    model = lgb.LGBMClassifier(n_estimators=20, verbose=-1).fit(X, y)
+
+    predictor, info = compile_for_scoring(model, "LightGBM", X, max_rows=16)
+
+    assert isinstance(predictor, CompiledScorer)
+    assert info["compiled"] and info["trees"] == 20
+
+    np.testing.assert_allclose(
+        predictor.predict_proba(X.iloc[:16]), model.predict_proba(X.iloc[:16]), rtol=0, atol=1e-9
+    )
+    np.testing.assert_array_equal(predictor.predict_proba(X), model.predict_proba(X))
+
+
+def test_unsupported_model_falls_back():
+
+    X, y = make_data()
+    model = LogisticRegression().fit(X, y)
+
+    with pytest.raises(ValueError):
+        compile_model(model, "SVM")
+
+    predictor, info = compile_for_scoring(model, "SVM", X)
+    assert predictor is model
+    assert not info["compiled"]
@@ -0,0 +1,156 @@
+# tests/test_update_agent.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from agents.prediction_agent import evaluate_model
+from agents.update_agent import IncrementalUpdateAgent
+from utils.preprocessing import ClinicalPreprocessor
+
+TARGET = "target"
+
+
+def make_rows(n_rows, seed, flip=False):
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "age": rng.normal(55, 10, n_rows).round(),
+        "bp": rng.normal(130, 15, n_rows).round(),
+        "chol": rng.normal(220, 30, n_rows).round(),
+        "smoker": rng.choice(["yes", "no"], n_rows)
+    })
+    score = (df["age"] - 55) / 10 + (df["bp"] - 130) / 15 + (df["smoker"] == "yes")
+    label = (score + rng.normal(scale=0.7, size=n_rows) > 0.5).astype(int)
+    df[TARGET] = 1 - label if flip else label
+
+    return df
+
+
+def prediction_output(model_name="Logistic Regression"):
+
+    df = make_rows(800, seed=0)
+    preprocessor = ClinicalPreprocessor(TARGET)
+    X, y = preprocessor.fit_transform(df)
+
+    X_train, X_test = X.iloc[:600], X.iloc[600:]
+    y_train, y_test = y.iloc[:600], y.iloc[600:]
+
+    if model_name == "LightGBM":
+        import lightgbm as lgb
+        model = lgb.LGBMClassifier(n_estimators=20, verbose=-1).fit(X_train, y_train)
+    else:
+        model = LogisticRegression().fit(X_train, y_train)
+
+    metrics, probs = evaluate_model(model, X_test, y_test)
+
+    return {
+        "disease": "heart",
+        "model": model,
+        "preprocessor": preprocessor,
+        "best_model": model_name,
+        "best_metrics": metrics,
+        "lr_metrics": metrics if model_name == "Logistic Regression" else None,
+        "rf_metrics": None,
+        "lgb_metrics": metrics if model_name == "LightGBM" else None,
+        "X_test": X_test,
+        "y_test": y_test,
+        "selected_probs": probs,
+        "stage_key": "parent",
+        "model_version": 1
+    }
+
+
+@pytest.mark.parametrize("model_name", ["Logistic Regression", "LightGBM"])
+def test_update_is_accepted_within_tolerance(model_name):
+
+    if model_name == "LightGBM":
+        pytest.importorskip("lightgbm")
+
+    parent = prediction_output(model_name)
+    X_test = parent["X_test"]
+    medians = parent["preprocessor"].medians_.copy()
+    scale = parent["preprocessor"].scaler_.scale_.copy()
+
+    agent = IncrementalUpdateAgent({"auc_tolerance": 1.0, "lightgbm_rounds": 10})
+    output = agent.run(parent, make_rows(300, seed=1))
+    update = output["update"]
+
+    assert update["accepted"]
+    assert update["parent_version"] == 1
+    assert update["new_rows"] == 300
+    assert update["update_rows"] + update["validation_rows"] == 300
+    # Rows behind the parent model (duplicates are dropped by the fit)
+    assert update["history_rows"] == parent["preprocessor"].scaler_.n_samples_seen_
+
+    # Candidate replaces the model; preprocessing and test split are kept
+    assert output["model"] is not parent["model"]
+    assert output["preprocessor"] is parent["preprocessor"]
+    np.testing.assert_array_equal(parent["preprocessor"].medians_, medians)
+    np.testing.assert_array_equal(parent["preprocessor"].scaler_.scale_, scale)
+    assert output["X_test"] is X_test
+
+    # Reported metrics are the candidate's on the original test split
+    expected, probs = evaluate_model(output["model"], X_test, parent["y_test"])
+    assert output["best_metrics"] == expected
+    np.testing.assert_array_equal(output["selected_probs"], probs)
+    assert output["stage_key"] != parent["stage_key"]
+
+    # The parent output itself is left untouched
+    assert parent["model"] is not output["model"]
+    assert "update" not in parent
+
+
+def test_update_is_rejected_on_auc_regression():
+
+    parent = prediction_output()
+
+    # A negative tolerance demands a gain no candidate can reach
+    agent = IncrementalUpdateAgent({"auc_tolerance": -1.0})
+    update = agent.run(parent, make_rows(300, seed=1))["update"]
+
+    assert not update["accepted"]
+    assert update["candidate_auc"] < update["incumbent_auc"] + 1.0
+
+
+def test_relabelled_rows_lower_the_incumbent_auc():
+
+    # Flipped labels: the current model ranks the holdout backwards
+    agent = IncrementalUpdateAgent()
+    update = agent.run(prediction_output(), make_rows(300, seed=2, flip=True))["update"]
+
+    assert update["incumbent_auc"] < 0.5
+
+
+def test_chained_updates_count_history_rows():
+
+    agent = IncrementalUpdateAgent({"auc_tolerance": 1.0})
+
+    first = agent.run(prediction_output(), make_rows(200, seed=1))
+    second = agent.run(first, make_rows(100, seed=3))
+
+    assert second["update"]["history_rows"] == (
+        first["update"]["history_rows"] + first["update"]["update_rows"]
+    )
+
+
+def test_unlabeled_rows_are_skipped():
+
+    rows = make_rows(300, seed=1)
+    rows.loc[rows.index[:40], TARGET] = np.nan
+
+    update = IncrementalUpdateAgent({"auc_tolerance": 1.0}).run(prediction_output(), rows)["update"]
+
+    assert update["new_rows"] == 260
+
+
+@pytest.mark.parametrize("rows, message", [
+    (make_rows(20, seed=1), "at least"),
+    (make_rows(300, seed=1).assign(target=1), "both classes"),
+    (make_rows(300, seed=1).drop(columns=[TARGET]), "not found")
+])
+def test_invalid_new_rows_are_refused(rows, message):
+
+    with pytest.raises(ValueError, match=message):
+        IncrementalUpdateAgent().run(prediction_output(), rows)
@@ -1,3 +1,18 @@
 """Utility functions for preprocessing and feature selection."""
 
-__all__ = ["preprocessing", "feature_selection"]
+__all__ = [
+    "preprocessing",
+    "feature_selection",
+    "model_registry",
+    "job_queue",
+    "model_search",
+    "out_of_core",
+    "risk",
+    "shap_engine",
+    "stage_cache",
+    "tracing",
+    "dataset_cache",
+    "streaming_ingest",
+    "training_executor",
+    "tree_compiler"
+]
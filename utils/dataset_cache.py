@@ -0,0 +1,97 @@
+# utils/dataset_cache.py
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.model_registry import dataset_fingerprint
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - optional dependency
+    feather = None
+
+
+def downcast_frame(df):
+
+    # Integers → smallest integer type; floats → float32 only when the
+    # round trip is exact, so downstream statistics do not change.
+    columns = {}
+
+    for col in df.columns:
+        series = df[col]
+
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            series = pd.to_numeric(series, downcast="integer")
+
+        elif pd.api.types.is_float_dtype(series):
+            values = series.to_numpy()
+            as_float32 = values.astype(np.float32)
+
+            if np.array_equal(as_float32.astype(values.dtype), values, equal_nan=True):
+                series = pd.Series(as_float32, index=series.index, name=col)
+
+        columns[col] = series
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+def cache_path_for(dataset_path, cache_dir, fingerprint, downcast=False):
+
+    # The absolute path hash keeps same-named files from different
+    # directories apart; downcast and as-read frames are cached separately.
+    stem = os.path.splitext(os.path.basename(dataset_path))[0]
+    location = hashlib.sha256(os.path.abspath(dataset_path).encode("utf-8")).hexdigest()[:8]
+    kind = "downcast" if downcast else "raw"
+    return os.path.join(cache_dir, f"{stem}-{location}-{kind}-{fingerprint[:16]}.arrow")
+
+
+def load_dataset(dataset_path, cache_dir="data/.cache", downcast=False):
+
+    # Falls back to plain CSV parsing when pyarrow is not installed.
+    # downcast: store integers / exactly representable floats in the
+    # smallest dtype (see downcast_frame); off by default.
+    if feather is None:
+        df = pd.read_csv(dataset_path)
+        return downcast_frame(df) if downcast else df
+
+    cache_path = cache_path_for(
+        dataset_path, cache_dir, dataset_fingerprint(dataset_path), downcast
+    )
+
+    # ======================================================
+    # First load: parse CSV once and write uncompressed Arrow IPC
+    # ======================================================
+    if not os.path.exists(cache_path):
+        os.makedirs(cache_dir, exist_ok=True)
+
+        df = pd.read_csv(dataset_path)
+        if downcast:
+            df = downcast_frame(df)
+
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cache_path)
+
+        # Drop caches (either kind) of older versions of the same file:
+        # same "<stem>-<location>-" prefix, another fingerprint
+        current = os.path.basename(cache_path)
+        prefix, _, version = current.rsplit("-", 2)
+        for name in os.listdir(cache_dir):
+            if (
+                name.startswith(f"{prefix}-")
+                and name.endswith(".arrow")
+                and name.count("-") == current.count("-")
+                and not name.endswith(f"-{version}")
+            ):
+                os.remove(os.path.join(cache_dir, name))
+
+    # ======================================================
+    # Memory-mapped read: numeric columns are read-only views on the
+    # mapped file, so concurrent runs share the page cache.
+    # ======================================================
+    table = feather.read_table(cache_path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
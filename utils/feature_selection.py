@@ -0,0 +1,175 @@
+# utils/feature_selection.py
+
+import numpy as np
+
+# Columns standardized per step while building Z
+STANDARDIZE_COLUMNS = 32
+
+# Rows per step when accumulating pairwise-complete moments
+MOMENT_ROWS = 16384
+
+
+def _pair_correlation(a, b):
+
+    # float64 Pearson over the rows where both columns are observed,
+    # like pandas' corr (NaN for < 2 rows or a constant column)
+    observed = ~(np.isnan(a) | np.isnan(b))
+    if observed.sum() < 2:
+        return np.nan
+
+    a = a[observed] - a[observed].mean()
+    b = b[observed] - b[observed].mean()
+
+    denominator = np.sqrt((a @ a) * (b @ b))
+    if denominator == 0:
+        return np.nan
+
+    return min(max((a @ b) / denominator, -1.0), 1.0)
+
+
+def _masked_correlations(Z, M, a_cols, b_cols):
+
+    # Pairwise-complete correlations of columns a_cols × b_cols from
+    # standardized values Z (NaN → 0) and the observed mask M. The six
+    # moments are accumulated in float64 over row blocks, so temporaries
+    # stay (MOMENT_ROWS × block) in size.
+    shape = (a_cols.stop - a_cols.start, b_cols.stop - b_cols.start)
+    n, sx, sy, sxx, syy, sxy = (np.zeros(shape) for _ in range(6))
+
+    for start in range(0, len(Z), MOMENT_ROWS):
+        rows = slice(start, start + MOMENT_ROWS)
+        za = Z[rows, a_cols].astype(np.float64)
+        zb = Z[rows, b_cols].astype(np.float64)
+        ma = M[rows, a_cols].astype(np.float64)
+        mb = M[rows, b_cols].astype(np.float64)
+
+        n += ma.T @ mb
+        sx += za.T @ mb
+        sy += ma.T @ zb
+        sxx += (za * za).T @ mb
+        syy += ma.T @ (zb * zb)
+        sxy += za.T @ zb
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+
+    corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+
+    return corr
+
+
+def correlated_columns(X, threshold=0.90, block_size=256, sample_rows=None,
+                       dtype=np.float32, random_state=42, tolerance=None):
+
+    # Same rule as the dense float64 version (X.corr() scanned over its
+    # upper triangle): a column is dropped when its |corr| with ANY
+    # earlier column exceeds the threshold. Correlations are computed
+    # block by block from standardized `dtype` data, so at most a
+    # (p × block_size) slice exists at any time instead of p × p.
+    # Pairs within `tolerance` of the threshold (default: 1e-4, wider
+    # when `dtype` rounding over many rows can exceed it) are recomputed
+    # in float64 before deciding, so rounding never flips a decision.
+    # Missing values use pairwise-complete rows, as pandas does; those
+    # correlations are all confirmed in float64 before a drop.
+    n_rows, n_cols = X.shape
+
+    # Fewer than 2 rows: every correlation is undefined
+    if n_rows < 2 or n_cols < 2:
+        return []
+
+    rows = slice(None)
+    if sample_rows is not None and n_rows > sample_rows:
+        rng = np.random.default_rng(random_state)
+        rows = np.sort(rng.choice(n_rows, sample_rows, replace=False))
+        n_rows = sample_rows
+
+    if tolerance is None:
+        tolerance = max(1e-4, 10 * np.finfo(dtype).eps * np.sqrt(n_rows))
+
+    # ======================================================
+    # Standardize once: Z.T @ Z is then the correlation matrix
+    # ======================================================
+    # Built a few columns at a time and standardized in place, so the
+    # only full-size arrays are Z itself (in `dtype`) and, with missing
+    # values, a bool mask, never a float64 copy of X.
+    Z = np.empty((n_rows, n_cols), dtype=dtype)
+    standardize_cols = min(block_size, STANDARDIZE_COLUMNS)
+
+    # With missing values Z holds per-column z-scores over observed rows
+    # (NaN → 0) and the per-pair normalization happens in
+    # _masked_correlations; otherwise Z is also divided by sqrt(n).
+    M = np.ones((n_rows, n_cols), dtype=bool) if X.isna().any().any() else None
+
+    for start in range(0, n_cols, standardize_cols):
+        end = min(start + standardize_cols, n_cols)
+        values = X.iloc[rows, start:end].to_numpy(dtype=np.float64, copy=True)
+
+        observed = ~np.isnan(values)
+        if M is not None:
+            M[:, start:end] = observed
+
+        with np.errstate(invalid="ignore"):
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0)
+
+        # Constant columns have undefined correlation (NaN in pandas),
+        # which never exceeds the threshold → zero them out.
+        constant = ~(std > 0)
+        std[constant] = 1.0
+
+        values -= mean
+        values /= std if M is not None else std * np.sqrt(n_rows)
+        values[:, constant] = 0
+        values[~observed] = 0
+        Z[:, start:end] = values
+
+    del values
+
+    # ======================================================
+    # Blocked upper-triangle scan
+    # ======================================================
+    drop = np.zeros(n_cols, dtype=bool)
+    loaded = {}
+
+    def values_of(i):
+        if i not in loaded:
+            loaded[i] = X.iloc[rows, i].to_numpy(dtype=np.float64)
+        return loaded[i]
+
+    for start in range(0, n_cols, block_size):
+        end = min(start + block_size, n_cols)
+
+        # Correlations of block columns [start, end) with columns [0, end)
+        if M is None:
+            corr_block = np.abs(Z[:, :end].T @ Z[:, start:end])
+        else:
+            corr_block = np.abs(np.vstack([
+                _masked_correlations(
+                    Z, M, slice(a, min(a + block_size, end)), slice(start, end)
+                )
+                for a in range(0, end, block_size)
+            ]))
+
+        # Pairwise-complete moments can cancel badly when a column is
+        # (near) constant on the shared rows: nothing is taken as certain
+        certain = threshold + tolerance if M is None else np.inf
+
+        earlier = np.arange(end)[:, None] < np.arange(start, end)[None, :]
+        above = (corr_block > certain) & earlier
+        near = (corr_block > threshold - tolerance) & earlier & ~above
+
+        drop[start:end] = above.any(axis=0)
+
+        # Borderline pairs decide in float64 (first confirmed one wins)
+        for j in np.flatnonzero(~drop[start:end] & near.any(axis=0)):
+            for i in np.flatnonzero(near[:, j]):
+                if abs(_pair_correlation(values_of(i), values_of(start + j))) > threshold:
+                    drop[start + j] = True
+                    break
+
+        loaded.clear()
+
+    return [column for column, flag in zip(X.columns, drop) if flag]
@@ -0,0 +1,222 @@
+# utils/job_queue.py
+#
+# Work queue on a plain directory tree, for any number of worker
+# processes on one machine or on several machines sharing the
+# directory (NFS). Every state change is a rename within one
+# filesystem, which is atomic, so exactly one worker wins each claim.
+#
+#   <root>/pending/<task>.json   waiting to be claimed
+#   <root>/running/<task>.json   claimed; its mtime is the lease heartbeat
+#   <root>/done/<task>.json      checkpoint: finished, never redone
+#   <root>/failed/<task>.json    gave up after max_attempts
+#
+# A worker that dies stops heartbeating; once its lease expires any
+# other worker moves the task back to pending. Tasks must therefore be
+# idempotent (write their outputs atomically).
+#
+# Leases compare file mtimes with the local clock: on NFS keep
+# lease_seconds well above the clock skew between machines.
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+STATES = ("pending", "running", "done", "failed")
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FileQueue:
+
+    def __init__(self, root, lease_seconds=300, max_attempts=3):
+        self.root = root
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _path(self, state, task_id):
+        return os.path.join(self.root, state, f"{task_id}.json")
+
+    def _write(self, path, record):
+
+        tmp_path = os.path.join(
+            self.root, "tmp", f"{os.path.basename(path)}.{default_worker_id()}.{threading.get_ident()}"
+        )
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, default=str)
+
+        os.replace(tmp_path, path)
+
+    def _read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def create(self):
+
+        for state in (*STATES, "tmp"):
+            os.makedirs(os.path.join(self.root, state), exist_ok=True)
+
+        return self
+
+    # ======================================================
+    # Producer
+    # ======================================================
+    def put(self, task_id, payload):
+
+        # No-op for a task that is already queued, running or finished
+        if any(os.path.exists(self._path(state, task_id)) for state in STATES):
+            return False
+
+        self._write(self._path("pending", task_id), {
+            "task_id": task_id,
+            "payload": payload,
+            "attempts": 0,
+            "errors": []
+        })
+        return True
+
+    # ======================================================
+    # Worker
+    # ======================================================
+    def claim(self, worker_id):
+
+        # Oldest pending task (by name), or None when nothing is left
+        self.requeue_expired()
+
+        for name in sorted(os.listdir(os.path.join(self.root, "pending"))):
+            task_id = name[:-len(".json")]
+            pending = self._path("pending", task_id)
+            running = self._path("running", task_id)
+
+            try:
+                # Fresh mtime before the move, so the lease never looks
+                # expired to other workers
+                os.utime(pending)
+                os.rename(pending, running)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+
+            record = self._read(running)
+            record["attempts"] += 1
+            record["worker_id"] = worker_id
+            record["claimed_at"] = datetime.now().isoformat(timespec="seconds")
+            self._write(running, record)
+
+            return record
+
+        return None
+
+    def heartbeat(self, task_id):
+
+        # False once the lease was lost (task requeued by another worker)
+        try:
+            os.utime(self._path("running", task_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def lease(self, task_id):
+
+        # Heartbeats from a background thread while the task runs. A C
+        # call that holds the GIL (e.g. SHAP on a whole shard) also holds
+        # back the heartbeat: lease_seconds must exceed the longest one.
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.heartbeat(task_id):
+                    return
+
+        thread = threading.Thread(target=beat, daemon=True, name=f"lease-{task_id}")
+        thread.start()
+
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, record, result):
+
+        # Checkpoint first, then drop the running entry
+        record = dict(record, result=result, finished_at=datetime.now().isoformat(timespec="seconds"))
+        self._write(self._path("done", record["task_id"]), record)
+        self._discard("running", record["task_id"])
+
+    def release(self, record, error):
+
+        # Failed attempt: back to pending, or to failed/ once out of attempts
+        record = dict(record, errors=[*record["errors"], error])
+        state = "failed" if record["attempts"] >= self.max_attempts else "pending"
+
+        self._write(self._path(state, record["task_id"]), record)
+        self._discard("running", record["task_id"])
+
+        return state
+
+    def _discard(self, state, task_id):
+        try:
+            os.remove(self._path(state, task_id))
+        except FileNotFoundError:
+            pass
+
+    def requeue_expired(self):
+
+        now = time.time()
+        requeued = []
+
+        for name in os.listdir(os.path.join(self.root, "running")):
+            task_id = name[:-len(".json")]
+            running = self._path("running", task_id)
+
+            try:
+                expired = now - os.path.getmtime(running) > self.lease_seconds
+            except FileNotFoundError:
+                continue
+
+            if not expired:
+                continue
+
+            if os.path.exists(self._path("done", task_id)):
+                # Finished, but the worker died before cleaning up
+                self._discard("running", task_id)
+                continue
+
+            try:
+                record = self._read(running)
+                target = "failed" if record["attempts"] >= self.max_attempts else "pending"
+                os.utime(running)
+                os.rename(running, self._path(target, task_id))
+            except FileNotFoundError:
+                continue  # another worker requeued it first
+
+            requeued.append(task_id)
+
+        return requeued
+
+    # ======================================================
+    # Status
+    # ======================================================
+    def tasks(self, state):
+
+        records = []
+
+        for name in sorted(os.listdir(os.path.join(self.root, state))):
+            try:
+                records.append(self._read(os.path.join(self.root, state, name)))
+            except FileNotFoundError:
+                continue
+
+        return records
+
+    def counts(self):
+        return {
+            state: len(os.listdir(os.path.join(self.root, state)))
+            for state in STATES
+        }
@@ -0,0 +1,236 @@
+# utils/model_registry.py
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from functools import lru_cache
+
+import joblib
+
+from config.disease_config import DISEASE_CONFIG
+from config.model_config import MODEL_CONFIG
+
+
+REGISTRY_FORMAT_VERSION = 3
+
+
+def dataset_fingerprint(dataset_path):
+
+    # Memoized on (path, size, mtime) so the registry and the dataset
+    # cache do not hash the same file twice in one process.
+    stat = os.stat(dataset_path)
+    return _hash_file(os.path.abspath(dataset_path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=64)
+def _hash_file(dataset_path, size, mtime_ns, chunk_size=1 << 20):
+
+    digest = hashlib.sha256()
+
+    with open(dataset_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def config_fingerprint(disease, options=None):
+
+    # options: run-level training switches that change the model
+    # (e.g. {"search": True}), on top of the static config.
+    payload = {
+        "format": REGISTRY_FORMAT_VERSION,
+        "disease": DISEASE_CONFIG[disease],
+        "models": MODEL_CONFIG,
+        "options": options or {}
+    }
+
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ModelRegistry:
+
+    def __init__(self, root="models"):
+        self.root = root
+
+    # ======================================================
+    # Paths & Versions
+    # ======================================================
+    def _disease_dir(self, disease):
+        return os.path.join(self.root, disease)
+
+    def versions(self, disease):
+
+        disease_dir = self._disease_dir(disease)
+
+        if not os.path.isdir(disease_dir):
+            return []
+
+        return sorted(
+            int(name[1:]) for name in os.listdir(disease_dir)
+            if name.startswith("v") and name[1:].isdigit()
+        )
+
+    def _version_dir(self, disease, version):
+        return os.path.join(self._disease_dir(disease), f"v{version:04d}")
+
+    def fingerprint(self, disease, dataset_path, options=None):
+        return {
+            "dataset": dataset_fingerprint(dataset_path),
+            "config": config_fingerprint(disease, options)
+        }
+
+    # ======================================================
+    # Save
+    # ======================================================
+    def save(self, disease, prediction_output, fingerprint):
+
+        version, version_dir = self._reserve_version(disease)
+
+        artifact = {
+            "model": prediction_output["model"],
+            "preprocessor": prediction_output["preprocessor"],
+            "X_test": prediction_output["X_test"],
+            "y_test": prediction_output["y_test"],
+            "selected_probs": prediction_output["selected_probs"]
+        }
+
+        metadata = {
+            "version": version,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "disease": disease,
+            "best_model": prediction_output["best_model"],
+            "best_metrics": prediction_output["best_metrics"],
+            "lr_metrics": prediction_output["lr_metrics"],
+            "rf_metrics": prediction_output["rf_metrics"],
+            "lgb_metrics": prediction_output["lgb_metrics"],
+            "feature_columns": list(prediction_output["X_test"].columns),
+            "val_metrics": prediction_output.get("val_metrics"),
+            "search_best_params": {
+                name: result["best_params"]
+                for name, result in (prediction_output.get("search_results") or {}).items()
+            },
+            "training_times": prediction_output.get("training_times"),
+            "stage_key": prediction_output.get("stage_key"),
+            # Incremental updates: accept / reject report and parent version
+            "update": prediction_output.get("update"),
+            "dataset_fingerprint": fingerprint["dataset"],
+            "config_fingerprint": fingerprint["config"]
+        }
+
+        # Write the model first so a metadata file always points at a
+        # complete artifact.
+        joblib.dump(artifact, os.path.join(version_dir, "model.joblib"))
+
+        tmp_path = os.path.join(version_dir, "metadata.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, default=float)
+        os.replace(tmp_path, os.path.join(version_dir, "metadata.json"))
+
+        return version
+
+    def _reserve_version(self, disease):
+
+        # Creating the version directory claims the number atomically;
+        # a concurrent save that took it first makes us try the next one.
+        os.makedirs(self._disease_dir(disease), exist_ok=True)
+
+        while True:
+            existing = self.versions(disease)
+            version = existing[-1] + 1 if existing else 1
+            version_dir = self._version_dir(disease, version)
+
+            try:
+                os.makedirs(version_dir, exist_ok=False)
+            except FileExistsError:
+                continue
+
+            return version, version_dir
+
+    def export(self, disease, version, root):
+
+        # Copy one version into another registry root (e.g. a batch job
+        # directory), so workers load exactly that model from there
+        target = ModelRegistry(root)
+        shutil.copytree(
+            self._version_dir(disease, version),
+            target._version_dir(disease, version),
+            dirs_exist_ok=True
+        )
+        return target
+
+    # ======================================================
+    # Load
+    # ======================================================
+    def read_metadata(self, disease, version):
+
+        path = os.path.join(self._version_dir(disease, version), "metadata.json")
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def find(self, disease, fingerprint):
+
+        # Newest matching version wins
+        for version in reversed(self.versions(disease)):
+            metadata = self.read_metadata(disease, version)
+
+            if metadata is None:
+                continue
+
+            if (
+                metadata["dataset_fingerprint"] == fingerprint["dataset"]
+                and metadata["config_fingerprint"] == fingerprint["config"]
+            ):
+                return version
+
+        return None
+
+    def load(self, disease, version=None):
+
+        if version is None:
+            # Newest complete version: a save may still be writing the last one
+            existing = [
+                v for v in self.versions(disease)
+                if self.read_metadata(disease, v) is not None
+            ]
+            if not existing:
+                raise FileNotFoundError(f"No registered model for disease: {disease}")
+            version = existing[-1]
+
+        metadata = self.read_metadata(disease, version)
+
+        if metadata is None:
+            raise FileNotFoundError(
+                f"Model version {version} for '{disease}' is incomplete"
+            )
+
+        artifact = joblib.load(
+            os.path.join(self._version_dir(disease, version), "model.joblib")
+        )
+
+        # Same shape as DiseasePredictionAgent output so downstream
+        # agents do not care where the model came from.
+        return {
+            "disease": disease,
+            "lr_metrics": metadata["lr_metrics"],
+            "rf_metrics": metadata["rf_metrics"],
+            "lgb_metrics": metadata["lgb_metrics"],
+            "best_model": metadata["best_model"],
+            "best_metrics": metadata["best_metrics"],
+            "model": artifact["model"],
+            "preprocessor": artifact["preprocessor"],
+            "X_test": artifact["X_test"][metadata["feature_columns"]],
+            "y_test": artifact["y_test"],
+            "selected_probs": artifact["selected_probs"],
+            "feature_columns": metadata["feature_columns"],
+            "stage_key": metadata.get("stage_key"),
+            "update": metadata.get("update"),
+            "model_version": version
+        }
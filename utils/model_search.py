@@ -0,0 +1,119 @@
+# utils/model_search.py
+
+import time
+
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler
+
+
+class SuccessiveHalvingSearch:
+
+    # Budgeted successive halving on a fixed validation split.
+    #
+    # n_candidates configurations are sampled from `space` and trained
+    # with `min_resource` (trees / boosting rounds). Each rung keeps the
+    # best 1/eta by validation AUC and multiplies the resource by eta,
+    # until one configuration is left, max_resource is reached or the
+    # wall-clock budget runs out. Behaves like an estimator so it can be
+    # handed to TrainingExecutor (set_params(n_jobs=...) / fit).
+
+    def __init__(self, estimator, space, resource_param="n_estimators",
+                 n_candidates=9, eta=3, min_resource=50, max_resource=800,
+                 budget_seconds=300, random_state=42, fit_params_fn=None):
+        self.estimator = estimator
+        self.space = space
+        self.resource_param = resource_param
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.budget_seconds = budget_seconds
+        self.random_state = random_state
+        # (X_val, y_val) → extra fit kwargs, e.g. LightGBM early stopping
+        self.fit_params_fn = fit_params_fn
+        self.n_jobs = None
+
+        self.best_estimator_ = None
+        self.best_params_ = None
+        self.best_score_ = None
+        self.history_ = []
+
+    def set_params(self, **params):
+
+        if "n_jobs" in params:
+            self.n_jobs = params.pop("n_jobs")
+        if params:
+            raise ValueError(f"Unsupported parameters: {sorted(params)}")
+
+        return self
+
+    def _fit_one(self, params, resource, X_train, y_train, X_val, y_val):
+
+        estimator = clone(self.estimator).set_params(
+            **params, **{self.resource_param: resource}
+        )
+        if self.n_jobs is not None:
+            estimator.set_params(n_jobs=self.n_jobs)
+
+        fit_params = self.fit_params_fn(X_val, y_val) if self.fit_params_fn else {}
+        estimator.fit(X_train, y_train, **fit_params)
+
+        score = roc_auc_score(y_val, estimator.predict_proba(X_val)[:, 1])
+        return estimator, score
+
+    def fit(self, X_train, y_train, X_val=None, y_val=None):
+
+        if X_val is None or y_val is None:
+            raise ValueError("SuccessiveHalvingSearch needs a validation split")
+
+        configs = list(ParameterSampler(
+            self.space, n_iter=self.n_candidates, random_state=self.random_state
+        ))
+
+        deadline = time.perf_counter() + self.budget_seconds
+        survivors = list(range(len(configs)))
+        resource = self.min_resource
+        best = None
+        self.history_ = []
+
+        while True:
+            rung = []
+
+            for i in survivors:
+                # Out of budget: finish with what this rung has so far
+                if rung and time.perf_counter() > deadline:
+                    break
+
+                start = time.perf_counter()
+                estimator, score = self._fit_one(
+                    configs[i], resource, X_train, y_train, X_val, y_val
+                )
+
+                rung.append((score, i, estimator))
+                self.history_.append({
+                    "params": configs[i],
+                    "resource": resource,
+                    "val_auc": round(float(score), 4),
+                    "seconds": round(time.perf_counter() - start, 4)
+                })
+
+            rung.sort(key=lambda item: -item[0])
+
+            # Later rungs use more resource, so their winner replaces
+            # the previous best even when its score is lower.
+            best = rung[0]
+
+            out_of_time = time.perf_counter() > deadline
+            if len(rung) <= 1 or resource >= self.max_resource or out_of_time:
+                break
+
+            survivors = [i for _, i, _ in rung[:max(1, len(rung) // self.eta)]]
+            resource = min(resource * self.eta, self.max_resource)
+
+        score, index, estimator = best
+        self.best_estimator_ = estimator
+        self.best_params_ = {**configs[index], self.resource_param: resource}
+        self.best_score_ = float(score)
+
+        return self
@@ -0,0 +1,238 @@
+# utils/out_of_core.py
+#
+# Building blocks for training LightGBM on datasets larger than RAM:
+# the CSV is transformed chunk by chunk into a float32 .npy memmap,
+# LightGBM bins it through a Sequence (one batch in memory at a time)
+# and the binned Dataset is saved in LightGBM's binary format, so
+# later runs skip the CSV entirely. Splits are row-index subsets of
+# that one Dataset, never copied frames.
+
+import json
+import os
+import shutil
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from utils.streaming_ingest import StreamingValidator
+
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+DATASET_FILE = "dataset.bin"
+PREPROCESSOR_FILE = "preprocessor.joblib"
+META_FILE = "meta.json"
+
+
+def reservoir_rows(dataset_path, n_rows, chunksize=100000, dtypes=None, random_state=42,
+                   target_column=None, min_class_rows=100):
+
+    # Uniform sample of whole rows (bottom-k random keys), in one pass
+    # with at most n_rows + chunksize rows in memory. With target_column,
+    # each class also keeps its min_class_rows lowest-key rows, and those
+    # not already sampled are appended: a rare class cannot drop out of
+    # the sample (at most n_rows + min_class_rows per class rows).
+    rng = np.random.default_rng(random_state)
+    sample, keys, total_rows = None, np.empty(0), 0
+    by_class = {}
+
+    for chunk in pd.read_csv(dataset_path, chunksize=chunksize, dtype=dtypes):
+        total_rows += len(chunk)
+        chunk_keys = rng.random(len(chunk))
+
+        sample, keys = _bottom_k(sample, keys, chunk, chunk_keys, n_rows)
+
+        if target_column is None:
+            continue
+
+        target = chunk[target_column]
+        for label in target.dropna().unique():
+            mask = (target == label).to_numpy()
+            class_rows, class_keys = by_class.get(label, (None, np.empty(0)))
+            by_class[label] = _bottom_k(
+                class_rows, class_keys, chunk[mask], chunk_keys[mask], min_class_rows
+            )
+
+    if sample is None:
+        raise ValueError("Dataset is empty")
+
+    # Keys identify rows: a class row with a key in the uniform sample
+    # is already in it
+    extra = [
+        class_rows[~np.isin(class_keys, keys)]
+        for class_rows, class_keys in by_class.values()
+    ]
+    if any(len(rows) for rows in extra):
+        sample = pd.concat([sample, *extra], ignore_index=True)
+
+    return sample, total_rows
+
+
+def _bottom_k(sample, keys, chunk, chunk_keys, k):
+
+    pool = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+    pool_keys = np.concatenate([keys, chunk_keys])
+
+    if len(pool_keys) > k:
+        keep = np.sort(np.argpartition(pool_keys, k)[:k])
+        pool, pool_keys = pool.iloc[keep].reset_index(drop=True), pool_keys[keep]
+
+    return pool, pool_keys
+
+
+class MemmapSequence(lgb.Sequence):
+
+    # LightGBM reads rows in batches of batch_size (and random rows for
+    # bin boundaries); it only accepts float64 batches.
+
+    def __init__(self, features, batch_size=65536):
+        self.features = features
+        self.batch_size = batch_size
+
+    def __getitem__(self, index):
+        return np.asarray(self.features[index], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.features)
+
+
+class BoosterClassifier:
+
+    # predict_proba / classes_ around a booster trained with lgb.train,
+    # so the registry, SHAP, scoring and reports treat it like an
+    # LGBMClassifier.
+
+    def __init__(self, booster, classes, params=None):
+        self.booster_ = booster
+        self.classes_ = np.asarray(classes)
+        # Training parameters (without the round count) for continued
+        # boosting in IncrementalUpdateAgent
+        self.params = dict(params or {})
+        self.best_iteration_ = booster.best_iteration or None
+        self.feature_names_in_ = np.asarray(booster.feature_name())
+        self.n_features_in_ = booster.num_feature()
+
+    def predict_proba(self, X):
+
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy(dtype=np.float64)
+
+        positive = self.booster_.predict(X, num_iteration=self.best_iteration_)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] >= 0.5).astype(int)]
+
+
+def write_feature_store(dataset_path, store_dir, preprocessor, classes, total_rows,
+                        chunksize=100000, dtypes=None):
+
+    # Second pass: validate (duplicates, missing values, classes) and
+    # transform every unique labeled row into features.npy (float32
+    # memmap). Rows without a target are skipped; a target outside
+    # `classes` (the fit sample's) is an error, not a negative label.
+    target_column = preprocessor.target_column
+    n_features = len(preprocessor.feature_names_)
+
+    features = np.lib.format.open_memmap(
+        os.path.join(store_dir, FEATURES_FILE),
+        mode="w+", dtype=np.float32, shape=(total_rows, n_features)
+    )
+    labels = np.empty(total_rows, dtype=np.int8)
+
+    validator = StreamingValidator(target_column)
+    n_rows = 0
+
+    for chunk in pd.read_csv(dataset_path, chunksize=chunksize, dtype=dtypes):
+        duplicate = validator.update(chunk)
+        target = chunk[target_column]
+        unique_rows = chunk[~duplicate & target.notna().to_numpy()]
+        target = unique_rows[target_column]
+
+        unknown = ~target.isin(classes)
+        if unknown.any():
+            raise ValueError(
+                f"Target values outside the classes {classes}: "
+                f"{sorted(target[unknown].unique().tolist(), key=str)[:5]}"
+            )
+
+        end = n_rows + len(unique_rows)
+        features[n_rows:end] = preprocessor.transform(unique_rows, as_array=True)
+        labels[n_rows:end] = target.to_numpy() == classes[1]
+        n_rows = end
+
+    features.flush()
+    del features
+
+    np.save(os.path.join(store_dir, LABELS_FILE), labels[:n_rows])
+
+    return n_rows, validator.result()
+
+
+def open_feature_store(store_dir):
+
+    # Memory-mapped features (only unique rows) and in-memory labels
+    with open(os.path.join(store_dir, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    features = np.load(os.path.join(store_dir, FEATURES_FILE), mmap_mode="r")
+    labels = np.load(os.path.join(store_dir, LABELS_FILE))
+
+    return features[:meta["rows"]], labels, meta
+
+
+def build_dataset(store_dir, feature_names, params):
+
+    # Binned once from the memmap, then reloaded from dataset.bin
+    dataset_path = os.path.join(store_dir, DATASET_FILE)
+
+    if os.path.exists(dataset_path):
+        return lgb.Dataset(dataset_path, params=params).construct(), True
+
+    features, labels, _ = open_feature_store(store_dir)
+
+    dataset = lgb.Dataset(
+        [MemmapSequence(features)],
+        label=labels,
+        feature_name=feature_names,
+        params=params,
+        free_raw_data=True
+    ).construct()
+
+    tmp_path = f"{dataset_path}.{os.getpid()}.tmp"
+    dataset.save_binary(tmp_path)
+    os.replace(tmp_path, dataset_path)
+
+    return dataset, False
+
+
+def predict_rows(model, features, rows, chunk_rows=262144):
+
+    # Chunked predictions for (sorted) row indices of the memmap
+    return np.concatenate([
+        model.predict_proba(features[rows[start:start + chunk_rows]])[:, 1]
+        for start in range(0, len(rows), chunk_rows)
+    ]) if len(rows) else np.empty(0)
+
+
+def save_store_metadata(store_dir, preprocessor, meta):
+
+    joblib.dump(preprocessor, os.path.join(store_dir, PREPROCESSOR_FILE))
+
+    with open(os.path.join(store_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, default=str)
+
+
+def load_store_preprocessor(store_dir):
+    return joblib.load(os.path.join(store_dir, PREPROCESSOR_FILE))
+
+
+def publish_store(tmp_dir, store_dir):
+
+    # A store directory only ever appears complete
+    if os.path.exists(store_dir):
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    os.replace(tmp_dir, store_dir)
@@ -1,33 +1,372 @@
 # utils/preprocessing.py
 
+import joblib
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 
 
-def preprocess_data(df, target_column):
+def duplicated_rows(df):
+
+    # Same mask as df.duplicated(), without factorizing every column:
+    # rows are hashed first and only rows whose hash repeats are
+    # compared exactly.
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    candidates = pd.Series(hashes).duplicated(keep=False).to_numpy()
+
+    duplicated = np.zeros(len(df), dtype=bool)
+    if candidates.any():
+        duplicated[candidates] = df[candidates].duplicated().to_numpy()
+
+    return duplicated
+
+
+class ClinicalPreprocessor:
+
+    """Fit-once / transform-many version of the ingest + feature pipeline.
+
+    ``fit_transform`` learns median imputation, one-hot categories and
+    scaling from the training frame, ``fit_engineering`` records the
+    squared / interaction columns and ``set_dropped_columns`` the
+    correlation drops. ``transform`` then replays all of it on raw
+    patient rows and returns the exact training column layout.
+
+    ``low_memory=True`` keeps numeric features as float32 instead of
+    float64 (one-hot columns are 1-byte bools either way).
+    """
+
+    SCALER_BLOCK_ROWS = 65536
+
+    def __init__(self, target_column, low_memory=False):
+        self.target_column = target_column
+        self.low_memory = low_memory
+
+        self.input_columns_ = None
+        self.numeric_columns_ = None
+        self.categorical_columns_ = None
+        self.categories_ = None
+        self.medians_ = None
+        self.scaler_ = None
+        self.ingest_columns_ = None
+
+        self.squared_columns_ = []
+        self.interaction_columns_ = None
+        self.dropped_columns_ = []
+        self.feature_names_ = None
+
+    # ======================================================
+    # 1️⃣ Ingest (impute / encode / scale)
+    # ======================================================
+    @property
+    def dtype_(self):
+        return np.float32 if getattr(self, "low_memory", False) else np.float64
+
+    def fit_transform(self, df):
+
+        if self.target_column not in df.columns:
+            raise ValueError(f"Target column '{self.target_column}' not found")
+
+        # Remove duplicates (only copies when there are any)
+        duplicated = duplicated_rows(df)
+        if duplicated.any():
+            df = df[~duplicated]
+
+        # Features are read by column name, so the target never needs
+        # to be dropped into a second frame.
+        X = df
+        y = df[self.target_column]
+
+        self._detect_columns(df)
+
+        # Fill values & categories (get_dummies sorts categories and
+        # drop_first removes the first one)
+        self.medians_ = X[self.numeric_columns_].median().to_numpy(dtype=np.float64)
+
+        self.categories_ = {
+            col: sorted(X[col].fillna("Unknown").unique(), key=str)
+            for col in self.categorical_columns_
+        }
+
+        numeric = self._impute(X)
+
+        # Scale numeric
+        self.scaler_ = StandardScaler()
+        self.scaler_.fit(numeric)
+
+        X_out = self._ingest(X, numeric)
+        self.ingest_columns_ = list(X_out.columns)
+        self.feature_names_ = list(self.ingest_columns_)
+
+        return X_out, y
+
+    def fit_transform_chunks(self, chunks):
+
+        # fit_transform over an iterable of frames that are already free
+        # of duplicates (e.g. a chunked CSV filtered by StreamingValidator):
+        # same statistics and output as fit_transform on their
+        # concatenation (up to float rounding of the scaler moments),
+        # without ever holding the raw rows together. Per
+        # chunk only the numeric values (output dtype) and int32 category
+        # codes are kept; medians, scaling and one-hot columns are then
+        # computed once on the assembled output.
+        numeric_parts, code_parts, passthrough_parts, targets = [], [], [], []
+        lookups = None
+
+        for chunk in chunks:
+            if lookups is None:
+                if self.target_column not in chunk.columns:
+                    raise ValueError(f"Target column '{self.target_column}' not found")
+
+                self._detect_columns(chunk)
+                lookups = {col: {} for col in self.categorical_columns_}
+
+            numeric_parts.append(self._numeric_values(chunk))
+            targets.append(chunk[self.target_column])
+
+            # Codes into a per-column lookup, in first-seen order
+            codes = np.empty((len(chunk), len(self.categorical_columns_)), dtype=np.int32)
+            for j, col in enumerate(self.categorical_columns_):
+                chunk_codes, uniques = pd.factorize(chunk[col].fillna("Unknown"))
+                lookup = lookups[col]
+                ids = np.array([lookup.setdefault(value, len(lookup)) for value in uniques], dtype=np.int32)
+                codes[:, j] = ids[chunk_codes] if len(ids) else 0
+            code_parts.append(codes)
+
+            passthrough = self._passthrough_columns()
+            if passthrough:
+                passthrough_parts.append(chunk[passthrough])
+
+        if lookups is None:
+            raise ValueError("Dataset is empty")
+
+        y = pd.concat(targets)
+
+        # Parts are released as they are copied in, so the peak stays
+        # near one output-sized array
+        numeric = np.empty((len(y), len(self.numeric_columns_)), dtype=self.dtype_)
+        codes = np.empty((len(y), len(self.categorical_columns_)), dtype=np.int32)
+        offset = 0
+        while numeric_parts:
+            part, part_codes = numeric_parts.pop(0), code_parts.pop(0)
+            numeric[offset:offset + len(part)] = part
+            codes[offset:offset + len(part)] = part_codes
+            offset += len(part)
+
+        # Exact medians, one column at a time
+        self.medians_ = np.array(
+            [pd.Series(numeric[:, j], copy=False).median() for j in range(numeric.shape[1])],
+            dtype=np.float64
+        )
+
+        # Sorted categories; codes renumbered to their sorted position
+        self.categories_ = {}
+        for j, col in enumerate(self.categorical_columns_):
+            lookup = lookups[col]
+            self.categories_[col] = sorted(lookup, key=str)
+
+            position = np.empty(len(lookup), dtype=np.int32)
+            position[[lookup[value] for value in self.categories_[col]]] = np.arange(len(lookup))
+            codes[:, j] = position[codes[:, j]]
+
+        self._fill_missing(numeric)
+
+        # Running moments over row blocks: fit() would make a full-size
+        # centered copy
+        self.scaler_ = StandardScaler()
+        for start in range(0, len(numeric), self.SCALER_BLOCK_ROWS):
+            self.scaler_.partial_fit(numeric[start:start + self.SCALER_BLOCK_ROWS])
+
+        X_out = self._assemble(
+            numeric,
+            self._one_hot(codes[:, j] for j in range(codes.shape[1])),
+            pd.concat(passthrough_parts) if passthrough_parts else None,
+            y.index
+        )
+        self.ingest_columns_ = list(X_out.columns)
+        self.feature_names_ = list(self.ingest_columns_)
+
+        return X_out, y
+
+    def _detect_columns(self, df):
+
+        self.input_columns_ = [col for col in df.columns if col != self.target_column]
+        features = df[self.input_columns_].dtypes
+        self.numeric_columns_ = [
+            col for col, dtype in features.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        ]
+        self.categorical_columns_ = [
+            col for col, dtype in features.items()
+            if not pd.api.types.is_numeric_dtype(dtype)
+        ]
 
-    # Remove duplicates
-    df = df.drop_duplicates()
+    def _passthrough_columns(self):
 
-    if target_column not in df.columns:
-        raise ValueError(f"Target column '{target_column}' not found")
+        # get_dummies keeps non-encoded columns in their original order
+        encoded = set(self.numeric_columns_) | set(self.categorical_columns_)
+        return [col for col in self.input_columns_ if col not in encoded]
 
-    X = df.drop(columns=[target_column])
-    y = df[target_column]
+    def _numeric_values(self, X):
 
-    # Detect types
-    numeric_cols = X.select_dtypes(include=["int64", "float64"]).columns
-    categorical_cols = X.select_dtypes(include=["object"]).columns
+        numeric = X[self.numeric_columns_]
 
-    # Fill missing values
-    X[numeric_cols] = X[numeric_cols].fillna(X[numeric_cols].median())
-    X[categorical_cols] = X[categorical_cols].fillna("Unknown")
+        # Patient rows may arrive as strings / objects; training columns
+        # are already numeric and are not converted column by column.
+        needs_coercion = [
+            col for col, dtype in numeric.dtypes.items()
+            if not pd.api.types.is_numeric_dtype(dtype)
+        ]
+        if needs_coercion:
+            numeric = numeric.apply(pd.to_numeric, errors="coerce")
 
-    # Encode categoricals
-    X = pd.get_dummies(X, drop_first=True)
+        # Own copy (never a view of the caller's frame)
+        return numeric.to_numpy(dtype=self.dtype_, na_value=np.nan, copy=True)
 
-    # Scale numeric
-    scaler = StandardScaler()
-    X[numeric_cols] = scaler.fit_transform(X[numeric_cols])
+    def _fill_missing(self, numeric):
+
+        missing = np.isnan(numeric)
+        if missing.any():
+            np.copyto(numeric, np.broadcast_to(self.medians_.astype(self.dtype_), numeric.shape), where=missing)
+
+        return numeric
+
+    def _impute(self, X):
+        return self._fill_missing(self._numeric_values(X))
+
+    def _ingest(self, X, numeric):
+
+        passthrough = self._passthrough_columns()
+
+        return self._assemble(
+            numeric,
+            self._one_hot(
+                pd.Index(self.categories_[col]).get_indexer(X[col].fillna("Unknown"))
+                for col in self.categorical_columns_
+            ),
+            X[passthrough] if passthrough else None,
+            X.index
+        )
+
+    def _one_hot(self, codes_by_column):
+
+        # One-hot from category codes (one array per categorical column,
+        # unseen categories → -1 → all zeros), written into a single
+        # preallocated bool block
+        dummies = None
+        offset = 0
+
+        for col, codes in zip(self.categorical_columns_, codes_by_column):
+            if dummies is None:
+                dummies = np.zeros((len(codes), len(self._dummy_names())), dtype=bool)
+
+            for i in range(1, len(self.categories_[col])):
+                dummies[:, offset] = codes == i
+                offset += 1
+
+        return dummies
+
+    def _dummy_names(self):
+        return [
+            f"{col}_{category}"
+            for col in self.categorical_columns_
+            for category in self.categories_[col][1:]
+        ]
+
+    def _assemble(self, numeric, dummies, passthrough, index):
+
+        # numeric is a private imputed array: scale it in place
+        scaled = self.scaler_.transform(numeric, copy=False) if numeric.shape[1] else numeric
+        scaled = scaled.astype(self.dtype_, copy=False)
+
+        # Scaled numerics stay one 2-D block (no per-column copies)
+        blocks = [pd.DataFrame(scaled, columns=self.numeric_columns_, index=index, copy=False)]
+
+        if passthrough is not None:
+            blocks.append(passthrough)
+
+        dummy_names = self._dummy_names()
+        if dummy_names:
+            blocks.append(pd.DataFrame(dummies, columns=dummy_names, index=index, copy=False))
+
+        X_out = pd.concat(blocks, axis=1) if len(blocks) > 1 else blocks[0]
+
+        if passthrough is not None:
+            X_out = X_out[[c for c in self.input_columns_ if c not in set(self.categorical_columns_)] + dummy_names]
+
+        return X_out
+
+    # ======================================================
+    # 2️⃣ Feature Engineering (learned by FeatureSelectionAgent)
+    # ======================================================
+    def fit_engineering(self, X):
+
+        numeric_cols = X.select_dtypes(include=["float64", "float32", "int64"]).columns.tolist()
+
+        # Squared terms (first 3 numeric columns) + one interaction term
+        self.squared_columns_ = numeric_cols[:3]
+        self.interaction_columns_ = (
+            tuple(numeric_cols[:2]) if len(numeric_cols) >= 2 else None
+        )
+
+        X_engineered = self._engineer(X)
+        self.feature_names_ = list(X_engineered.columns)
+
+        return X_engineered
+
+    def _engineer(self, X):
+
+        engineered = {
+            f"{col}_squared": X[col].to_numpy() ** 2
+            for col in self.squared_columns_
+        }
+
+        if self.interaction_columns_ is not None:
+            first, second = self.interaction_columns_
+            engineered["interaction_1"] = X[first].to_numpy() * X[second].to_numpy()
+
+        if not engineered:
+            return X
+
+        return pd.concat([X, pd.DataFrame(engineered, index=X.index)], axis=1)
+
+    def set_dropped_columns(self, columns):
+
+        self.dropped_columns_ = list(columns)
+
+        dropped = set(self.dropped_columns_)
+        self.feature_names_ = [col for col in self.feature_names_ if col not in dropped]
+
+    # ======================================================
+    # 3️⃣ Transform (raw patient rows → model-ready)
+    # ======================================================
+    def transform(self, df, as_array=False):
+
+        if self.scaler_ is None:
+            raise ValueError("ClinicalPreprocessor must be fitted before transform")
+
+        # Missing raw columns become NaN and are imputed; extras are ignored
+        X = df.reindex(columns=self.input_columns_)
+
+        X_out = self._engineer(self._ingest(X, self._impute(X)))
+        X_out = X_out[self.feature_names_]
+
+        if as_array:
+            return X_out.to_numpy(dtype=self.dtype_)
+
+        return X_out
+
+    # ======================================================
+    # Persistence
+    # ======================================================
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+def preprocess_data(df, target_column):
 
-    return X, y
+    preprocessor = ClinicalPreprocessor(target_column)
+    return preprocessor.fit_transform(df)
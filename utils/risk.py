@@ -0,0 +1,27 @@
+# utils/risk.py
+
+import numpy as np
+
+
+# Lower bound (inclusive) of each risk band, highest first
+RISK_BANDS = [
+    (0.7, "High Risk"),
+    (0.4, "Moderate Risk")
+]
+
+DEFAULT_RISK = "Low Risk"
+
+
+def risk_levels(probabilities):
+
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+
+    return np.select(
+        [probabilities >= bound for bound, _ in RISK_BANDS],
+        [label for _, label in RISK_BANDS],
+        default=DEFAULT_RISK
+    )
+
+
+def risk_level(probability):
+    return str(risk_levels([probability])[0])
@@ -0,0 +1,302 @@
+# utils/shap_engine.py
+
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sklearn.utils import shuffle
+
+from config.model_config import MODEL_CONFIG
+from utils.training_executor import resolve_core_budget
+
+TREE_MODELS = ("LightGBM", "Random Forest")
+LINEAR_MODELS = ("Logistic Regression",)
+
+
+def positive_class_values(shap_values):
+
+    # shap returns a list per class, a (n, p, classes) array or (n, p)
+    if isinstance(shap_values, list):
+        shap_values = shap_values[1]
+
+    shap_values = np.asarray(shap_values)
+
+    if shap_values.ndim == 3:
+        shap_values = shap_values[:, :, 1]
+
+    return shap_values
+
+
+def positive_class_expected_value(expected_value):
+
+    expected_value = np.atleast_1d(np.asarray(expected_value, dtype=np.float64))
+    return float(expected_value[-1])
+
+
+def sample_background(X, max_samples=100, random_state=0):
+
+    # Same subsample shap.utils.sample / maskers.Independent draw
+    if len(X) <= max_samples:
+        return X
+    return shuffle(X, n_samples=max_samples, random_state=random_state)
+
+
+def top_contributions(shap_matrix, feature_names, k=5):
+
+    # Per patient: the k features with the largest |SHAP|, strongest
+    # first. argpartition keeps this O(p) per row instead of a full sort.
+    shap_matrix = np.atleast_2d(shap_matrix)
+    k = min(k, shap_matrix.shape[1])
+
+    magnitude = np.abs(shap_matrix)
+    top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+
+    return [
+        [
+            {"feature": feature_names[j], "shap_value": round(float(row[j]), 4)}
+            for j in indices
+        ]
+        for row, indices in zip(shap_matrix, top)
+    ]
+
+
+# ======================================================
+# Process-pool workers (the shap tree C extension holds the GIL,
+# so Random Forest chunks need processes rather than threads). Each
+# engine keeps one pool; the explainer is sent once per worker.
+# ======================================================
+_worker_explainer = None
+
+
+def _init_worker(explainer):
+    global _worker_explainer
+    _worker_explainer = explainer
+
+
+def _explain_chunk_in_worker(X_chunk):
+    return positive_class_values(
+        _worker_explainer.shap_values(X_chunk, check_additivity=False)
+    ).astype(np.float32)
+
+
+class ShapEngine:
+
+    # Builds the explainer once per (model, mode) and explains whole
+    # cohorts into a dense (patients × features) float32 matrix.
+    #
+    # mode="tree_path_dependent": TreeExplainer on the model's own
+    #     node statistics (what ExplainabilityAgent has always used)
+    # mode="interventional": TreeExplainer against a sampled
+    #     background set of `background_size` rows
+    #
+    # Linear models never touch shap: with independent features the
+    # attributions are coef * (x - mean), where mean is taken over the
+    # same ≤100-row background LinearExplainer(model, X_test) would use.
+    #
+    # n_jobs: worker processes for Random Forest cohorts, i.e. the cores
+    # the caller reserved. The pool starts on the first cohort that needs
+    # it and lives until close(); all engines' pools together stay within
+    # the training core budget (see _make_room).
+
+    def __init__(self, model, model_name, background, mode="tree_path_dependent",
+                 background_size=100, n_jobs=1, chunk_size=256, random_state=0):
+
+        if model_name not in TREE_MODELS + LINEAR_MODELS:
+            raise ValueError(f"Unsupported model type: {model_name}")
+
+        if mode not in ("tree_path_dependent", "interventional"):
+            raise ValueError(f"Unsupported SHAP mode: {mode}")
+
+        self.model_name = model_name
+        self.mode = mode
+        self.n_jobs = resolve_core_budget(n_jobs)
+        self.chunk_size = chunk_size
+        self.feature_names = list(background.columns)
+        self._pool = None
+        self._active = 0
+        self._closing = False
+
+        if model_name in LINEAR_MODELS:
+            self.explainer = None
+            self.mean = (
+                sample_background(background)
+                .to_numpy(dtype=np.float64)
+                .mean(axis=0)
+            )
+            self.coef = np.ravel(model.coef_[-1]).astype(np.float64)
+            self.expected_value = float(
+                self.coef @ self.mean + np.ravel(model.intercept_)[-1]
+            )
+            return
+
+        import shap
+
+        # LightGBM is explained through its Booster (same values as the
+        # LGBMClassifier), so boosters trained with lgb.train work too
+        if model_name == "LightGBM":
+            model = model.booster_
+
+        if mode == "interventional":
+            data = sample_background(background, background_size, random_state)
+            self.explainer = shap.TreeExplainer(
+                model, data=data, feature_perturbation="interventional"
+            )
+        else:
+            self.explainer = shap.TreeExplainer(model)
+
+        self.expected_value = positive_class_expected_value(self.explainer.expected_value)
+
+    def _explain_chunk(self, X_chunk):
+
+        if self.explainer is None:
+            values = (X_chunk.to_numpy(dtype=np.float64) - self.mean) * self.coef
+            return values.astype(np.float32)
+
+        values = self.explainer.shap_values(X_chunk, check_additivity=False)
+        return positive_class_values(values).astype(np.float32)
+
+    def explain(self, X):
+
+        X = X[self.feature_names]
+        n_rows = len(X)
+
+        # LightGBM computes contributions in its own multi-threaded C++
+        # code and linear models are one matrix product: no chunking.
+        if (
+            self.model_name != "Random Forest"
+            or self.n_jobs == 1
+            or n_rows <= self.chunk_size
+        ):
+            return self._explain_chunk(X)
+
+        chunks = [
+            X.iloc[start:start + self.chunk_size]
+            for start in range(0, n_rows, self.chunk_size)
+        ]
+
+        with self._workers() as pool:
+            return np.vstack(list(pool.map(_explain_chunk_in_worker, chunks)))
+
+    @contextmanager
+    def _workers(self):
+
+        # spawn: the engine may be called while other threads run
+        # (narration, scoring requests), which a fork could deadlock.
+        # A pool in use is never shut down by another engine or close().
+        with _POOLS_LOCK:
+            if self._pool is None:
+                _make_room(self.n_jobs)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.n_jobs,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.explainer,)
+                )
+            _POOLS[self] = self.n_jobs
+            _POOLS.move_to_end(self)
+            self._closing = False
+            self._active += 1
+            pool = self._pool
+
+        try:
+            yield pool
+        finally:
+            with _POOLS_LOCK:
+                self._active -= 1
+                if self._closing and not self._active:
+                    self._shutdown_pool()
+
+    def close(self):
+
+        with _POOLS_LOCK:
+            if self._active:
+                self._closing = True
+            else:
+                self._shutdown_pool()
+
+    def _shutdown_pool(self):
+
+        # Caller holds _POOLS_LOCK
+        _POOLS.pop(self, None)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+# ======================================================
+# Worker processes of all engines together stay within the training
+# core budget: idle pools of the least recently used engines go first
+# ======================================================
+_POOLS = OrderedDict()
+_POOLS_LOCK = threading.Lock()
+
+
+def _make_room(workers):
+
+    limit = resolve_core_budget(MODEL_CONFIG["training"]["n_jobs"])
+
+    for engine in [engine for engine in _POOLS if not engine._active]:
+        if sum(_POOLS.values()) + workers <= limit:
+            break
+        engine._shutdown_pool()
+
+
+# ======================================================
+# Explainer reuse: bounded LRU of engines per model and settings
+# ======================================================
+MAX_ENGINES = 8
+
+_ENGINES = OrderedDict()
+_ENGINES_LOCK = threading.Lock()
+
+
+def background_fingerprint(background):
+
+    # Content hash (values + column names) of the background frame
+    digest = hashlib.sha256(pd.util.hash_pandas_object(background, index=False).to_numpy().tobytes())
+    digest.update("\x1f".join(map(str, background.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_engine(model, model_name, background, mode="tree_path_dependent", **kwargs):
+
+    # Keyed on the model's identity; the entry keeps the model itself, so
+    # its id cannot be reused by another model while the entry exists.
+    key = (
+        id(model), model_name, mode,
+        background_fingerprint(background),
+        tuple(sorted(kwargs.items()))
+    )
+
+    with _ENGINES_LOCK:
+        if key in _ENGINES and _ENGINES[key][0] is model:
+            _ENGINES.move_to_end(key)
+            return _ENGINES[key][1]
+
+    # Built outside the lock: a slow explainer for one model does not
+    # hold up lookups for the others
+    engine = ShapEngine(model, model_name, background, mode=mode, **kwargs)
+
+    with _ENGINES_LOCK:
+        if key in _ENGINES and _ENGINES[key][0] is model:
+            # Another thread built the same engine first
+            _ENGINES.move_to_end(key)
+            return _ENGINES[key][1]
+
+        _ENGINES[key] = (model, engine)
+
+        evicted = []
+        while len(_ENGINES) > MAX_ENGINES:
+            evicted.append(_ENGINES.popitem(last=False)[1][1])
+
+    for old in evicted:
+        old.close()
+
+    return engine
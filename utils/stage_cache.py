@@ -0,0 +1,116 @@
+# utils/stage_cache.py
+
+import hashlib
+import inspect
+import json
+import os
+import threading
+
+import joblib
+
+
+def code_version(*modules):
+
+    # Hash of the source files that implement a stage: editing any of
+    # them invalidates that stage and everything downstream of it.
+    digest = hashlib.sha256()
+
+    for module in modules:
+        with open(inspect.getsourcefile(module), "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+class StageCache:
+
+    # Entries are never invalidated in place (a change produces a new
+    # key), so old ones are evicted by size: beyond max_bytes the least
+    # recently used entries (by mtime, refreshed on every hit) go first.
+
+    def __init__(self, root="models/stage_cache", enabled=True, max_bytes=2 * 1024 ** 3):
+        self.root = root
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+    def key(self, stage, upstream, config, code):
+
+        payload = {
+            "stage": stage,
+            "upstream": upstream,
+            "config": config,
+            "code": code
+        }
+
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, stage, key):
+        return os.path.join(self.root, stage, f"{key}.joblib")
+
+    def run(self, stage, fn, upstream, config, code, refresh=False):
+
+        # Returns (output, key, hit). upstream is the key of the previous
+        # stage (or an input fingerprint), so a change anywhere upstream
+        # changes every downstream key. refresh=True recomputes and
+        # overwrites the entry.
+        key = self.key(stage, upstream, config, code)
+        path = self._path(stage, key)
+
+        if self.enabled and not refresh and os.path.exists(path):
+            try:
+                output = joblib.load(path)
+                os.utime(path)
+                return output, key, True
+            except FileNotFoundError:
+                pass  # evicted by another process in between
+
+        output = fn()
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            joblib.dump(output, tmp_path)
+            os.replace(tmp_path, path)
+            self._evict(keep=path)
+
+        return output, key, False
+
+    def _entries(self):
+
+        entries = []
+
+        for stage in os.listdir(self.root):
+            stage_dir = os.path.join(self.root, stage)
+            if not os.path.isdir(stage_dir):
+                continue
+
+            for name in os.listdir(stage_dir):
+                if not name.endswith(".joblib"):
+                    continue
+                path = os.path.join(stage_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def _evict(self, keep):
+
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
@@ -0,0 +1,197 @@
+# utils/streaming_ingest.py
+
+import numpy as np
+import pandas as pd
+
+
+def infer_dtypes(dataset_path, target_column, sample_rows=10000):
+
+    # Pin dtypes from a sample so every chunk parses (and hashes)
+    # identically: numeric → float64 (a later chunk may contain NaN),
+    # text → str. The target is pinned too: a chunk of int labels and one
+    # with a missing label would otherwise hash equal rows differently.
+    sample = pd.read_csv(dataset_path, nrows=sample_rows)
+
+    dtypes = {}
+    for col in sample.columns:
+        if col == target_column and pd.api.types.is_bool_dtype(sample[col]):
+            dtypes[col] = "boolean"
+        elif pd.api.types.is_numeric_dtype(sample[col]) and not pd.api.types.is_bool_dtype(sample[col]):
+            dtypes[col] = "float64"
+        else:
+            dtypes[col] = "str"
+
+    return dtypes
+
+
+def integer_labels(labels):
+
+    # Undo the float64 pin of a numeric target: labels that are all
+    # whole numbers (no missing ones) go back to int64, as a plain
+    # read_csv would parse them. Series in, Series out; lists too.
+    values = pd.Series(labels)
+
+    if (
+        not pd.api.types.is_float_dtype(values)
+        or values.isna().any()
+        or not np.array_equal(values, np.floor(values))
+    ):
+        return labels
+
+    values = values.astype(np.int64)
+    return values if isinstance(labels, pd.Series) else values.tolist()
+
+
+class HashIndex:
+
+    # Set of uint64 row hashes kept as a few sorted runs (8 bytes per
+    # hash). Each chunk's new hashes become a run and runs of similar
+    # size are merged, so a hash is re-sorted O(log n) times in total
+    # instead of once per chunk, and lookups binary-search each run.
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, hashes):
+
+        found = np.zeros(len(hashes), dtype=bool)
+
+        for run in self.runs:
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == hashes
+
+        return found
+
+    def add(self, hashes):
+
+        run = np.unique(hashes)
+        if not len(run):
+            return
+
+        while self.runs and len(self.runs[-1]) <= 2 * len(run):
+            run = np.union1d(self.runs.pop(), run)
+
+        self.runs.append(run)
+
+
+class StreamingValidator:
+
+    # One pass over a chunked CSV. Memory is bounded by the chunk size,
+    # a fixed-size per-column reservoir for medians (reservoir_size=0
+    # skips it), and 8 bytes per unique row for the duplicate-detection
+    # hash index.
+
+    def __init__(self, target_column, reservoir_size=20000, random_state=42):
+        self.target_column = target_column
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(random_state)
+
+        self.columns = None
+        self.numeric_columns = None
+        self.total_rows = 0
+        self.duplicate_rows = 0
+        self.missing = None
+        self.class_counts = {}
+
+        self._seen_hashes = HashIndex()
+        self._reservoir = None
+        self._reservoir_keys = np.empty(0)
+
+    def update(self, chunk):
+
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.missing = pd.Series(0, index=chunk.columns, dtype=np.int64)
+            self.numeric_columns = [
+                col for col in chunk.columns
+                if col != self.target_column
+                and pd.api.types.is_numeric_dtype(chunk[col])
+                and not pd.api.types.is_bool_dtype(chunk[col])
+            ]
+            self._reservoir = np.empty((0, len(self.numeric_columns)))
+
+        self.total_rows += len(chunk)
+        self.missing += chunk.isnull().sum()
+
+        # ---------------- Duplicates (row hashes) ----------------
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+
+        duplicate = pd.Series(hashes).duplicated().to_numpy().copy()
+        duplicate |= self._seen_hashes.contains(hashes)
+
+        self.duplicate_rows += int(duplicate.sum())
+        self._seen_hashes.add(hashes[~duplicate])
+
+        unique_rows = chunk[~duplicate]
+
+        # ---------------- Class distribution (unique rows) ----------------
+        if self.target_column in unique_rows.columns:
+            for label, count in unique_rows[self.target_column].value_counts().items():
+                self.class_counts[label] = self.class_counts.get(label, 0) + int(count)
+
+        # ---------------- Bottom-k reservoir for approximate medians ----------------
+        if not self.reservoir_size:
+            return duplicate
+
+        values = unique_rows[self.numeric_columns].to_numpy(dtype=np.float64)
+        keys = self.rng.random(len(values))
+
+        pool = np.vstack([self._reservoir, values])
+        pool_keys = np.concatenate([self._reservoir_keys, keys])
+
+        if len(pool_keys) > self.reservoir_size:
+            keep = np.argpartition(pool_keys, self.reservoir_size)[:self.reservoir_size]
+            pool, pool_keys = pool[keep], pool_keys[keep]
+
+        self._reservoir, self._reservoir_keys = pool, pool_keys
+
+        # Callers that also consume the rows skip the same duplicates
+        return duplicate
+
+    def approximate_medians(self):
+
+        if self._reservoir is None or not len(self._reservoir):
+            return {}
+
+        # Exact while the unique row count fits in the reservoir
+        medians = np.nanmedian(self._reservoir, axis=0)
+        return {col: float(m) for col, m in zip(self.numeric_columns, medians)}
+
+    def result(self):
+
+        if self.columns is None:
+            raise ValueError("Dataset is empty")
+
+        return {
+            "columns": self.columns,
+            "total_rows": self.total_rows,
+            "unique_rows": self.total_rows - self.duplicate_rows,
+            "duplicate_rows": self.duplicate_rows,
+            "missing_per_column": {
+                col: int(n) for col, n in self.missing.items() if n
+            },
+            "missing_values": int(self.missing.sum()),
+            "class_distribution": self.class_counts,
+            "approximate_medians": self.approximate_medians()
+        }
+
+
+def stream_validate(dataset_path, target_column, chunksize=100000, dtypes=None,
+                    reservoir_size=20000):
+
+    if dtypes is None:
+        dtypes = infer_dtypes(dataset_path, target_column)
+
+    validator = StreamingValidator(target_column, reservoir_size=reservoir_size)
+
+    for chunk in pd.read_csv(dataset_path, chunksize=chunksize, dtype=dtypes):
+        validator.update(chunk)
+
+    stats = validator.result()
+    stats["dtypes"] = dtypes
+
+    return stats
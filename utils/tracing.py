@@ -0,0 +1,323 @@
+# utils/tracing.py
+#
+# Lightweight structured spans. Code anywhere in the pipeline opens
+#
+#     with span("feature", disease="heart") as s:
+#         ...
+#         s.set(rows=X.shape[0], features=X.shape[1])
+#
+# and, when a Tracer is active (use_tracer), one JSON line per span is
+# written with wall / CPU time, memory and the attributes. Without an
+# active tracer span() is a no-op. The active tracer and parent span
+# live in contextvars: asyncio tasks inherit them automatically, thread
+# pools need submit_in_context(), process pools run_traced().
+
+import contextvars
+import cProfile
+import io
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+_TRACER = contextvars.ContextVar("tracer", default=None)
+_SPAN = contextvars.ContextVar("span", default=None)
+
+# Spans measuring tracemalloc peaks, across all tracers: the peak is
+# process-global, so only spans that never ran next to an unrelated
+# one (another thread's, not an ancestor / descendant) get a peak.
+_MEMORY_SPANS = set()
+_MEMORY_LOCK = threading.Lock()
+
+
+def _rss_mb():
+
+    # Current RSS from /proc where available, else the peak so far
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Span:
+
+    def __init__(self, name, trace_id, parent, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.parent = parent
+        self.attributes = dict(attributes)
+        self.child_peak = 0
+        self.concurrent = False
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+
+class _NullSpan:
+
+    def set(self, **attributes):
+        return self
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+
+    # output:      path of a JSON-lines file (appended), "-" for stderr,
+    #              or any object with write()
+    # memory:      also track the tracemalloc peak per span (slower);
+    #              RSS is always recorded
+    # profile_dir: dump a cProfile .prof file for each span whose name
+    #              is in profile_spans (default: every top-level span)
+
+    def __init__(self, output="-", memory=False, profile_dir=None, profile_spans=None):
+        self.memory = memory
+        self.profile_dir = profile_dir
+        self.profile_spans = set(profile_spans) if profile_spans else None
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.lock = threading.Lock()
+
+        if output == "-":
+            self.stream, self.owns_stream = sys.stderr, False
+        elif isinstance(output, (str, os.PathLike)):
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            self.stream, self.owns_stream = open(output, "a", encoding="utf-8"), True
+        else:
+            self.stream, self.owns_stream = output, False
+
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        # cProfile allows one active profiler per thread
+        self._profiling = threading.local()
+
+    def _should_profile(self, current):
+
+        if self.profile_dir is None or getattr(self._profiling, "active", False):
+            return False
+        if self.profile_spans is None:
+            return current.parent is None
+        return current.name in self.profile_spans
+
+    def emit(self, record):
+
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    @contextmanager
+    def span(self, name, **attributes):
+
+        current = Span(name, self.trace_id, _SPAN.get(), attributes)
+        token = _SPAN.set(current)
+
+        profiler = None
+        if self._should_profile(current):
+            profiler = cProfile.Profile()
+            self._profiling.active = True
+
+        if self.memory:
+            _open_memory_span(current)
+            traced_start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+        status, error = "ok", None
+        started_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        thread_cpu_start = time.thread_time()
+
+        if profiler is not None:
+            profiler.enable()
+
+        try:
+            yield current
+        except BaseException as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiling.active = False
+
+            record = {
+                "trace_id": self.trace_id,
+                "span_id": current.span_id,
+                "parent_id": current.parent_id,
+                "name": name,
+                "started_at": started_at,
+                "wall_seconds": round(time.perf_counter() - wall_start, 6),
+                "cpu_seconds": round(time.process_time() - cpu_start, 6),
+                "thread_cpu_seconds": round(time.thread_time() - thread_cpu_start, 6),
+                "rss_mb": round(_rss_mb(), 1),
+                "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "thread": threading.current_thread().name,
+                "status": status
+            }
+
+            if self.memory:
+                # reset_peak() in a child clears the global peak, so the
+                # child's peak is folded back into its parent. A span
+                # that overlapped an unrelated one gets None: their
+                # resets and allocations mix in the same global peak.
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, current.child_peak)
+                concurrent = _close_memory_span(current)
+                record["traced_peak_mb"] = (
+                    None if concurrent else round((peak - traced_start) / 2**20, 3)
+                )
+                if current.parent is not None:
+                    current.parent.child_peak = max(current.parent.child_peak, peak)
+
+            if error is not None:
+                record["error"] = error
+
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(
+                    self.profile_dir, f"{self.trace_id}-{name}-{current.span_id}.prof"
+                )
+                profiler.dump_stats(path)
+                record["profile"] = path
+
+            record["attributes"] = current.attributes
+            _SPAN.reset(token)
+            self.emit(record)
+
+    def close(self):
+
+        if self.owns_stream:
+            self.stream.close()
+
+
+def _open_memory_span(current):
+
+    ancestors = set()
+    node = current.parent
+    while node is not None:
+        ancestors.add(node)
+        node = getattr(node, "parent", None)
+
+    with _MEMORY_LOCK:
+        others = _MEMORY_SPANS - ancestors
+        if others:
+            # Ancestors of either side saw both, so every open span is
+            # affected
+            for open_span in _MEMORY_SPANS:
+                open_span.concurrent = True
+            current.concurrent = True
+        _MEMORY_SPANS.add(current)
+
+
+def _close_memory_span(current):
+
+    with _MEMORY_LOCK:
+        _MEMORY_SPANS.discard(current)
+        return current.concurrent
+
+
+@contextmanager
+def use_tracer(tracer):
+
+    # Makes `tracer` the active tracer for this context (None disables)
+    token = _TRACER.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _TRACER.reset(token)
+
+
+@contextmanager
+def span(name, **attributes):
+
+    tracer = _TRACER.get()
+
+    if tracer is None:
+        yield _NULL_SPAN
+        return
+
+    with tracer.span(name, **attributes) as current:
+        yield current
+
+
+def submit_in_context(pool, fn, *args, **kwargs):
+
+    # ThreadPoolExecutor does not copy contextvars: run fn in a copy of
+    # the caller's context so its spans keep the tracer and parent.
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# ======================================================
+# Spans from worker processes
+# ======================================================
+class _RemoteParent:
+
+    # Parent span that lives in the calling process
+    def __init__(self, span_id):
+        self.span_id = span_id
+        self.child_peak = 0
+
+
+def trace_context():
+
+    # What a worker process needs to attach its spans to the current
+    # trace (None when tracing is off)
+    tracer = _TRACER.get()
+
+    if tracer is None:
+        return None
+
+    parent = _SPAN.get()
+    return tracer.trace_id, parent.span_id if parent is not None else None, tracer.memory
+
+
+def run_traced(context, fn, *args):
+
+    # Runs in the worker: fn's spans are buffered under the caller's
+    # trace and parent span and returned as (result, records); on an
+    # error they travel on the exception (trace_records). emit_records()
+    # writes them in the calling process.
+    if context is None:
+        return fn(*args), []
+
+    trace_id, parent_id, memory = context
+    buffer = io.StringIO()
+    tracer = Tracer(buffer, memory=memory)
+    tracer.trace_id = trace_id
+
+    token = _SPAN.set(_RemoteParent(parent_id))
+    try:
+        with use_tracer(tracer):
+            result = fn(*args)
+    except BaseException as e:
+        e.trace_records = _records(buffer)
+        raise
+    finally:
+        _SPAN.reset(token)
+
+    return result, _records(buffer)
+
+
+def _records(buffer):
+    return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+
+def emit_records(records):
+
+    tracer = _TRACER.get()
+
+    if tracer is not None:
+        for record in records:
+            tracer.emit(record)
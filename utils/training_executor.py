@@ -0,0 +1,122 @@
+# utils/training_executor.py
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from utils.tracing import span, submit_in_context
+
+
+def resolve_core_budget(n_jobs=None):
+
+    available = os.cpu_count() or 1
+
+    if n_jobs is None or n_jobs == -1:
+        return available
+
+    return max(1, min(int(n_jobs), available))
+
+
+def split_core_budget(candidates, budget):
+
+    # candidates: {name: threaded (bool)}
+    # Returns (model-level workers, {name: library threads}).
+    names = list(candidates)
+
+    if budget <= len(names):
+        return budget, {name: 1 for name in names}
+
+    threaded = [name for name in names if candidates[name]]
+    threads = {name: 1 for name in names}
+
+    if not threaded:
+        return len(names), threads
+
+    # Single-threaded candidates keep one core each, the rest of the
+    # budget is shared evenly by the multi-threaded libraries.
+    spare = budget - len(names)
+
+    for i, name in enumerate(threaded):
+        threads[name] += spare // len(threaded) + (1 if i < spare % len(threaded) else 0)
+
+    return len(names), threads
+
+
+class CoreBudget:
+
+    # Global pool of cores shared by concurrently running pipelines.
+    # CPU-bound stages reserve cores before they start and give them
+    # back when they finish.
+
+    def __init__(self, total):
+        self.total = max(1, int(total))
+        self._available = self.total
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, cores):
+
+        cores = max(1, min(int(cores), self.total))
+
+        with self._condition:
+            while self._available < cores:
+                self._condition.wait()
+            self._available -= cores
+
+        try:
+            yield cores
+        finally:
+            with self._condition:
+                self._available += cores
+                self._condition.notify_all()
+
+
+class TrainingExecutor:
+
+    def __init__(self, n_jobs=None):
+        self.budget = resolve_core_budget(n_jobs)
+
+    def fit_all(self, candidates, X_train, y_train):
+
+        # candidates: {name: (estimator, thread_param or None[, fit_params])}
+        workers, threads = split_core_budget(
+            {name: spec[1] is not None for name, spec in candidates.items()},
+            self.budget
+        )
+
+        for name, spec in candidates.items():
+            if spec[1] is not None:
+                spec[0].set_params(**{spec[1]: threads[name]})
+
+        def fit_one(name):
+            estimator = candidates[name][0]
+            fit_params = candidates[name][2] if len(candidates[name]) > 2 else {}
+            start = time.perf_counter()
+            with span("fit", model=name, rows=len(X_train), features=X_train.shape[1],
+                      threads=threads.get(name, 1)):
+                estimator.fit(X_train, y_train, **fit_params)
+            return estimator, time.perf_counter() - start
+
+        # Threads share X_train / y_train in place: no pickling or
+        # per-worker copies, and the heavy libraries release the GIL.
+        wall_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                name: submit_in_context(pool, fit_one, name) for name in candidates
+            }
+            results = {name: future.result() for name, future in futures.items()}
+
+        timings = {
+            "per_model_seconds": {
+                name: round(seconds, 4) for name, (_, seconds) in results.items()
+            },
+            "wall_seconds": round(time.perf_counter() - wall_start, 4),
+            "core_budget": self.budget,
+            "workers": workers,
+            "threads_per_model": threads
+        }
+
+        return {name: estimator for name, (estimator, _) in results.items()}, timings
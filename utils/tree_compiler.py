@@ -0,0 +1,404 @@
+# utils/tree_compiler.py
+#
+# Flattens the selected model into contiguous NumPy arrays and scores
+# it with vectorized gathers, without sklearn / LightGBM per-call
+# overhead (input validation, DataFrame checks, per-estimator loops,
+# thread pools). Used where a handful of rows is scored per call.
+#
+#   compiled = compile_model(model, "Random Forest")
+#   verify_compiled(model, compiled, X_test)      # max |Δprobability|
+#   compiled.predict_proba(X)
+#
+# On large batches the native C++ / Cython loops are faster, so the
+# scoring service wraps both in CompiledScorer and switches on batch
+# size (see compile_for_scoring).
+#
+# Trees: every node of every tree lives in one set of arrays (feature,
+# threshold, children, default direction, value). Leaves point to
+# themselves, so all trees advance one level per step for max_depth
+# steps and no row needs per-tree bookkeeping.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# How a node routes NaN (and, for LightGBM "Zero", zero) inputs
+MISSING_DEFAULT = 0     # NaN → default direction (sklearn, LightGBM "NaN")
+MISSING_AS_ZERO = 1     # NaN compared as 0.0 (LightGBM "None")
+MISSING_ZERO = 2        # NaN or |x| <= 1e-35 → default (LightGBM "Zero")
+
+LIGHTGBM_ZERO_THRESHOLD = 1e-35
+
+
+def _sigmoid(raw, scale=1.0):
+    return 1.0 / (1.0 + np.exp(-scale * raw))
+
+
+class CompiledTrees:
+
+    # link: "mean" → probability is the mean leaf value (Random Forest)
+    #       "sigmoid" → probability is sigmoid(scale · Σ leaves) (LightGBM)
+
+    def __init__(self, nodes, roots, max_depth, n_features, link, input_dtype,
+                 sigmoid_scale=1.0, chunk_rows=4096):
+        self.feature = nodes["feature"]
+        self.threshold = nodes["threshold"]
+        # children[2·i] = left, children[2·i + 1] = right
+        self.children = np.ascontiguousarray(
+            np.column_stack([nodes["left"], nodes["right"]]).ravel()
+        )
+        self.default_left = nodes["default_left"]
+        self.missing_mode = nodes["missing_mode"]
+        self.value = nodes["value"]
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.link = link
+        self.input_dtype = input_dtype
+        self.sigmoid_scale = sigmoid_scale
+        self.chunk_rows = chunk_rows
+        self.has_zero_rules = bool(np.any(self.missing_mode == MISSING_ZERO))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _route_missing(self, x, nodes, go_left):
+
+        nan = np.isnan(x)
+        mode = self.missing_mode[nodes]
+
+        # LightGBM "None": NaN is compared as 0.0
+        as_zero = nan & (mode == MISSING_AS_ZERO)
+        if as_zero.any():
+            go_left = np.where(as_zero, 0.0 <= self.threshold[nodes], go_left)
+
+        missing = nan & (mode != MISSING_AS_ZERO)
+        if self.has_zero_rules:
+            missing |= (mode == MISSING_ZERO) & (np.abs(x) <= LIGHTGBM_ZERO_THRESHOLD)
+
+        return np.where(missing, self.default_left[nodes], go_left)
+
+    def _leaf_values(self, X):
+
+        # X: (rows × features) contiguous array in input_dtype
+        n_rows = len(X)
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * self.n_features)[:, None]
+        check_missing = self.has_zero_rules or np.isnan(flat).any()
+
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self.feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+
+            if check_missing:
+                go_left = self._route_missing(x, nodes, go_left)
+
+            nodes = self.children[2 * nodes + (~go_left)]
+
+        return self.value[nodes]
+
+    def predict_raw(self, X):
+
+        X = self._as_array(X)
+        out = np.empty(len(X))
+
+        for start in range(0, len(X), self.chunk_rows):
+            out[start:start + self.chunk_rows] = (
+                self._leaf_values(X[start:start + self.chunk_rows]).sum(axis=1)
+            )
+
+        return out
+
+    def predict_proba(self, X):
+
+        raw = self.predict_raw(X)
+
+        if self.link == "mean":
+            positive = raw / self.n_trees
+        else:
+            positive = _sigmoid(raw, self.sigmoid_scale)
+
+        return np.column_stack([1.0 - positive, positive])
+
+    def _as_array(self, X):
+
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy(dtype=self.input_dtype)
+
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+
+        if X.ndim == 1:
+            X = X[None, :]
+
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected {self.n_features} features, got {X.shape[1]}"
+            )
+
+        return X
+
+
+class CompiledLinear:
+
+    # Logistic Regression: sigmoid(X · coef + intercept)
+
+    def __init__(self, coef, intercept, n_features):
+        self.coef = coef
+        self.intercept = intercept
+        self.n_features = n_features
+
+    def predict_raw(self, X):
+
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy(dtype=np.float64)
+
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        return X @ self.coef + self.intercept
+
+    def predict_proba(self, X):
+        positive = _sigmoid(self.predict_raw(X))
+        return np.column_stack([1.0 - positive, positive])
+
+
+# ======================================================
+# Node Arrays
+# ======================================================
+def _empty_nodes(n_nodes):
+    return {
+        "feature": np.zeros(n_nodes, dtype=np.int64),
+        "threshold": np.full(n_nodes, np.inf),
+        "left": np.zeros(n_nodes, dtype=np.int64),
+        "right": np.zeros(n_nodes, dtype=np.int64),
+        "default_left": np.zeros(n_nodes, dtype=bool),
+        "missing_mode": np.full(n_nodes, MISSING_DEFAULT, dtype=np.int8),
+        "value": np.zeros(n_nodes)
+    }
+
+
+def _concatenate(trees):
+
+    # Per-tree node dicts → one global array per field, child indices
+    # shifted by each tree's offset
+    sizes = [len(tree["feature"]) for tree in trees]
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+    nodes = {
+        key: np.concatenate([
+            tree[key] + offset if key in ("left", "right") else tree[key]
+            for tree, offset in zip(trees, offsets)
+        ])
+        for key in trees[0]
+    }
+
+    return nodes, offsets
+
+
+# ======================================================
+# Random Forest (sklearn)
+# ======================================================
+def compile_random_forest(model):
+
+    positive = 1
+    trees = []
+    max_depth = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        nodes = _empty_nodes(tree.node_count)
+
+        leaf = tree.children_left == -1
+        index = np.arange(tree.node_count)
+
+        nodes["feature"] = np.where(leaf, 0, tree.feature).astype(np.int64)
+        nodes["threshold"] = np.where(leaf, np.inf, tree.threshold)
+        nodes["left"] = np.where(leaf, index, tree.children_left).astype(np.int64)
+        nodes["right"] = np.where(leaf, index, tree.children_right).astype(np.int64)
+
+        missing_go_to_left = getattr(tree, "missing_go_to_left", None)
+        if missing_go_to_left is not None:
+            nodes["default_left"] = np.asarray(missing_go_to_left, dtype=bool)
+
+        # Class fractions per leaf, normalized like
+        # DecisionTreeClassifier.predict_proba
+        counts = tree.value[:, 0, :]
+        totals = counts.sum(axis=1)
+        totals[totals == 0] = 1.0
+        nodes["value"] = np.where(leaf, counts[:, positive] / totals, 0.0)
+
+        trees.append(nodes)
+        max_depth = max(max_depth, tree.max_depth)
+
+    nodes, roots = _concatenate(trees)
+
+    # sklearn casts inputs to float32 before comparing with thresholds
+    return CompiledTrees(
+        nodes, roots, max_depth, model.n_features_in_, "mean", np.float32
+    )
+
+
+# ======================================================
+# LightGBM (LGBMClassifier or out-of-core BoosterClassifier)
+# ======================================================
+def _lightgbm_tree(structure):
+
+    # Nested dump_model() tree → node arrays (pre-order)
+    rows = []
+
+    def visit(node):
+        index = len(rows)
+        rows.append(None)
+
+        if "leaf_value" in node:
+            rows[index] = (0, np.inf, index, index, False, MISSING_DEFAULT, node["leaf_value"])
+            return index, 0
+
+        if node["decision_type"] != "<=":
+            raise NotImplementedError("Categorical LightGBM splits are not compiled")
+
+        left, left_depth = visit(node["left_child"])
+        right, right_depth = visit(node["right_child"])
+
+        missing_mode = {
+            "NaN": MISSING_DEFAULT,
+            "None": MISSING_AS_ZERO,
+            "Zero": MISSING_ZERO
+        }[node["missing_type"]]
+
+        rows[index] = (
+            node["split_feature"], node["threshold"], left, right,
+            node["default_left"], missing_mode, 0.0
+        )
+        return index, 1 + max(left_depth, right_depth)
+
+    _, depth = visit(structure)
+
+    feature, threshold, left, right, default_left, missing_mode, value = zip(*rows)
+
+    return {
+        "feature": np.asarray(feature, dtype=np.int64),
+        "threshold": np.asarray(threshold, dtype=np.float64),
+        "left": np.asarray(left, dtype=np.int64),
+        "right": np.asarray(right, dtype=np.int64),
+        "default_left": np.asarray(default_left, dtype=bool),
+        "missing_mode": np.asarray(missing_mode, dtype=np.int8),
+        "value": np.asarray(value, dtype=np.float64)
+    }, depth
+
+
+def compile_lightgbm(model):
+
+    booster = model.booster_
+
+    # Same trees predict_proba uses (best iteration when early-stopped)
+    dump = booster.dump_model(num_iteration=getattr(model, "best_iteration_", None) or None)
+
+    objective = dump.get("objective", "binary sigmoid:1")
+    if not objective.startswith("binary"):
+        raise NotImplementedError(f"Unsupported LightGBM objective: {objective}")
+
+    sigmoid_scale = 1.0
+    for part in objective.split():
+        if part.startswith("sigmoid:"):
+            sigmoid_scale = float(part.split(":", 1)[1])
+
+    trees, depths = zip(*(_lightgbm_tree(info["tree_structure"]) for info in dump["tree_info"]))
+    nodes, roots = _concatenate(list(trees))
+
+    return CompiledTrees(
+        nodes, roots, max(depths), dump["max_feature_idx"] + 1, "sigmoid", np.float64,
+        sigmoid_scale=sigmoid_scale
+    )
+
+
+def compile_logistic_regression(model):
+
+    return CompiledLinear(
+        np.ravel(model.coef_[-1]).astype(np.float64),
+        float(np.ravel(model.intercept_)[-1]),
+        model.coef_.shape[1]
+    )
+
+
+COMPILERS = {
+    "Random Forest": compile_random_forest,
+    "LightGBM": compile_lightgbm,
+    "Logistic Regression": compile_logistic_regression
+}
+
+
+def compile_model(model, model_name):
+
+    if model_name not in COMPILERS:
+        raise ValueError(f"Unsupported model type: {model_name}")
+
+    return COMPILERS[model_name](model)
+
+
+def verify_compiled(model, compiled, X, atol=1e-6):
+
+    # Largest probability difference against the original model on X;
+    # raises when it is above atol.
+    expected = model.predict_proba(X)[:, 1]
+    actual = compiled.predict_proba(X)[:, 1]
+
+    max_diff = float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
+
+    if max_diff > atol:
+        raise ValueError(
+            f"Compiled model differs from the original by {max_diff:.3g} (> {atol})"
+        )
+
+    return max_diff
+
+
+class CompiledScorer:
+
+    # Compiled arrays for batches up to max_rows, the original model
+    # above that (its per-row cost is lower once the call overhead is
+    # amortized).
+
+    def __init__(self, model, compiled, max_rows=256):
+        self.model = model
+        self.compiled = compiled
+        self.max_rows = max_rows
+        self.classes_ = model.classes_
+
+    def predict_proba(self, X):
+
+        if len(X) <= self.max_rows:
+            return self.compiled.predict_proba(X)
+
+        return self.model.predict_proba(X)
+
+
+def compile_for_scoring(model, model_name, X_check, max_rows=256, atol=1e-6):
+
+    # (predictor, info). Falls back to the original model when the model
+    # cannot be compiled or disagrees with it on X_check.
+    start = time.perf_counter()
+
+    try:
+        compiled = compile_model(model, model_name)
+        max_diff = verify_compiled(model, compiled, X_check, atol=atol)
+    except (ValueError, NotImplementedError) as e:
+        return model, {"compiled": False, "reason": str(e)}
+
+    return CompiledScorer(model, compiled, max_rows), {
+        "compiled": True,
+        "trees": getattr(compiled, "n_trees", 0),
+        "nodes": getattr(compiled, "n_nodes", 0),
+        "max_rows": max_rows,
+        "max_abs_diff": max_diff,
+        "compile_seconds": round(time.perf_counter() - start, 3)
+    }